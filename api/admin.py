@@ -1,8 +1,11 @@
 from django.contrib import admin
-from api.models import WeatherData
+from api.models import AnalyticsConfig, AnalyticsRule, ElectricityTariff, WeatherData
 
 
 
 admin.site.register(WeatherData)
+admin.site.register(AnalyticsConfig)
+admin.site.register(AnalyticsRule)
+admin.site.register(ElectricityTariff)
 
 # Register your models here.
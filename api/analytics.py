@@ -0,0 +1,149 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+from .weather_store import LOCAL_TIMEZONE
+
+# Moderate values for each variable
+MODERATE_VALUES = {
+    "temperature_2m": 14,  # [5 to 40 ]
+    "relative_humidity_2m": 65, # [ 45 to 100]
+    "dew_point_2m": 6, # [4 to 10]
+    "cloud_cover": 50, # [0 to 100]
+    "wind_direction_10m": 180, # [0 to 360]
+    "wind_gusts_10m": 80 # [0 to 100]
+}
+
+# Define ranges for each variable
+RANGES = {
+    "temperature_2m": (0, 40),
+    "relative_humidity_2m": (45, 100),
+    "dew_point_2m": (4, 10),
+    "cloud_cover": (0, 100),
+    "wind_direction_10m": (0, 360),
+    "wind_gusts_10m": (0, 100),
+}
+
+ELECTRICITY_PROVIDERS = {
+    "Electric Ireland": 0.42, # euro per kwh
+    "Bord Gais Energy": 0.43,
+    "SSE Airtricity": 0.43,
+    "Energia": 0.38,
+    "PrePayPower": 0.46,
+    "Flogas": 0.43
+}
+
+AVERAGE_CONSUMPTION_PER_HOUR = 0.48 # kwh
+
+DAY = 86400
+
+
+def costs_by_provider(providers, costs):
+    """Map provider names to an array of their costs, in the same order."""
+    return dict(zip(providers, costs.tolist()))
+
+
+class Analytics:
+    """Working hours, kWh and provider costs for a (..., variables, hours) matrix.
+
+    Leading axes are kept, so one call can cover many locations at once. A
+    variable without a moderate value gets no working hours and no costs.
+    """
+
+    def __init__(self, variables, moderate_values, providers, working_hours, total_kwh, costs,
+                 days=None, daily_working_hours=None, daily_kwh=None, daily_costs=None):
+        self.variables = variables
+        self.moderate_values = moderate_values
+        self.providers = providers
+        self.working_hours = working_hours
+        self.total_kwh = total_kwh
+        self.costs = costs
+        self.days = days
+        self.daily_working_hours = daily_working_hours
+        self.daily_kwh = daily_kwh
+        self.daily_costs = daily_costs
+
+    def variable_report(self, idx, location=()):
+        """Return the JSON fields AnalyticsView reports for one variable."""
+        moderate_value = self.moderate_values[idx]
+        key = (*location, idx)
+
+        if moderate_value is None:
+            report = {"moderate_value": None, "working_hours": None, "electricity_total_rate_per_brand": {}}
+        else:
+            report = {
+                "moderate_value": moderate_value,
+                "working_hours": int(self.working_hours[key]),
+                "electricity_total_rate_per_brand": costs_by_provider(self.providers, self.costs[key]),
+            }
+
+        if self.days is not None:
+            report["daily"] = [] if moderate_value is None else [
+                {
+                    "date": day,
+                    "working_hours": int(hours),
+                    "total_kwh": round(float(kwh), 2),
+                    "electricity_total_rate_per_brand": costs_by_provider(self.providers, costs),
+                }
+                for day, hours, kwh, costs in zip(
+                    self.days, self.daily_working_hours[key], self.daily_kwh[key], self.daily_costs[key]
+                )
+            ]
+        return report
+
+
+def day_labels(start, hours, interval=3600):
+    """Map every hour of a series to its local day.
+
+    Days run from one local midnight to the next, so a day with a DST change
+    has 23 or 25 hours.
+    """
+    if not hours:
+        return np.zeros(0, dtype=np.int64), []
+    times = start + np.arange(hours, dtype=np.int64) * interval
+    first_day = datetime.fromtimestamp(start, tz=LOCAL_TIMEZONE).date()
+    last_day = datetime.fromtimestamp(int(times[-1]), tz=LOCAL_TIMEZONE).date()
+    days = [first_day + timedelta(days=day) for day in range((last_day - first_day).days + 1)]
+    midnights = [datetime.combine(day, time.min, tzinfo=LOCAL_TIMEZONE).timestamp() for day in days[1:]]
+    day_index = np.searchsorted(np.array(midnights, dtype=np.int64), times, side="right")
+    return day_index, [day.isoformat() for day in days]
+
+
+def compute_analytics(variables, matrix, moderate_values=MODERATE_VALUES, providers=ELECTRICITY_PROVIDERS,
+                      consumption_per_hour=AVERAGE_CONSUMPTION_PER_HOUR, start=None, interval=3600):
+    """Compute working hours and costs for every variable and provider in one pass.
+
+    `matrix` holds one row of hourly values per variable (optionally with
+    leading location axes). Passing `start`, the epoch second of the first
+    hour, adds a per-day breakdown.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    thresholds = np.array([moderate_values.get(variable, np.nan) for variable in variables], dtype=np.float64)
+    rates = np.array(list(providers.values()), dtype=np.float64)
+
+    # Working hours: values lower than the moderate value (NaN never counts)
+    below = matrix < thresholds[:, None]
+    working_hours = below.sum(axis=-1)
+    total_kwh = working_hours * consumption_per_hour
+    costs = np.round(total_kwh[..., None] * rates, 2)
+
+    days = daily_working_hours = daily_kwh = daily_costs = None
+    if start is not None:
+        day_index, days = day_labels(start, matrix.shape[-1], interval)
+        one_hot = day_index[:, None] == np.arange(len(days))[None, :]
+        daily_working_hours = below.astype(np.int64) @ one_hot.astype(np.int64)
+        daily_kwh = daily_working_hours * consumption_per_hour
+        daily_costs = np.round(daily_kwh[..., None] * rates, 2)
+
+    return Analytics(
+        list(variables),
+        [moderate_values.get(variable) for variable in variables],
+        list(providers),
+        working_hours,
+        total_kwh,
+        costs,
+        days,
+        daily_working_hours,
+        daily_kwh,
+        daily_costs,
+    )
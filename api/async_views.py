@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from . import weather_store
+from .conditional import conditional
+from .export import OUTPUTS, achunked, export_lines, parse_export_params
+from .geocoding import GeocodeError, geocode_eircode_async
+from .history import history_series, parse_history_params
+from .ingestion import WEATHER_VARIABLES, ingest_weather
+from .prefetch import record_hits
+from .renderers import ColumnarJSONRenderer, dumps_json
+from .rollups import analytics_summary
+from .responses import (
+    WEATHER_SAVED, InvalidRequest, analytics_cache_params, analytics_data, analytics_params, batch_data, batch_hits,
+    batch_params, coordinates_data, eircode_cache_params, eircode_hits, export_disposition, location_error, located,
+    request_failed_data, request_rules, required_eircode, split_locations, unexpected_error_data,
+)
+from .rules import current_rules
+
+# Async counterparts of the views in views.py, with the same URLs and JSON
+# payloads. Enabled with API_ASYNC_VIEWS when running under an ASGI server.
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIView(View):
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Like DRF's APIView, the API is not protected by CSRF tokens
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def request_data(self, request):
+        if not request.body:
+            return {}
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        return data
+
+    def columnar(self, request):
+        return request.GET.get("format") == ColumnarJSONRenderer.format
+
+    def data_response(self, data, status):
+        # Both formats are JSON; NaN (a missing hour) is written as null
+        return HttpResponse(dumps_json(data), content_type=ColumnarJSONRenderer.media_type, status=status)
+
+    def invalid_response(self, error):
+        return JsonResponse(error.data, status=error.status_code)
+
+
+class AsyncCoordinatesReturnView(AsyncAPIView):
+
+    def cache_params(self, request):
+        return eircode_cache_params(request.GET.get("eircode"))
+
+    def cache_hits(self, params):
+        return eircode_hits(params)
+
+    @conditional
+    async def get(self, request):
+        # Imported on first use, like the client itself (api/clients.py)
+        import httpx
+
+        try:
+            eircode = required_eircode(request.GET)
+            lat, lon = await geocode_eircode_async(eircode)
+            await sync_to_async(record_hits)([(lat, lon, eircode)])
+            return JsonResponse(coordinates_data(lat, lon), status=status.HTTP_200_OK)
+
+        except InvalidRequest as e:
+            return self.invalid_response(e)
+        except GeocodeError as e:
+            return JsonResponse({"error message": e.status}, status=status.HTTP_404_NOT_FOUND)
+        except httpx.HTTPError as e:
+            return JsonResponse(request_failed_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except KeyError:
+            return JsonResponse({"error message": "Invalid response format from API"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            return JsonResponse(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncAnalyticsView(AsyncAPIView):
+
+    def cache_params(self, request):
+        try:
+            return analytics_cache_params(self.request_data(request))
+        except ValueError:
+            return None
+
+    def cache_hits(self, params):
+        return [(params["latitude"], params["longitude"], "")]
+
+    @conditional
+    async def post(self, request):
+        try:
+            data = self.request_data(request)
+            try:
+                latitude, longitude, hourly_variables, forecast_days = analytics_params(data)
+                rules = request_rules(await sync_to_async(current_rules)(), data)
+            except InvalidRequest as e:
+                return self.invalid_response(e)
+
+            try:
+                start, end = weather_store.forecast_window(forecast_days=forecast_days)
+                await sync_to_async(record_hits)([(latitude, longitude, "")])
+                # Rollups hold no hourly values, so only the summary payload can be served from them
+                if data.get("summary"):
+                    summary = await sync_to_async(analytics_summary)(
+                        latitude, longitude, hourly_variables, start, end, rules
+                    )
+                    return self.data_response(summary, status.HTTP_200_OK)
+
+                hourly = await weather_store.get_hourly_async(latitude, longitude, hourly_variables, start, end)
+                columnar = self.columnar(request)
+                response_data = analytics_data(hourly, hourly_variables, rules, data.get("daily"), columnar)
+                return self.data_response(response_data, status.HTTP_200_OK)
+            except Exception as e:
+                logger.warning("Analytics failed: %s", e)
+                return JsonResponse({"error message": "Check the parameters"}, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            logger.warning("Analytics request rejected: %s", e)
+            return JsonResponse({"error message": "Check the coordinates value"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncBatchAnalyticsView(AsyncAPIView):
+
+    GEOCODE_CONCURRENCY = 16
+
+    async def _geocode(self, semaphore, eircode):
+        import httpx
+
+        async with semaphore:
+            try:
+                return await geocode_eircode_async(eircode)
+            except (GeocodeError, httpx.HTTPError) as e:
+                return location_error(e)
+
+    async def _resolve(self, locations):
+        # Geocode all eircodes at once; coordinates are used as given
+        resolved, eircodes = split_locations(locations)
+        semaphore = asyncio.Semaphore(self.GEOCODE_CONCURRENCY)
+        results = await asyncio.gather(*(self._geocode(semaphore, eircode) for eircode in eircodes))
+        for eircode, coordinates in zip(eircodes, results):
+            for idx in eircodes[eircode]:
+                resolved[idx] = coordinates
+        return resolved
+
+    async def post(self, request):
+        try:
+            data = self.request_data(request)
+            try:
+                locations, hourly_variables, forecast_days = batch_params(data)
+                rules = request_rules(await sync_to_async(current_rules)(), data)
+                resolved = await self._resolve(locations)
+            except InvalidRequest as e:
+                return self.invalid_response(e)
+
+            try:
+                start, end = weather_store.forecast_window(forecast_days=forecast_days)
+                series = await weather_store.get_hourly_many_async(located(resolved), hourly_variables, start, end)
+                await sync_to_async(record_hits)(batch_hits(locations, resolved))
+            except Exception as e:
+                logger.warning("Batch analytics failed: %s", e)
+                return JsonResponse({"error message": "Check the parameters"}, status=status.HTTP_404_NOT_FOUND)
+
+            # Keep the event loop free while hundreds of locations are summarised
+            columnar = self.columnar(request)
+            response_data = await sync_to_async(batch_data, thread_sensitive=False)(
+                locations, resolved, series, hourly_variables, start, end, data.get("daily"), columnar, rules
+            )
+            return self.data_response(response_data, status.HTTP_200_OK)
+
+        except Exception as e:
+            return JsonResponse(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncEircodeWeatherView(AsyncAPIView):
+
+    # Not @conditional: every call fetches and stores the weather, whatever the response body
+    async def get(self, request):
+        import httpx
+
+        try:
+            # Stored under one spelling, so the (eircode, date) upsert replaces earlier rows
+            try:
+                eircode = required_eircode(request.GET)
+            except InvalidRequest as e:
+                return self.invalid_response(e)
+
+            try:
+                latitude, longitude = await geocode_eircode_async(eircode)
+            except GeocodeError as e:
+                return JsonResponse({"error message": e.status}, status=status.HTTP_404_NOT_FOUND)
+
+            start, end = weather_store.forecast_window(past_days=30)
+            hourly = await weather_store.get_hourly_async(latitude, longitude, WEATHER_VARIABLES, start, end)
+            await sync_to_async(record_hits)([(latitude, longitude, eircode)])
+
+            await sync_to_async(ingest_weather)(
+                eircode,
+                latitude,
+                longitude,
+                start=hourly.start,
+                interval=hourly.interval,
+                variables=hourly.values,
+            )
+
+            return JsonResponse(WEATHER_SAVED, status=status.HTTP_200_OK)
+
+        except httpx.HTTPError as e:
+            return JsonResponse(request_failed_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            return JsonResponse(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncHistoryView(AsyncAPIView):
+
+    async def get(self, request):
+        try:
+            try:
+                location, start, end, bucket, variables = parse_history_params(request.GET)
+            except ValueError as e:
+                return JsonResponse({"error message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            data = await sync_to_async(history_series)(location, start, end, bucket, variables)
+            return self.data_response({"data": data}, status.HTTP_200_OK)
+
+        except Exception as e:
+            return JsonResponse(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncExportView(AsyncAPIView):
+
+    async def get(self, request):
+        try:
+            eircodes, start, end, variables, output, source = parse_export_params(request.GET)
+        except ValueError as e:
+            return JsonResponse({"error message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # An async iterator, so Django streams it instead of buffering a sync one
+        response = StreamingHttpResponse(
+            achunked(export_lines(eircodes, start, end, variables, output, source)),
+            content_type=OUTPUTS[output],
+        )
+        response["Content-Disposition"] = export_disposition(output, source)
+        return response
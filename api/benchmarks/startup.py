@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+# Cold start of an API worker, measured in fresh interpreters: loading the
+# WSGI application and the URLconf (which imports every view), as gunicorn
+# does before serving its first request.
+
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+print(time.perf_counter() - started)
+"""
+
+
+def _cumulative_imports(stderr):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            yield name.rstrip(), int(cumulative)
+
+
+def measure_startup(repeat=5, top=15):
+    """Start `repeat` fresh interpreters; return the start-up times and the slowest imports.
+
+    Imports are those of the last run, as (module, cumulative ms) for the
+    modules imported at the top level, slowest first.
+    """
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+            capture_output=True, text=True, check=True, env=os.environ.copy(),
+        )
+        samples.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+
+    imports = sorted(
+        ((name.strip(), round(cumulative / 1000, 1))
+         for name, cumulative in _cumulative_imports(result.stderr)
+         if not name.startswith("  ")),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    samples = np.array(samples)
+    return {
+        "repeat": repeat,
+        "min_ms": round(float(samples.min()), 1),
+        "median_ms": round(float(np.median(samples)), 1),
+        "max_ms": round(float(samples.max()), 1),
+        "imports": imports[:top],
+    }
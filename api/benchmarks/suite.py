@@ -0,0 +1,273 @@
+import platform
+import time
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from ..analytics import compute_analytics
+from ..geocoding import memory_cache
+from ..ingestion import WEATHER_VARIABLES, ingest_weather
+from ..models import GeocodedEircode, ObservationDay, WeatherData
+from ..renderers import TimedJSONRenderer, dumps_json
+from ..responses import batch_data
+from ..weather_store import (
+    DAY, INTERVAL, MAX_LOCATIONS_PER_REQUEST, HourlySeries, UpstreamFetch, _CellState, forecast_window, grid_cell,
+    load_cells, save_window,
+)
+from .upstream import DUBLIN, replayed_upstream, series_values
+
+# Benchmarks of the hot paths: the endpoints against the offline upstream
+# stand-in (cold = nothing cached, warm = everything cached), the analytics
+# computation, WeatherData ingestion, weather store reads and writes and
+# response serialization.
+
+Benchmark = namedtuple("Benchmark", ["name", "params", "run", "setup"], defaults=[None])
+
+LOCATION_COUNTS = (1, 100, 500)
+FORECAST_DAYS = (1, 7, 16)
+VARIABLE_COUNTS = (1, len(WEATHER_VARIABLES))
+EIRCODE = "D02 X285"
+
+
+def _locations(count):
+    # Spread over distinct grid cells so every location is its own upstream series
+    return [(round(51.5 + (idx // 25) * 0.1, 4), round(-10.0 + (idx % 25) * 0.2, 4)) for idx in range(count)]
+
+
+def _series(locations, variables, start, hours, seed=0):
+    return [
+        HourlySeries(latitude, longitude, start, INTERVAL, {
+            variable: series_values(variable, hours, seed + idx) for variable in variables
+        })
+        for idx, (latitude, longitude) in enumerate(locations)
+    ]
+
+
+def _name(group, **params):
+    return f"{group}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def analytics_benchmarks(start):
+    for locations in LOCATION_COUNTS:
+        for days in FORECAST_DAYS:
+            for count in VARIABLE_COUNTS:
+                variables = list(WEATHER_VARIABLES[:count])
+                series = _series(_locations(locations), variables, start, days * 24)
+                matrix = np.stack([np.vstack([hourly.values[variable] for variable in variables]) for hourly in series])
+                params = {"locations": locations, "days": days, "variables": count}
+                yield Benchmark(
+                    _name("analytics", **params), params,
+                    partial(compute_analytics, variables, matrix, start=start),
+                )
+
+
+def serialization_benchmarks(start):
+    variables = list(WEATHER_VARIABLES)
+    renderer = TimedJSONRenderer()
+    for locations in LOCATION_COUNTS:
+        for days in (1, 16):
+            coordinates = _locations(locations)
+            series = _series(coordinates, variables, start, days * 24)
+            requested = [{"latitude": latitude, "longitude": longitude} for latitude, longitude in coordinates]
+            end = start + days * DAY
+            for output in ("json", "columnar"):
+                columnar = output == "columnar"
+                payload = batch_data(requested, coordinates, series, variables, start, end, columnar=columnar)
+                render = partial(dumps_json, payload) if columnar else partial(renderer.render, payload)
+                params = {"format": output, "locations": locations, "days": days, "variables": len(variables)}
+                yield Benchmark(_name("serialize", **params), params, render)
+
+
+def ingestion_benchmarks(start):
+    # A 30-day WeatherData batch for one eircode
+    hours = 30 * 24
+    latitude, longitude = DUBLIN
+    values = {variable: series_values(variable, hours, 1) for variable in WEATHER_VARIABLES}
+    revised = {variable: series_values(variable, hours, 2) for variable in WEATHER_VARIABLES}
+    ingest = partial(ingest_weather, EIRCODE, latitude, longitude, start, INTERVAL, values)
+
+    def clear():
+        WeatherData.objects.all().delete()
+
+    def revise():
+        ingest_weather(EIRCODE, latitude, longitude, start, INTERVAL, revised)
+
+    params = {"days": 30, "variables": len(WEATHER_VARIABLES)}
+    yield Benchmark(_name("ingest", mode="insert", **params), {"mode": "insert", **params}, ingest, clear)
+    yield Benchmark(_name("ingest", mode="update", **params), {"mode": "update", **params}, ingest, revise)
+    yield Benchmark(_name("ingest", mode="unchanged", **params), {"mode": "unchanged", **params}, ingest, ingest)
+
+
+def _save_windows(fetches, windows, now):
+    for fetch, window in zip(fetches, windows):
+        save_window(fetch, window, now)
+
+
+def _clear_store():
+    ObservationDay.objects.all().delete()
+
+
+def store_benchmarks(start):
+    # A week of every variable per grid cell, saved in upstream-sized fetches
+    variables = list(WEATHER_VARIABLES)
+    end = start + 7 * DAY
+    now = timezone.now()
+    for locations in LOCATION_COUNTS:
+        cells = [grid_cell(latitude, longitude) for latitude, longitude in _locations(locations)]
+        fetches = [
+            UpstreamFetch(cells[idx:idx + MAX_LOCATIONS_PER_REQUEST], tuple(variables), start, end)
+            for idx in range(0, len(cells), MAX_LOCATIONS_PER_REQUEST)
+        ]
+        windows = [
+            {
+                cell: _CellState(
+                    cell,
+                    np.vstack([hourly.values[variable] for variable in variables]),
+                    np.ones((len(variables), 7 * 24), dtype=bool),
+                )
+                for cell, hourly in zip(fetch.cells, _series(fetch.cells, variables, start, 7 * 24))
+            }
+            for fetch in fetches
+        ]
+        save = partial(_save_windows, fetches, windows, now)
+        params = {"locations": locations, "days": 7, "variables": len(variables)}
+        yield Benchmark(_name("store_save", **params), params, save, _clear_store)
+        yield Benchmark(_name("store_load", **params), params, partial(load_cells, cells, variables, start, end, now),
+                        save)
+
+
+def _clear_caches():
+    ObservationDay.objects.all().delete()
+    GeocodedEircode.objects.all().delete()
+    WeatherData.objects.all().delete()
+    memory_cache.clear()
+    caches[settings.RESPONSE_CACHE_ALIAS].clear()
+
+
+def _request(client, method, url, data=None):
+    if method == "post":
+        response = client.post(url, data, content_type="application/json")
+    else:
+        response = client.get(url, data)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} answered {response.status_code}: {response.content[:200]!r}")
+    return response
+
+
+def endpoint_benchmarks():
+    client = Client()
+    modes = (("cold", _clear_caches), ("warm", None))
+
+    for mode, setup in modes:
+        params = {"mode": mode}
+        yield Benchmark(
+            _name("coordinates", **params), params,
+            partial(_request, client, "get", reverse("eircode"), {"eircode": EIRCODE}), setup,
+        )
+
+    for days in FORECAST_DAYS:
+        for count in VARIABLE_COUNTS:
+            body = {"latitude": DUBLIN[0], "longitude": DUBLIN[1], "hourly": list(WEATHER_VARIABLES[:count]),
+                    "forecast_days": days}
+            for mode, setup in modes:
+                params = {"mode": mode, "days": days, "variables": count}
+                yield Benchmark(
+                    _name("analytics_endpoint", **params), params,
+                    partial(_request, client, "post", reverse("analytics"), body), setup,
+                )
+
+    for locations in LOCATION_COUNTS:
+        body = {
+            "locations": [{"latitude": latitude, "longitude": longitude} for latitude, longitude in _locations(locations)],
+            "hourly": list(WEATHER_VARIABLES),
+            "forecast_days": 7,
+        }
+        for mode, setup in modes:
+            params = {"mode": mode, "locations": locations, "days": 7, "variables": len(WEATHER_VARIABLES)}
+            yield Benchmark(
+                _name("batch_endpoint", **params), params,
+                partial(_request, client, "post", reverse("analytics_batch"), body), setup,
+            )
+
+    for mode, setup in modes:
+        params = {"mode": mode}
+        yield Benchmark(
+            _name("eircode_weather", **params), params,
+            partial(_request, client, "get", reverse("eircode_weather"), {"eircode": EIRCODE}), setup,
+        )
+
+
+def all_benchmarks():
+    start, _ = forecast_window(forecast_days=0)
+    yield from analytics_benchmarks(start)
+    yield from serialization_benchmarks(start)
+    yield from ingestion_benchmarks(start - 30 * DAY)
+    yield from store_benchmarks(start)
+    yield from endpoint_benchmarks()
+
+
+def measure(benchmark, repeat, warmup=1):
+    """Run a benchmark `warmup` + `repeat` times; `setup` is never timed."""
+    samples = []
+    for iteration in range(warmup + repeat):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        started = time.perf_counter()
+        benchmark.run()
+        if iteration >= warmup:
+            samples.append(time.perf_counter() - started)
+
+    samples = np.array(samples) * 1000
+    return {
+        **benchmark.params,
+        "repeat": repeat,
+        "min_ms": round(float(samples.min()), 3),
+        "median_ms": round(float(np.median(samples)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "ops_per_sec": round(1000 / float(samples.mean()), 2),
+    }
+
+
+def run_suite(repeat=10, warmup=1, only=(), latency=0, progress=None):
+    """Run the (filtered) benchmarks and return a JSON-serializable report.
+
+    `only` keeps benchmarks whose name contains any of its substrings and
+    `latency` is the simulated upstream round trip in seconds.
+    """
+    results = {}
+    with replayed_upstream(latency) as upstream:
+        for benchmark in all_benchmarks():
+            if only and not any(part in benchmark.name for part in only):
+                continue
+            results[benchmark.name] = measure(benchmark, repeat, warmup)
+            if progress is not None:
+                progress(benchmark.name, results[benchmark.name])
+
+    return {
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "database": connection.vendor,
+        "upstream_latency_ms": latency * 1000,
+        "upstream_calls": upstream.calls,
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Yield (name, baseline median, current median, change %) for benchmarks in both reports."""
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        change = (result["median_ms"] - previous["median_ms"]) / previous["median_ms"] * 100
+        yield name, previous["median_ms"], result["median_ms"], change
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+import flatbuffers
+import numpy as np
+import openmeteo_requests
+import requests
+from requests.adapters import BaseAdapter
+
+from .. import clients
+from ..analytics import RANGES
+from ..geocoding import memory_cache
+
+# Offline stand-ins for Google Geocoding and Open-Meteo. Responses are built
+# in the upstream wire formats (Google's JSON, Open-Meteo's size-prefixed
+# FlatBuffers) from a seed derived from the request, so every run replays the
+# same bytes without network access.
+
+INTERVAL = 3600
+DUBLIN = (53.3498, -6.2603)
+
+# Field slots of the openmeteo_sdk tables that the weather store reads
+_RESPONSE_FIELDS = 14
+_RESPONSE_LATITUDE, _RESPONSE_LONGITUDE, _RESPONSE_HOURLY = 0, 1, 11
+_HOURLY_FIELDS = 4
+_HOURLY_TIME, _HOURLY_END, _HOURLY_INTERVAL, _HOURLY_VARIABLES = 0, 1, 2, 3
+_VARIABLE_FIELDS = 8
+_VARIABLE_VALUES = 3
+
+
+def _seed(*parts):
+    return zlib.crc32(repr(parts).encode())
+
+
+def series_values(variable, hours, seed):
+    """Plausible float32 hourly values inside the variable's RANGES bounds."""
+    low, high = RANGES.get(variable, (0, 100))
+    rng = np.random.default_rng(seed)
+    daily = np.sin(np.arange(hours) * 2 * np.pi / 24)
+    values = (low + high) / 2 + (high - low) / 4 * daily + rng.normal(0, (high - low) / 10, hours)
+    return np.clip(values, low, high).astype(np.float32)
+
+
+def weather_message(latitude, longitude, start, end, variables, interval=INTERVAL):
+    """One size-prefixed WeatherApiResponse with an hourly block for [start, end)."""
+    hours = (end - start) // interval
+    builder = flatbuffers.Builder(1024 + hours * len(variables) * 4)
+
+    offsets = []
+    for variable in variables:
+        values = builder.CreateNumpyVector(series_values(variable, hours, _seed(latitude, longitude, variable)))
+        builder.StartObject(_VARIABLE_FIELDS)
+        builder.PrependUOffsetTRelativeSlot(_VARIABLE_VALUES, values, 0)
+        offsets.append(builder.EndObject())
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    variable_vector = builder.EndVector()
+
+    builder.StartObject(_HOURLY_FIELDS)
+    builder.PrependInt64Slot(_HOURLY_TIME, start, 0)
+    builder.PrependInt64Slot(_HOURLY_END, end, 0)
+    builder.PrependInt32Slot(_HOURLY_INTERVAL, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(_HOURLY_VARIABLES, variable_vector, 0)
+    hourly = builder.EndObject()
+
+    builder.StartObject(_RESPONSE_FIELDS)
+    builder.PrependFloat32Slot(_RESPONSE_LATITUDE, latitude, 0)
+    builder.PrependFloat32Slot(_RESPONSE_LONGITUDE, longitude, 0)
+    builder.PrependUOffsetTRelativeSlot(_RESPONSE_HOURLY, hourly, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+    return bytes(builder.Output())
+
+
+def geocode_body(eircode):
+    """Google's answer for an eircode: OK near Dublin, ZERO_RESULTS for codes starting with Z."""
+    if eircode.upper().startswith("Z"):
+        return {"results": [], "status": "ZERO_RESULTS"}
+    rng = np.random.default_rng(_seed(eircode))
+    latitude, longitude = DUBLIN[0] + rng.uniform(-0.5, 0.5), DUBLIN[1] + rng.uniform(-0.5, 0.5)
+    return {
+        "results": [{
+            "formatted_address": f"{eircode}, Ireland",
+            "geometry": {"location": {"lat": round(latitude, 7), "lng": round(longitude, 7)}, "location_type": "APPROXIMATE"},
+            "types": ["postal_code"],
+        }],
+        "status": "OK",
+    }
+
+
+def _hour(value):
+    return int(datetime.strptime(value, "%Y-%m-%dT%H:%M").replace(tzinfo=timezone.utc).timestamp())
+
+
+def weather_body(query):
+    latitudes = [float(value) for value in query["latitude"][0].split(",")]
+    longitudes = [float(value) for value in query["longitude"][0].split(",")]
+    variables = query["hourly"][0].split(",")
+    start, end = _hour(query["start_hour"][0]), _hour(query["end_hour"][0]) + INTERVAL
+    return b"".join(
+        weather_message(latitude, longitude, start, end, variables)
+        for latitude, longitude in zip(latitudes, longitudes)
+    )
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport answering Google and Open-Meteo URLs offline.
+
+    `latency` seconds are slept per call to stand in for the network; `calls`
+    counts requests per host.
+    """
+
+    def __init__(self, latency=0):
+        super().__init__()
+        self.latency = latency
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        query = parse_qs(url.query)
+        with self._lock:
+            self.calls[url.hostname] = self.calls.get(url.hostname, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        if url.hostname == "maps.googleapis.com":
+            response._content = json.dumps(geocode_body(query["address"][0])).encode()
+        else:
+            response._content = weather_body(query)
+        return response
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def replayed_upstream(latency=0):
+    """Route the shared sync upstream clients through a ReplayAdapter."""
+    adapter = ReplayAdapter(latency)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    client = openmeteo_requests.Client(session=session)
+
+    saved = clients._google_session, clients._openmeteo_client, clients._openmeteo_refresh_client
+    clients._google_session, clients._openmeteo_client, clients._openmeteo_refresh_client = session, client, client
+    memory_cache.clear()
+    try:
+        yield adapter
+    finally:
+        clients._google_session, clients._openmeteo_client, clients._openmeteo_refresh_client = saved
+        memory_cache.clear()
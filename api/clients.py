@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import weakref
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+
+# Long-lived HTTP clients shared by every view. Sessions are created once per
+# process on first use and keep their pooled keep-alive connections, so only
+# the first request to a host pays for the TCP/TLS handshake. The heavier
+# client libraries (requests_cache, openmeteo_requests, httpx) are imported
+# on that first use too, keeping them out of worker start-up.
+
+_lock = threading.Lock()
+_google_session = None
+_openmeteo_client = None
+_openmeteo_refresh_client = None
+
+
+class _TimeoutMixin:
+    timeout = None
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, *args, **kwargs)
+
+
+class PooledSession(_TimeoutMixin, requests.Session):
+    pass
+
+
+def _cached_session(**kwargs):
+    import requests_cache
+
+    class PooledCachedSession(_TimeoutMixin, requests_cache.CachedSession):
+        pass
+
+    return PooledCachedSession(**kwargs)
+
+
+def _configure(session, retries=0):
+    session.timeout = (settings.UPSTREAM_CONNECT_TIMEOUT, settings.UPSTREAM_READ_TIMEOUT)
+    adapter = HTTPAdapter(
+        pool_connections=settings.UPSTREAM_POOL_SIZE,
+        pool_maxsize=settings.UPSTREAM_POOL_SIZE,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=(500, 502, 504),
+            allowed_methods=None,
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def google_session():
+    """Return the shared session for the Google Geocoding API."""
+    global _google_session
+    if _google_session is None:
+        with _lock:
+            if _google_session is None:
+                _google_session = _configure(PooledSession())
+    return _google_session
+
+
+def openmeteo_client():
+    """Return the shared Open-Meteo client (URL-cached, retrying, pooled)."""
+    global _openmeteo_client
+    if _openmeteo_client is None:
+        with _lock:
+            if _openmeteo_client is None:
+                import openmeteo_requests
+
+                from .upstream_cache import build_cache_backend
+
+                cache_options = settings.UPSTREAM_CACHE
+                session = _configure(
+                    _cached_session(
+                        backend=build_cache_backend(cache_options),
+                        expire_after=cache_options["EXPIRE_AFTER"],
+                        stale_while_revalidate=cache_options["STALE_WHILE_REVALIDATE"],
+                    ),
+                    retries=settings.UPSTREAM_RETRIES,
+                )
+                _openmeteo_client = openmeteo_requests.Client(session=session)
+    return _openmeteo_client
+
+
+def openmeteo_refresh_client():
+    """Return an Open-Meteo client that bypasses the URL cache (for prefetching)."""
+    global _openmeteo_refresh_client
+    if _openmeteo_refresh_client is None:
+        with _lock:
+            if _openmeteo_refresh_client is None:
+                import openmeteo_requests
+
+                session = _configure(PooledSession(), retries=settings.UPSTREAM_RETRIES)
+                _openmeteo_refresh_client = openmeteo_requests.Client(session=session)
+    return _openmeteo_refresh_client
+
+
+# httpx.AsyncClient pools are bound to the event loop they were created on, so
+# keep one client per running loop (one per ASGI worker in practice).
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def async_client():
+    """Return the shared non-blocking HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.UPSTREAM_READ_TIMEOUT, connect=settings.UPSTREAM_CONNECT_TIMEOUT),
+            transport=httpx.AsyncHTTPTransport(
+                retries=settings.UPSTREAM_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=settings.UPSTREAM_POOL_SIZE,
+                    max_keepalive_connections=settings.UPSTREAM_POOL_SIZE,
+                ),
+            ),
+        )
+        _async_clients[loop] = client
+    return client
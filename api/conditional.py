@@ -0,0 +1,125 @@
+import hashlib
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.response import Response
+
+from .metrics import count_cache
+from .prefetch import record_hits
+
+# Validators and a rendered-response cache for the polled endpoints. A
+# response is cached (body, ETag, Last-Modified) under its normalized
+# parameters for RESPONSE_CACHE_TTL seconds; within that time identical
+# requests are answered from the cached bytes, and clients presenting the
+# ETag get a 304 without the view running at all. ETags hash the body, so
+# a recomputed but unchanged response keeps its ETag.
+
+
+def response_key(name, params):
+    normalized = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return f"response:{name}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+
+def _entry(content, content_type):
+    return {
+        "content": content,
+        "content_type": content_type,
+        "etag": f'"{hashlib.sha256(content).hexdigest()[:32]}"',
+        "last_modified": int(time.time()),
+    }
+
+
+def _not_modified(request, entry):
+    # If-Modified-Since only counts when no If-None-Match is sent (RFC 9110)
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return "*" in etags or any(etag.removeprefix("W/") == entry["etag"] for etag in etags)
+    modified_since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return modified_since is not None and entry["last_modified"] <= modified_since
+
+
+def _response(request, entry):
+    if _not_modified(request, entry):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    # Clients may keep the body but must revalidate before reusing it
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def _render(view, request, response):
+    # Render here, as finalize_response would, so the cache holds the bytes
+    if isinstance(response, Response):
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = view.get_renderer_context()
+        response.render()
+    return _entry(response.content, response["Content-Type"])
+
+
+def conditional(method):
+    """Decorate a (sync DRF or async) view method with ETags, 304s and the response cache.
+
+    The view's cache_params(request) returns the normalized parameters the
+    response depends on, or None to bypass the cache (e.g. invalid
+    requests). Its optional cache_hits(params) returns the location hits to
+    record when a cached response is served, since the view does not run.
+    """
+
+    def lookup(view, request):
+        values = view.cache_params(request)
+        if values is None:
+            return None, None
+        key = response_key(f"{view.__class__.__name__}.{request.method}", {
+            **values,
+            "accept": request.META.get("HTTP_ACCEPT", ""),
+            "format": request.GET.get("format", ""),
+        })
+        entry = caches[settings.RESPONSE_CACHE_ALIAS].get(key)
+        count_cache("response", entry is not None)
+        if entry is not None and hasattr(view, "cache_hits"):
+            record_hits(view.cache_hits(values))
+        return key, entry
+
+    def store(key, entry):
+        caches[settings.RESPONSE_CACHE_ALIAS].set(key, entry, settings.RESPONSE_CACHE_TTL)
+
+    if iscoroutinefunction(method):
+        @wraps(method)
+        async def wrapped(view, request, *args, **kwargs):
+            key, entry = await sync_to_async(lookup)(view, request)
+            if key is None:
+                return await method(view, request, *args, **kwargs)
+            if entry is None:
+                response = await method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                entry = _entry(response.content, response["Content-Type"])
+                await sync_to_async(store)(key, entry)
+            return _response(request, entry)
+    else:
+        @wraps(method)
+        def wrapped(view, request, *args, **kwargs):
+            key, entry = lookup(view, request)
+            if key is None:
+                return method(view, request, *args, **kwargs)
+            if entry is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                entry = _render(view, request, response)
+                store(key, entry)
+            return _response(request, entry)
+    return wrapped
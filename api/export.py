@@ -0,0 +1,176 @@
+import csv
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+import numpy as np
+import requests
+from asgiref.sync import sync_to_async
+
+from . import weather_store
+from .geocoding import GeocodeError, geocode_eircode, normalize_eircode
+from .history import MAX_HISTORY_DAYS, parse_time
+from .ingestion import WEATHER_VARIABLES
+from .models import WeatherData
+
+# Streamed exports of hourly weather for many eircodes, as NDJSON or CSV.
+# Rows are produced by generators (a chunked queryset iterator for stored
+# WeatherData, one Open-Meteo batch at a time for forecasts) so a worker's
+# memory stays flat however large the export is.
+
+logger = logging.getLogger(__name__)
+
+OUTPUTS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+SOURCES = ("stored", "forecast")
+MAX_EXPORT_EIRCODES = 1000
+MAX_FORECAST_DAYS = 16
+MAX_PAST_DAYS = 92
+QUERY_CHUNK_SIZE = 2000
+LINES_PER_CHUNK = 500
+
+
+def _int_param(params, name, default, maximum):
+    value = int(params.get(name) or default)
+    if not 0 <= value <= maximum:
+        raise ValueError(f"{name} must be between 0 and {maximum}")
+    return value
+
+
+def parse_export_params(params):
+    """Validate the export query string; raises ValueError with a message for the client."""
+    eircodes = [
+        normalize_eircode(eircode)
+        for value in params.getlist("eircode")
+        for eircode in value.split(",")
+        if eircode.strip()
+    ]
+    eircodes = list(dict.fromkeys(eircodes))
+    if not eircodes:
+        raise ValueError("At least one eircode is required")
+    if len(eircodes) > MAX_EXPORT_EIRCODES:
+        raise ValueError(f"At most {MAX_EXPORT_EIRCODES} eircodes per export")
+
+    output = params.get("output") or "ndjson"
+    if output not in OUTPUTS:
+        raise ValueError(f"output must be one of: {', '.join(OUTPUTS)}")
+    source = params.get("source") or "stored"
+    if source not in SOURCES:
+        raise ValueError(f"source must be one of: {', '.join(SOURCES)}")
+
+    variables = [variable for variable in (params.get("variables") or "").split(",") if variable]
+    unknown = set(variables) - set(WEATHER_VARIABLES)
+    if unknown:
+        raise ValueError(f"Unknown variables: {', '.join(sorted(unknown))}")
+    variables = variables or list(WEATHER_VARIABLES)
+
+    if source == "forecast":
+        start, end = weather_store.forecast_window(
+            forecast_days=_int_param(params, "forecast_days", 7, MAX_FORECAST_DAYS),
+            past_days=_int_param(params, "past_days", 0, MAX_PAST_DAYS),
+        )
+        start, end = _datetime(start), _datetime(end)
+    else:
+        if not (params.get("start") and params.get("end")):
+            raise ValueError("start and end are required")
+        start = parse_time(params["start"], "start")
+        end = parse_time(params["end"], "end", inclusive_date=True)
+        if start >= end:
+            raise ValueError("start must be before end")
+        if end - start > timedelta(days=MAX_HISTORY_DAYS):
+            raise ValueError(f"At most {MAX_HISTORY_DAYS} days per export")
+
+    return eircodes, start, end, variables, output, source
+
+
+def _datetime(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def export_header(variables):
+    return ["eircode", "latitude", "longitude", "date", *variables]
+
+
+def stored_rows(eircodes, start, end, variables):
+    """Yield WeatherData rows, streamed from the database in chunks."""
+    rows = (
+        WeatherData.objects.filter(eircode__in=eircodes, date__gte=start, date__lt=end)
+        .order_by("eircode", "date")
+        .values_list("eircode", "latitude", "longitude", "date", *variables)
+        .iterator(chunk_size=QUERY_CHUNK_SIZE)
+    )
+    for eircode, latitude, longitude, date, *values in rows:
+        yield (eircode, latitude, longitude, date.isoformat(), *values)
+
+
+def _geocoded(eircodes):
+    for eircode in eircodes:
+        try:
+            yield eircode, geocode_eircode(eircode)
+        except (GeocodeError, requests.exceptions.RequestException) as e:
+            logger.warning("Export skips %s: %s", eircode, e)
+
+
+def forecast_rows(eircodes, start, end, variables):
+    """Yield Open-Meteo hours, fetching one batch of locations at a time."""
+    start, end = int(start.timestamp()), int(end.timestamp())
+    located = _geocoded(eircodes)
+    while True:
+        batch = list(islice(located, weather_store.MAX_LOCATIONS_PER_REQUEST))
+        if not batch:
+            return
+        series = weather_store.get_hourly_many([coordinates for _, coordinates in batch], variables, start, end)
+        for (eircode, (latitude, longitude)), hourly in zip(batch, series):
+            columns = np.round(np.vstack([hourly.values[variable] for variable in variables]).astype(np.float64), 2)
+            columns = np.where(np.isnan(columns), None, columns).T.tolist()
+            for hour, values in enumerate(columns):
+                date = _datetime(hourly.start + hour * hourly.interval).isoformat()
+                yield (eircode, latitude, longitude, date, *values)
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line back instead of storing it
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row))) + "\n"
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_lines(eircodes, start, end, variables, output, source):
+    rows = (forecast_rows if source == "forecast" else stored_rows)(eircodes, start, end, variables)
+    header = export_header(variables)
+    return (csv_lines if output == "csv" else ndjson_lines)(header, rows)
+
+
+def chunked(lines, size=LINES_PER_CHUNK):
+    """Join lines into larger chunks so the server writes fewer, bigger blocks."""
+    lines = iter(lines)
+    while True:
+        chunk = "".join(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def achunked(lines, size=LINES_PER_CHUNK):
+    """chunked() for ASGI: each chunk is produced in the sync thread used for DB access."""
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: "".join(islice(lines, size)))
+    while True:
+        chunk = await next_chunk()
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from decouple import config
+from django.conf import settings
+from django.utils import timezone
+
+from .clients import async_client, google_session
+from .metrics import count_cache, timed
+from .models import GeocodedEircode
+from .singleflight import flights
+
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+GOOGLE_API_KEY = config("GOOGLE_API_KEY")
+
+# Google statuses that describe the eircode itself and are safe to cache
+CACHEABLE_STATUSES = ("OK", "ZERO_RESULTS")
+
+
+class GeocodeError(Exception):
+    """Google answered, but not with a location (e.g. ZERO_RESULTS)."""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class TTLCache:
+    """Thread-safe in-process LRU whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+memory_cache = TTLCache(settings.GEOCODE_LRU_SIZE)
+
+
+def normalize_eircode(eircode):
+    return "".join(str(eircode).split()).upper()
+
+
+def _ttl(status):
+    return settings.GEOCODE_CACHE_TTL if status == "OK" else settings.GEOCODE_NEGATIVE_TTL
+
+
+def _remember(eircode, status, latitude, longitude, age=0):
+    ttl = _ttl(status) - age
+    if ttl > 0:
+        memory_cache.set(eircode, (status, latitude, longitude), ttl)
+
+
+def _google_params(eircode):
+    return {
+        "address": eircode,
+        "region": "ie",  # Ireland
+        "key": GOOGLE_API_KEY
+    }
+
+
+def _parse_geocode(data):
+    if data["status"] != "OK":
+        return data["status"], None, None
+
+    location = data["results"][0]["geometry"]["location"]
+    return "OK", location["lat"], location["lng"]
+
+
+def request_geocode(eircode):
+    """Ask Google for an eircode and return (status, latitude, longitude)."""
+    with timed("geocode"):
+        response = google_session().get(GOOGLE_GEOCODE_URL, params=_google_params(eircode))
+    response.raise_for_status()
+    return _parse_geocode(response.json())
+
+
+def cached_geocode(eircode):
+    """Return the cached (status, latitude, longitude) for an eircode, or None."""
+    eircode = normalize_eircode(eircode)
+    cached = memory_cache.get(eircode)
+    count_cache("geocode_memory", cached is not None)
+    if cached is not None:
+        return cached
+
+    stored = GeocodedEircode.objects.filter(eircode=eircode).first()
+    age = None if stored is None else (timezone.now() - stored.fetched_at).total_seconds()
+    fresh = age is not None and age < _ttl(stored.status)
+    count_cache("geocode_db", fresh)
+    if not fresh:
+        return None
+
+    _remember(eircode, stored.status, stored.latitude, stored.longitude, age)
+    return stored.status, stored.latitude, stored.longitude
+
+
+def save_geocode(eircode, status, latitude, longitude):
+    if status in CACHEABLE_STATUSES:
+        GeocodedEircode.objects.update_or_create(
+            eircode=eircode,
+            defaults={
+                "latitude": latitude,
+                "longitude": longitude,
+                "status": status,
+                "fetched_at": timezone.now(),
+            },
+        )
+        _remember(eircode, status, latitude, longitude)
+
+
+def geocodes_due(eircodes, lead):
+    """Return the eircodes not cached or whose entry expires within `lead` seconds."""
+    eircodes = {normalize_eircode(eircode) for eircode in eircodes}
+    now = timezone.now()
+    fresh = {
+        eircode
+        for eircode, status, fetched_at in GeocodedEircode.objects.filter(
+            eircode__in=eircodes
+        ).values_list("eircode", "status", "fetched_at")
+        if (now - fetched_at).total_seconds() + lead < _ttl(status)
+    }
+    return sorted(eircodes - fresh)
+
+
+def refresh_geocode(eircode):
+    """Geocode an eircode with Google and update both cache layers."""
+    eircode = normalize_eircode(eircode)
+    result = request_geocode(eircode)
+    save_geocode(eircode, *result)
+    return result
+
+
+def geocode_eircode(eircode):
+    """Return the (latitude, longitude) Google Maps has for an eircode.
+
+    Answers are served from the in-process LRU, then the GeocodedEircode
+    table, and only go to Google when neither holds a fresh entry. Raises
+    GeocodeError for any status other than OK. Concurrent lookups of the
+    same uncached eircode share one Google request.
+    """
+    eircode = normalize_eircode(eircode)
+    status, latitude, longitude = cached_geocode(eircode) or flights.do(
+        ("geocode", eircode), refresh_geocode, eircode, recheck=lambda: cached_geocode(eircode)
+    )
+    if status != "OK":
+        raise GeocodeError(status)
+    return latitude, longitude
+
+
+async def _refresh_geocode_async(eircode):
+    with timed("geocode"):
+        response = await async_client().get(GOOGLE_GEOCODE_URL, params=_google_params(eircode))
+    response.raise_for_status()
+    result = _parse_geocode(response.json())
+    await sync_to_async(save_geocode)(eircode, *result)
+    return result
+
+
+async def geocode_eircode_async(eircode):
+    """Non-blocking geocode_eircode for the async views."""
+    eircode = normalize_eircode(eircode)
+    result = memory_cache.get(eircode)
+    if result is not None:
+        count_cache("geocode_memory", True)
+    else:
+        result = await sync_to_async(cached_geocode)(eircode)
+
+    if result is None:
+        result = await flights.do_async(
+            ("geocode", eircode), _refresh_geocode_async, eircode, recheck=lambda: cached_geocode(eircode)
+        )
+
+    status, latitude, longitude = result
+    if status != "OK":
+        raise GeocodeError(status)
+    return latitude, longitude
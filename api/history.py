@@ -0,0 +1,203 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .geocoding import normalize_eircode
+from .ingestion import WEATHER_VARIABLES
+from .models import DailyWeather, WeatherData
+from .spatial import location_index
+from .weather_store import LOCAL_TIMEZONE
+
+# Read side of WeatherData: stored hourly series for one location (or every
+# stored location within a radius), averaged and bounded per hour, day or
+# week (local time) by the database. Day and week buckets also cover the
+# days compacted into DailyWeather by retention.
+
+BUCKETS = {
+    "hour": TruncHour,
+    "day": TruncDay,
+    "week": TruncWeek,
+}
+DEFAULT_HISTORY_DAYS = 30
+MAX_HISTORY_DAYS = 366
+MAX_RADIUS_KM = 50
+MAX_RADIUS_LOCATIONS = 100
+
+
+def parse_time(value, name, inclusive_date=False):
+    day = parse_date(value)
+    if day is not None:
+        # A bare end date includes that whole day
+        moment = datetime.combine(day + timedelta(days=1 if inclusive_date else 0), time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f"{name} must be an ISO date or datetime")
+    if timezone.is_naive(moment):
+        moment = moment.replace(tzinfo=LOCAL_TIMEZONE)
+    return moment
+
+
+def parse_history_params(params):
+    """Validate the history query string; raises ValueError with a message for the client.
+
+    Returns the location (an eircode, or coordinates with an optional
+    radius_km), the [start, end) range, the bucket name and the variables
+    to aggregate.
+    """
+    eircode = params.get("eircode")
+    latitude, longitude = params.get("latitude"), params.get("longitude")
+    if eircode:
+        location = {"eircode": eircode}
+    elif latitude and longitude:
+        location = {"latitude": float(latitude), "longitude": float(longitude), "radius_km": None}
+        if params.get("radius_km"):
+            radius_km = float(params["radius_km"])
+            if not 0 < radius_km <= MAX_RADIUS_KM:
+                raise ValueError(f"radius_km must be between 0 and {MAX_RADIUS_KM}")
+            location["radius_km"] = radius_km
+    else:
+        raise ValueError("Eircode or latitude and longitude are required")
+
+    end = parse_time(params["end"], "end", inclusive_date=True) if params.get("end") else timezone.now()
+    start = parse_time(params["start"], "start") if params.get("start") else end - timedelta(days=DEFAULT_HISTORY_DAYS)
+    if start >= end:
+        raise ValueError("start must be before end")
+    if end - start > timedelta(days=MAX_HISTORY_DAYS):
+        raise ValueError(f"At most {MAX_HISTORY_DAYS} days per request")
+
+    bucket = params.get("bucket") or "day"
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+
+    variables = [variable for variable in (params.get("variables") or "").split(",") if variable]
+    unknown = set(variables) - set(WEATHER_VARIABLES)
+    if unknown:
+        raise ValueError(f"Unknown variables: {', '.join(sorted(unknown))}")
+
+    return location, start, end, bucket, variables or list(WEATHER_VARIABLES)
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def nearby_locations(latitude, longitude, radius_km=None):
+    """Return [(distance_km, latitude, longitude)] of the stored locations to aggregate.
+
+    Without a radius this is the nearest stored location within
+    SPATIAL_NEAREST_MAX_KM, so nearby coordinates share one stored series.
+    """
+    if radius_km is None:
+        nearest = location_index.nearest(latitude, longitude, settings.SPATIAL_NEAREST_MAX_KM)
+        return [nearest] if nearest else []
+    return location_index.within(latitude, longitude, radius_km)[:MAX_RADIUS_LOCATIONS]
+
+
+def _location_filter(location):
+    if "eircode" in location:
+        return Q(eircode=normalize_eircode(location["eircode"])), None
+
+    locations = nearby_locations(location["latitude"], location["longitude"], location["radius_km"])
+    points = Q(pk__in=[])
+    for _, latitude, longitude in locations:
+        points |= Q(latitude=latitude, longitude=longitude)
+    return points, [
+        {"latitude": latitude, "longitude": longitude, "distance_km": distance}
+        for distance, latitude, longitude in locations
+    ]
+
+
+def _first_day(moment):
+    # The first local day starting at or after `moment`
+    local = moment.astimezone(LOCAL_TIMEZONE)
+    return local.date() if local.time() == time.min else local.date() + timedelta(days=1)
+
+
+def compacted_rows(location_filter, start, end, bucket, variables):
+    """Per-bucket aggregates of the DailyWeather days that start in [start, end)."""
+    aggregates = {}
+    for variable in variables:
+        counted = Q(**{f"{variable}_mean__isnull": False})
+        aggregates[f"{variable}_hours"] = Sum("hours", filter=counted)
+        aggregates[f"{variable}_total"] = Sum(F(f"{variable}_mean") * F("hours"), output_field=FloatField())
+        aggregates[f"{variable}_min"] = Min(f"{variable}_min")
+        aggregates[f"{variable}_max"] = Max(f"{variable}_max")
+
+    rows = (
+        DailyWeather.objects.filter(location_filter, date__gte=_first_day(start), date__lt=_first_day(end))
+        .annotate(day=BUCKETS[bucket]("date"))
+        .values("day")
+        .annotate(**aggregates)
+        .order_by("day")
+    )
+    for row in rows:
+        row["bucket"] = datetime.combine(row.pop("day"), time.min, tzinfo=LOCAL_TIMEZONE)
+        for variable in variables:
+            total, hours = row.pop(f"{variable}_total"), row[f"{variable}_hours"]
+            row[f"{variable}_mean"] = total / hours if hours else None
+        yield row
+
+
+def _merge_rows(rows, compacted, variables):
+    # A bucket holding both hourly and compacted days, e.g. the week of the cutoff
+    merged = {row["bucket"]: row for row in rows}
+    for row in compacted:
+        current = merged.setdefault(row["bucket"], row)
+        if current is row:
+            continue
+        for variable in variables:
+            hours = [current[f"{variable}_hours"] or 0, row[f"{variable}_hours"] or 0]
+            means = [current[f"{variable}_mean"], row[f"{variable}_mean"]]
+            if sum(hours):
+                current[f"{variable}_mean"] = sum((mean or 0) * count for mean, count in zip(means, hours)) / sum(hours)
+            current[f"{variable}_hours"] = sum(hours)
+            for statistic, pick in (("min", min), ("max", max)):
+                values = [value for value in (current[f"{variable}_{statistic}"], row[f"{variable}_{statistic}"])
+                          if value is not None]
+                current[f"{variable}_{statistic}"] = pick(values) if values else None
+    return [merged[key] for key in sorted(merged)]
+
+
+def history_series(location, start, end, bucket="day", variables=WEATHER_VARIABLES):
+    """Return the mean, min and max of each variable per bucket in [start, end).
+
+    Buckets without stored rows are left out of the series. For coordinates
+    the stored locations that were aggregated are listed as well.
+    """
+    location_filter, locations = _location_filter(location)
+    aggregates = {}
+    for variable in variables:
+        aggregates[f"{variable}_mean"] = Avg(variable)
+        aggregates[f"{variable}_min"] = Min(variable)
+        aggregates[f"{variable}_max"] = Max(variable)
+        aggregates[f"{variable}_hours"] = Count(variable)
+
+    rows = list(
+        WeatherData.objects.filter(location_filter, date__gte=start, date__lt=end)
+        .annotate(bucket=BUCKETS[bucket]("date", tzinfo=LOCAL_TIMEZONE))
+        .values("bucket")
+        .annotate(**aggregates)
+        .order_by("bucket")
+    )
+    if bucket != "hour":
+        rows = _merge_rows(rows, compacted_rows(location_filter, start, end, bucket, variables), variables)
+
+    data = {
+        "bucket": bucket,
+        "date": [row["bucket"].isoformat() for row in rows],
+        "variables": {
+            variable: {
+                statistic: [_round(row[f"{variable}_{statistic}"]) for row in rows]
+                for statistic in ("mean", "min", "max")
+            }
+            for variable in variables
+        },
+    }
+    if locations is not None:
+        data["locations"] = locations
+    return data
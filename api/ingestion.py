@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.db import transaction
+
+from .metrics import timed
+from .models import StoredLocation, WeatherData
+from .rollups import update_rollups
+from .spatial import location_index
+
+# Hourly variables stored on WeatherData, in the order they are requested from Open-Meteo
+WEATHER_VARIABLES = (
+    "temperature_2m",
+    "relative_humidity_2m",
+    "dew_point_2m",
+    "cloud_cover",
+    "wind_direction_10m",
+    "wind_gusts_10m",
+)
+
+BATCH_SIZE = 500
+
+
+def _column(values):
+    # Round once for the whole array and turn NaN (missing hours) into NULL
+    values = np.round(np.asarray(values, dtype=np.float64), 2)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def build_weather_rows(eircode, latitude, longitude, start, interval, variables):
+    """Build unsaved WeatherData rows from hourly NumPy arrays.
+
+    `start` is the epoch second of the first value, `interval` the step in
+    seconds and `variables` maps WeatherData field names to value arrays.
+    """
+    columns = {name: _column(values) for name, values in variables.items()}
+    hours = len(next(iter(columns.values()), []))
+    first = datetime.fromtimestamp(start, tz=timezone.utc)
+    step = timedelta(seconds=interval)
+
+    return [
+        WeatherData(
+            eircode=eircode,
+            latitude=latitude,
+            longitude=longitude,
+            date=first + idx * step,
+            **{name: column[idx] for name, column in columns.items()},
+        )
+        for idx in range(hours)
+    ]
+
+
+def _row_key(row, fields):
+    return tuple(getattr(row, field) for field in fields)
+
+
+def ingest_weather(eircode, latitude, longitude, start, interval, variables, batch_size=BATCH_SIZE):
+    """Upsert hourly weather for an eircode and return the number of rows written.
+
+    Hours that are already stored with identical values are skipped, new hours
+    are inserted and changed hours (e.g. revised forecasts) are updated in place
+    on the (eircode, date) unique key. The daily rollups of the changed days
+    are rebuilt afterwards.
+    """
+    rows = build_weather_rows(eircode, latitude, longitude, start, interval, variables)
+    if not rows:
+        return 0
+
+    fields = ["latitude", "longitude", *variables.keys()]
+
+    with timed("db_write"), transaction.atomic():
+        stored = {
+            values[0]: values[1:]
+            for values in WeatherData.objects.filter(
+                eircode=eircode, date__gte=rows[0].date, date__lte=rows[-1].date
+            ).values_list("date", *fields)
+        }
+        pending = [row for row in rows if stored.get(row.date) != _row_key(row, fields)]
+
+        WeatherData.objects.bulk_create(
+            pending,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["eircode", "date"],
+            update_fields=fields,
+        )
+        if pending:
+            StoredLocation.objects.bulk_create(
+                [StoredLocation(latitude=latitude, longitude=longitude)], ignore_conflicts=True
+            )
+
+    if pending:
+        location_index.add(latitude, longitude)
+        update_rollups(latitude, longitude, start, interval, variables, {int(row.date.timestamp()) for row in pending})
+    return len(pending)
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks.suite import compare, run_suite
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the endpoints, analytics, ingestion and serialization against offline "
+            "upstream fixtures, on a throwaway test database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (default: 5)")
+        parser.add_argument("--warmup", type=int, default=1, help="Untimed runs first (default: 1)")
+        parser.add_argument("--only", action="append", default=[],
+                            help="Only run benchmarks whose name contains this text (repeatable)")
+        parser.add_argument("--latency", type=float, default=0,
+                            help="Simulated upstream round trip in milliseconds (default: 0)")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--compare", help="Baseline JSON report to compare the medians with")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        def progress(name, result):
+            self.stdout.write(f"{name}: median {result['median_ms']:.3f} ms, "
+                              f"p95 {result['p95_ms']:.3f} ms, {result['ops_per_sec']:.1f} ops/s")
+
+        # Never touch the real data: run on a fresh test database
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = run_suite(options["repeat"], options["warmup"], options["only"],
+                               options["latency"] / 1000, progress)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                json.dump(report, report_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if baseline is not None:
+            self.stdout.write("\nMedian vs baseline:")
+            for name, before, after, change in compare(report, baseline):
+                line = f"{name}: {before:.3f} -> {after:.3f} ms ({change:+.1f}%)"
+                style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+                self.stdout.write(style(line))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = ("Compact hourly WeatherData past its retention window into DailyWeather and purge "
+            "expired daily aggregates, rollups and upstream hours.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count the rows that would be compacted or removed")
+        parser.add_argument("--hourly-days", type=int,
+                            help="Days of hourly WeatherData to keep (default: WEATHER_HOURLY_RETENTION_DAYS)")
+        parser.add_argument("--daily-days", type=int,
+                            help="Days of daily aggregates and rollups to keep, 0 for all "
+                                 "(default: WEATHER_DAILY_RETENTION_DAYS)")
+        parser.add_argument("--store-days", type=int,
+                            help="Days of upstream hourly observations to keep (default: WEATHER_STORE_RETENTION_DAYS)")
+        parser.add_argument("--batch-days", type=int, default=7,
+                            help="Days compacted per transaction (default: 7)")
+
+    def handle(self, *args, **options):
+        if options["batch_days"] < 1:
+            raise CommandError("--batch-days must be at least 1")
+        for name in ("hourly_days", "daily_days", "store_days"):
+            if options[name] is not None and options[name] < 0:
+                raise CommandError(f"--{name.replace('_', '-')} must not be negative")
+
+        def progress(start, end, days, rows):
+            self.stdout.write(f"{start:%Y-%m-%d} to {end:%Y-%m-%d}: {rows} hourly rows into {days} daily rows")
+
+        counts = apply_retention(
+            hourly_days=options["hourly_days"],
+            daily_days=options["daily_days"],
+            store_days=options["store_days"],
+            batch_days=options["batch_days"],
+            dry_run=options["dry_run"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            ("Dry run: " if options["dry_run"] else "")
+            + ", ".join(f"{count} {label}" for label, count in counts.items())
+        ))
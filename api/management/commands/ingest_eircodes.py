@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.onboarding import Checkpoint, bulk_ingest, read_eircodes
+
+
+class Command(BaseCommand):
+    help = ("Geocode a CSV file of eircodes and store their hourly weather (past days and forecast) "
+            "in WeatherData, resuming from a checkpoint file.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV file with one eircode per row")
+        parser.add_argument("--column", default="eircode",
+                            help="Column holding the eircodes when the file has a header (default: eircode)")
+        parser.add_argument("--checkpoint",
+                            help="Progress file to resume from (default: <csv_path>.checkpoint.json)")
+        parser.add_argument("--restart", action="store_true",
+                            help="Ignore the progress in the checkpoint file")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Concurrent upstream requests (default: 8)")
+        parser.add_argument("--geocode-rate", type=float, default=20,
+                            help="Google geocoding requests per second, 0 for no limit (default: 20)")
+        parser.add_argument("--weather-rate", type=float, default=1,
+                            help="Open-Meteo batch requests per second, 0 for no limit (default: 1)")
+        parser.add_argument("--past-days", type=int, default=30, help="Past days of weather to store (default: 30)")
+        parser.add_argument("--forecast-days", type=int, default=7,
+                            help="Forecast days of weather to store (default: 7)")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+        try:
+            eircodes = read_eircodes(options["csv_path"], options["column"])
+        except OSError as e:
+            raise CommandError(f"Could not read {options['csv_path']}: {e}")
+
+        path = options["checkpoint"] or f"{options['csv_path']}.checkpoint.json"
+        try:
+            checkpoint = Checkpoint(None if options["restart"] else path)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read the checkpoint {path}: {e}")
+        checkpoint.path = path
+
+        def progress(done, total):
+            self.stdout.write(f"{done}/{total} eircodes stored")
+
+        counts = bulk_ingest(
+            eircodes,
+            checkpoint,
+            workers=options["workers"],
+            geocode_rate=options["geocode_rate"],
+            weather_rate=options["weather_rate"],
+            past_days=options["past_days"],
+            forecast_days=options["forecast_days"],
+            progress=progress,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(eircodes)} eircodes: " + ", ".join(f"{count} {label}" for label, count in counts.items())
+        ))
+        if counts["failed"]:
+            self.stderr.write(f"Failures are listed in {path}; run the command again to retry them")
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api import partitions
+
+
+class Command(BaseCommand):
+    help = "Convert WeatherData into monthly range partitions on date (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=settings.WEATHER_PARTITION_MONTHS_AHEAD,
+                            help="Future months to create partitions for (default: WEATHER_PARTITION_MONTHS_AHEAD)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(f"Partitioning needs PostgreSQL, skipped on {connection.vendor}")
+            return
+        if partitions.is_partitioned():
+            created = partitions.ensure_partitions(options["months_ahead"])
+            self.stdout.write(f"{partitions.TABLE} is already partitioned, {len(created)} partitions created")
+            return
+
+        created = partitions.partition_table(options["months_ahead"])
+        self.stdout.write(self.style.SUCCESS(f"{partitions.TABLE} partitioned by month, {len(created)} partitions"))
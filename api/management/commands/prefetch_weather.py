@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.prefetch import prefetch
+
+
+class Command(BaseCommand):
+    help = "Refresh the weather and geocodes of the most requested locations ahead of cache expiry."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Run a single refresh and exit instead of looping")
+        parser.add_argument("--interval", type=int, default=settings.PREFETCH_INTERVAL,
+                            help="Seconds between refreshes (default: PREFETCH_INTERVAL)")
+        parser.add_argument("--limit", type=int, default=settings.PREFETCH_TOP_LOCATIONS,
+                            help="Number of locations to keep fresh (default: PREFETCH_TOP_LOCATIONS)")
+        parser.add_argument("--lead", type=int, default=settings.PREFETCH_LEAD,
+                            help="Refresh data expiring within this many seconds (default: PREFETCH_LEAD)")
+        parser.add_argument("--forecast-days", type=int, default=settings.PREFETCH_FORECAST_DAYS,
+                            help="Forecast days to keep fresh (default: PREFETCH_FORECAST_DAYS)")
+
+    def handle(self, *args, **options):
+        if not options["once"] and options["lead"] <= options["interval"]:
+            self.stderr.write("Warning: --lead should exceed --interval or data can expire between runs")
+
+        while True:
+            started = time.monotonic()
+            close_old_connections()
+            try:
+                counts = prefetch(options["limit"], options["lead"], options["forecast_days"])
+            except Exception as e:
+                self.stderr.write(f"Prefetch failed: {e}")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    ", ".join(f"{count} {label}" for label, count in counts.items())
+                ))
+
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"] - (time.monotonic() - started), 0))
@@ -0,0 +1,33 @@
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.startup import measure_startup
+
+
+class Command(BaseCommand):
+    help = "Measure how long a fresh API worker takes to load the application, and its slowest imports."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to start (default: 5)")
+        parser.add_argument("--top", type=int, default=15, help="Slowest imports to list (default: 15)")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            report = measure_startup(options["repeat"], options["top"])
+        except subprocess.CalledProcessError as e:
+            raise CommandError(f"The application failed to load:\n{e.stderr[-2000:]}")
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Start-up over {report['repeat']} runs: median {report['median_ms']} ms "
+            f"(min {report['min_ms']}, max {report['max_ms']})"
+        ))
+        self.stdout.write("Slowest top-level imports (cumulative):")
+        for name, milliseconds in report["imports"]:
+            self.stdout.write(f"  {milliseconds:8.1f} ms  {name}")
@@ -0,0 +1,41 @@
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.geocoding import cached_geocode, refresh_geocode
+from api.onboarding import read_eircodes
+
+
+class Command(BaseCommand):
+    help = "Pre-warm the eircode geocode cache from a CSV file of eircodes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV file with one eircode per row")
+        parser.add_argument("--column", default="eircode",
+                            help="Column holding the eircodes when the file has a header (default: eircode)")
+        parser.add_argument("--force", action="store_true",
+                            help="Geocode again even when a fresh cache entry exists")
+
+    def handle(self, *args, **options):
+        try:
+            eircodes = read_eircodes(options["csv_path"], options["column"])
+        except OSError as e:
+            raise CommandError(f"Could not read {options['csv_path']}: {e}")
+
+        counts = {"cached": 0, "found": 0, "not found": 0, "failed": 0}
+        for eircode in eircodes:
+            if not options["force"] and cached_geocode(eircode) is not None:
+                counts["cached"] += 1
+                continue
+            try:
+                status, _, _ = refresh_geocode(eircode)
+            except (requests.exceptions.RequestException, KeyError) as e:
+                self.stderr.write(f"{eircode}: {e}")
+                counts["failed"] += 1
+                continue
+            counts["found" if status == "OK" else "not found"] += 1
+            if status != "OK":
+                self.stderr.write(f"{eircode}: {status}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(eircodes)} eircodes: " + ", ".join(f"{count} {label}" for label, count in counts.items())
+        ))
@@ -0,0 +1,152 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+# Per-process timing and cache counters, exposed in the Prometheus text format
+# by the metrics endpoint and, per request, in a Server-Timing header. Each
+# worker process keeps its own numbers.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Stages timed during the current request, for the Server-Timing header
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+class Registry:
+    """Counters and histograms keyed by metric name and label values."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[name, tuple(sorted(labels.items()))] += amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One count per bucket, then the sum and the total count
+                histogram = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[idx] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(values)) for key, values in self._histograms.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        for (name, labels), values in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {values[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {values[-2]:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+registry = Registry()
+
+
+def count_cache(cache, hit, amount=1):
+    """Count lookups in one of our caches (geocodes, weather store)."""
+    if amount:
+        registry.inc("api_cache_requests_total", amount, cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def timed(stage):
+    """Time a block as one stage of the request (geocode, openmeteo, db_write...)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe("api_stage_duration_seconds", elapsed, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def _server_timing(timings, total):
+    durations = defaultdict(float)
+    for stage, elapsed in timings:
+        durations[stage] += elapsed
+    durations["total"] = total
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in durations.items())
+
+
+def _finish(request, response, timings, started):
+    total = time.perf_counter() - started
+    match = request.resolver_match
+    registry.observe(
+        "api_request_duration_seconds",
+        total,
+        view=match.url_name if match and match.url_name else "unmatched",
+        status=response.status_code,
+    )
+    if settings.SERVER_TIMING_HEADER:
+        response["Server-Timing"] = _server_timing(timings, total)
+    return response
+
+
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    """Record request durations and, with SERVER_TIMING_HEADER, add a Server-Timing header."""
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            timings = []
+            token = _timings.set(timings)
+            try:
+                response = await get_response(request)
+            finally:
+                _timings.reset(token)
+            return _finish(request, response, timings, started)
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            timings = []
+            token = _timings.set(timings)
+            try:
+                response = get_response(request)
+            finally:
+                _timings.reset(token)
+            return _finish(request, response, timings, started)
+
+    return middleware
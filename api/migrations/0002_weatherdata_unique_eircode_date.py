@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def remove_duplicate_rows(apps, schema_editor):
+    # Keep the most recent row for every (eircode, date) so the unique constraint can be added.
+    WeatherData = apps.get_model("api", "WeatherData")
+    duplicates = (
+        WeatherData.objects.values("eircode", "date")
+        .annotate(latest_id=models.Max("id"), rows=models.Count("id"))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        WeatherData.objects.filter(
+            eircode=duplicate["eircode"], date=duplicate["date"]
+        ).exclude(id=duplicate["latest_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='weatherdata',
+            constraint=models.UniqueConstraint(fields=('eircode', 'date'), name='unique_weatherdata_eircode_date'),
+        ),
+    ]
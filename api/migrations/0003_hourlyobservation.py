@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_weatherdata_unique_eircode_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_latitude', models.FloatField()),
+                ('cell_longitude', models.FloatField()),
+                ('variable', models.CharField(max_length=50)),
+                ('time', models.DateTimeField()),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('cell_latitude', 'cell_longitude', 'variable', 'time'), name='unique_hourlyobservation_cell_variable_time')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_hourlyobservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedEircode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eircode', models.CharField(max_length=20, unique=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(max_length=30)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+    ]
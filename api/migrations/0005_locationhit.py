@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_geocodedeircode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationHit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_latitude', models.FloatField()),
+                ('cell_longitude', models.FloatField()),
+                ('eircode', models.CharField(blank=True, default='', max_length=20)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('last_hit', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('cell_latitude', 'cell_longitude', 'eircode'), name='unique_locationhit_cell_eircode')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_locationhit'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['latitude', 'longitude', 'date'], name='weatherdata_lat_lon_date_idx'),
+        ),
+    ]
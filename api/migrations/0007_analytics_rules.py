@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_weatherdata_lat_lon_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsConfig',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumption_per_hour', models.FloatField(default=0.48)),
+                ('version', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalyticsRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('variable', models.CharField(max_length=50, unique=True)),
+                ('moderate_value', models.FloatField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ElectricityTariff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=100, unique=True)),
+                ('rate_per_kwh', models.FloatField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# The values hardcoded in api/analytics.py when the rules moved to the database
+RULES = {
+    "temperature_2m": (14, 0, 40),
+    "relative_humidity_2m": (65, 45, 100),
+    "dew_point_2m": (6, 4, 10),
+    "cloud_cover": (50, 0, 100),
+    "wind_direction_10m": (180, 0, 360),
+    "wind_gusts_10m": (80, 0, 100),
+}
+
+TARIFFS = {
+    "Electric Ireland": 0.42,
+    "Bord Gais Energy": 0.43,
+    "SSE Airtricity": 0.43,
+    "Energia": 0.38,
+    "PrePayPower": 0.46,
+    "Flogas": 0.43,
+}
+
+
+def seed_rules(apps, schema_editor):
+    AnalyticsConfig = apps.get_model("api", "AnalyticsConfig")
+    AnalyticsRule = apps.get_model("api", "AnalyticsRule")
+    ElectricityTariff = apps.get_model("api", "ElectricityTariff")
+
+    AnalyticsConfig.objects.create(consumption_per_hour=0.48)
+    AnalyticsRule.objects.bulk_create([
+        AnalyticsRule(variable=variable, moderate_value=moderate_value, min_value=min_value, max_value=max_value)
+        for variable, (moderate_value, min_value, max_value) in RULES.items()
+    ])
+    ElectricityTariff.objects.bulk_create([
+        ElectricityTariff(provider=provider, rate_per_kwh=rate) for provider, rate in TARIFFS.items()
+    ])
+
+
+def remove_rules(apps, schema_editor):
+    for model in ("AnalyticsConfig", "AnalyticsRule", "ElectricityTariff"):
+        apps.get_model("api", model).objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_analytics_rules'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_rules, remove_rules),
+    ]
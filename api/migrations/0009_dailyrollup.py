@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_seed_analytics_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_latitude', models.FloatField()),
+                ('cell_longitude', models.FloatField()),
+                ('variable', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('hours', models.PositiveSmallIntegerField()),
+                ('working_hours', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('min_value', models.FloatField(blank=True, null=True)),
+                ('max_value', models.FloatField(blank=True, null=True)),
+                ('mean_value', models.FloatField(blank=True, null=True)),
+                ('total_kwh', models.FloatField(blank=True, null=True)),
+                ('costs', models.JSONField(default=dict)),
+                ('rules_version', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('cell_latitude', 'cell_longitude', 'variable', 'day'), name='unique_dailyrollup_cell_variable_day')],
+            },
+        ),
+    ]
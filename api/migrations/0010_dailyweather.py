@@ -0,0 +1,46 @@
+# Generated by Django 5.1 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_dailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWeather',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eircode', models.CharField(max_length=10)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('date', models.DateField()),
+                ('hours', models.PositiveSmallIntegerField()),
+                ('temperature_2m_mean', models.FloatField(blank=True, null=True)),
+                ('temperature_2m_min', models.FloatField(blank=True, null=True)),
+                ('temperature_2m_max', models.FloatField(blank=True, null=True)),
+                ('relative_humidity_2m_mean', models.FloatField(blank=True, null=True)),
+                ('relative_humidity_2m_min', models.FloatField(blank=True, null=True)),
+                ('relative_humidity_2m_max', models.FloatField(blank=True, null=True)),
+                ('dew_point_2m_mean', models.FloatField(blank=True, null=True)),
+                ('dew_point_2m_min', models.FloatField(blank=True, null=True)),
+                ('dew_point_2m_max', models.FloatField(blank=True, null=True)),
+                ('cloud_cover_mean', models.FloatField(blank=True, null=True)),
+                ('cloud_cover_min', models.FloatField(blank=True, null=True)),
+                ('cloud_cover_max', models.FloatField(blank=True, null=True)),
+                ('wind_direction_10m_mean', models.FloatField(blank=True, null=True)),
+                ('wind_direction_10m_min', models.FloatField(blank=True, null=True)),
+                ('wind_direction_10m_max', models.FloatField(blank=True, null=True)),
+                ('wind_gusts_10m_mean', models.FloatField(blank=True, null=True)),
+                ('wind_gusts_10m_min', models.FloatField(blank=True, null=True)),
+                ('wind_gusts_10m_max', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['latitude', 'longitude', 'date'], name='dailyweather_lat_lon_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('eircode', 'date'), name='unique_dailyweather_eircode_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def normalize_eircode(eircode):
+    # As api.geocoding.normalize_eircode
+    return "".join(str(eircode).split()).upper()
+
+
+def normalize_eircodes(apps, schema_editor):
+    # Rows stored under the requested spelling ("d02x285", "D02 X285") move to
+    # the normalized one; hours already stored under it are kept
+    WeatherData = apps.get_model("api", "WeatherData")
+    for eircode in list(WeatherData.objects.values_list("eircode", flat=True).distinct()):
+        normalized = normalize_eircode(eircode)
+        if normalized == eircode:
+            continue
+        rows = WeatherData.objects.filter(eircode=eircode)
+        rows.filter(date__in=WeatherData.objects.filter(eircode=normalized).values("date")).delete()
+        rows.update(eircode=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_dailyweather'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_eircodes, migrations.RunPython.noop),
+    ]
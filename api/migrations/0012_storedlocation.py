@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+def backfill_locations(apps, schema_editor):
+    StoredLocation = apps.get_model("api", "StoredLocation")
+    locations = set()
+    for model in ("WeatherData", "DailyWeather"):
+        locations.update(apps.get_model("api", model).objects.values_list("latitude", "longitude").distinct())
+    StoredLocation.objects.bulk_create(
+        [StoredLocation(latitude=latitude, longitude=longitude) for latitude, longitude in locations],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_normalize_weatherdata_eircodes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('latitude', 'longitude'), name='unique_storedlocation_lat_lon')],
+            },
+        ),
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1 on 2026-10-18 20:01
+
+from datetime import datetime, timezone
+
+import numpy as np
+from django.db import migrations, models
+
+DAY = 86400
+HOURS_PER_DAY = 24
+
+
+def pack_days(apps, schema_editor):
+    HourlyObservation = apps.get_model("api", "HourlyObservation")
+    ObservationDay = apps.get_model("api", "ObservationDay")
+    days = {}
+    rows = HourlyObservation.objects.values_list(
+        "cell_latitude", "cell_longitude", "variable", "time", "value", "fetched_at",
+    ).iterator(chunk_size=5000)
+    for latitude, longitude, variable, time, value, fetched_at in rows:
+        seconds = int(time.timestamp())
+        key = (latitude, longitude, variable, seconds - seconds % DAY)
+        if key not in days:
+            days[key] = (np.full(HOURS_PER_DAY, np.nan, dtype=np.float32), np.zeros(HOURS_PER_DAY, dtype=np.int64))
+        values, fetched = days[key]
+        hour = seconds % DAY // 3600
+        values[hour] = np.nan if value is None else value
+        fetched[hour] = int(fetched_at.timestamp())
+
+    ObservationDay.objects.bulk_create(
+        [
+            ObservationDay(
+                cell_latitude=latitude,
+                cell_longitude=longitude,
+                variable=variable,
+                day=datetime.fromtimestamp(day, tz=timezone.utc),
+                values=values.tobytes(),
+                fetched=fetched.tobytes(),
+            )
+            for (latitude, longitude, variable, day), (values, fetched) in days.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_storedlocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObservationDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_latitude', models.FloatField()),
+                ('cell_longitude', models.FloatField()),
+                ('variable', models.CharField(max_length=50)),
+                ('day', models.DateTimeField()),
+                ('values', models.BinaryField()),
+                ('fetched', models.BinaryField()),
+            ],
+        ),
+        migrations.RunPython(pack_days, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='HourlyObservation',
+        ),
+        migrations.AddConstraint(
+            model_name='observationday',
+            constraint=models.UniqueConstraint(fields=('cell_latitude', 'cell_longitude', 'variable', 'day'), name='unique_observationday_cell_variable_day'),
+        ),
+    ]
@@ -12,5 +12,175 @@ class WeatherData(models.Model):
     wind_direction_10m = models.FloatField(null=True, blank=True)
     wind_gusts_10m = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["eircode", "date"], name="unique_weatherdata_eircode_date"),
+        ]
+        # (eircode, date) lookups use the index behind the unique constraint
+        indexes = [
+            models.Index(fields=["latitude", "longitude", "date"], name="weatherdata_lat_lon_date_idx"),
+        ]
+
     def __str__(self):
         return f"Weather data for {self.eircode} on {self.date}"
+
+
+class ObservationDay(models.Model):
+    """One UTC day of a variable's hourly values for a weather store grid cell.
+
+    `values` packs the 24 hours as float32 (NaN for null) and `fetched` as
+    int64 epoch seconds of when each hour was fetched, 0 where it is not held.
+    """
+    cell_latitude = models.FloatField()
+    cell_longitude = models.FloatField()
+    variable = models.CharField(max_length=50)
+    day = models.DateTimeField()
+    values = models.BinaryField()
+    fetched = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cell_latitude", "cell_longitude", "variable", "day"],
+                name="unique_observationday_cell_variable_day",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variable} at ({self.cell_latitude}, {self.cell_longitude}) on {self.day:%Y-%m-%d}"
+
+
+class GeocodedEircode(models.Model):
+    eircode = models.CharField(max_length=20, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=30)
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.eircode}: {self.status}"
+
+
+class LocationHit(models.Model):
+    cell_latitude = models.FloatField()
+    cell_longitude = models.FloatField()
+    eircode = models.CharField(max_length=20, blank=True, default="")
+    hits = models.PositiveIntegerField(default=0)
+    last_hit = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cell_latitude", "cell_longitude", "eircode"],
+                name="unique_locationhit_cell_eircode",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.eircode or 'coordinates'} at ({self.cell_latitude}, {self.cell_longitude}): {self.hits} hits"
+
+
+class AnalyticsConfig(models.Model):
+    # A single row; `version` is bumped on every rule or tariff change
+    consumption_per_hour = models.FloatField(default=0.48)
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"Analytics config v{self.version}"
+
+
+class AnalyticsRule(models.Model):
+    variable = models.CharField(max_length=50, unique=True)
+    moderate_value = models.FloatField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+
+    def __str__(self):
+        return f"{self.variable}: {self.moderate_value} [{self.min_value} to {self.max_value}]"
+
+
+class ElectricityTariff(models.Model):
+    provider = models.CharField(max_length=100, unique=True)
+    rate_per_kwh = models.FloatField()
+
+    def __str__(self):
+        return f"{self.provider}: {self.rate_per_kwh} per kWh"
+
+
+class DailyRollup(models.Model):
+    cell_latitude = models.FloatField()
+    cell_longitude = models.FloatField()
+    variable = models.CharField(max_length=50)
+    day = models.DateField()
+    hours = models.PositiveSmallIntegerField()
+    working_hours = models.PositiveSmallIntegerField(null=True, blank=True)
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    mean_value = models.FloatField(null=True, blank=True)
+    total_kwh = models.FloatField(null=True, blank=True)
+    costs = models.JSONField(default=dict)
+    rules_version = models.PositiveIntegerField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cell_latitude", "cell_longitude", "variable", "day"],
+                name="unique_dailyrollup_cell_variable_day",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variable} at ({self.cell_latitude}, {self.cell_longitude}) on {self.day}"
+
+
+class DailyWeather(models.Model):
+    """WeatherData compacted to one row per eircode and local day once past hourly retention."""
+    eircode = models.CharField(max_length=10)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    date = models.DateField()
+    hours = models.PositiveSmallIntegerField()
+    temperature_2m_mean = models.FloatField(null=True, blank=True)
+    temperature_2m_min = models.FloatField(null=True, blank=True)
+    temperature_2m_max = models.FloatField(null=True, blank=True)
+    relative_humidity_2m_mean = models.FloatField(null=True, blank=True)
+    relative_humidity_2m_min = models.FloatField(null=True, blank=True)
+    relative_humidity_2m_max = models.FloatField(null=True, blank=True)
+    dew_point_2m_mean = models.FloatField(null=True, blank=True)
+    dew_point_2m_min = models.FloatField(null=True, blank=True)
+    dew_point_2m_max = models.FloatField(null=True, blank=True)
+    cloud_cover_mean = models.FloatField(null=True, blank=True)
+    cloud_cover_min = models.FloatField(null=True, blank=True)
+    cloud_cover_max = models.FloatField(null=True, blank=True)
+    wind_direction_10m_mean = models.FloatField(null=True, blank=True)
+    wind_direction_10m_min = models.FloatField(null=True, blank=True)
+    wind_direction_10m_max = models.FloatField(null=True, blank=True)
+    wind_gusts_10m_mean = models.FloatField(null=True, blank=True)
+    wind_gusts_10m_min = models.FloatField(null=True, blank=True)
+    wind_gusts_10m_max = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["eircode", "date"], name="unique_dailyweather_eircode_date"),
+        ]
+        indexes = [
+            models.Index(fields=["latitude", "longitude", "date"], name="dailyweather_lat_lon_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"Daily weather for {self.eircode} on {self.date}"
+
+
+class StoredLocation(models.Model):
+    """A coordinate with stored WeatherData or DailyWeather, for the nearest-neighbour index."""
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["latitude", "longitude"], name="unique_storedlocation_lat_lon"),
+        ]
+
+    def __str__(self):
+        return f"({self.latitude}, {self.longitude})"
@@ -0,0 +1,243 @@
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+
+from . import weather_store
+from .geocoding import CACHEABLE_STATUSES, cached_geocode, normalize_eircode, request_geocode, save_geocode
+from .ingestion import WEATHER_VARIABLES, ingest_weather
+
+# Bulk onboarding of eircodes (manage.py ingest_eircodes). Upstream calls
+# run on a bounded, rate-limited thread pool: Google geocodes, then one
+# multi-coordinate Open-Meteo request per batch of up to
+# MAX_LOCATIONS_PER_REQUEST locations. Database reads and writes stay on the
+# calling thread, one transaction per batch. Finished eircodes go to a JSON
+# checkpoint so an interrupted run can be resumed.
+
+logger = logging.getLogger(__name__)
+
+
+def read_eircodes(path, column="eircode"):
+    """Read the unique, normalized eircodes of a CSV file (with or without a header)."""
+    with open(path, newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+    if not rows:
+        return []
+
+    header = [name.strip().lower() for name in rows[0]]
+    if column.lower() in header:
+        index = header.index(column.lower())
+        rows = rows[1:]
+    else:
+        index = 0
+
+    eircodes = (normalize_eircode(row[index]) for row in rows if len(row) > index)
+    return list(dict.fromkeys(eircode for eircode in eircodes if eircode))
+
+
+class RateLimiter:
+    """Spaces calls at least 1/`rate` seconds apart across threads (no limit when rate is 0)."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(self._next, now) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Checkpoint:
+    """Progress of a bulk run: the final status of each finished eircode and the last error of failed ones."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self.failed = {}
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+            self.done = state.get("done", {})
+            self.failed = state.get("failed", {})
+
+    def finish(self, eircode, status):
+        self.done[eircode] = status
+        self.failed.pop(eircode, None)
+
+    def fail(self, eircode, error):
+        self.failed[eircode] = error
+
+    def save(self):
+        if not self.path:
+            return
+        # Written aside and renamed, so an interrupted save never corrupts the file
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as checkpoint_file:
+            json.dump({"done": self.done, "failed": self.failed}, checkpoint_file, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+def _request_geocode(eircode, limiter):
+    limiter.wait()
+    return request_geocode(eircode)
+
+
+def geocode_all(eircodes, checkpoint, workers, rate):
+    """Geocode eircodes and return {eircode: (latitude, longitude)} of those found.
+
+    Cached answers are used as they are; the others are requested from
+    Google on the pool, while the cache is written from this thread.
+    """
+    limiter = RateLimiter(rate)
+    located = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for eircode in eircodes:
+            cached = cached_geocode(eircode)
+            if cached is None:
+                futures[executor.submit(_request_geocode, eircode, limiter)] = eircode
+                continue
+            status, latitude, longitude = cached
+            if status == "OK":
+                located[eircode] = (latitude, longitude)
+            else:
+                checkpoint.finish(eircode, status)
+
+        for future in as_completed(futures):
+            eircode = futures[future]
+            try:
+                status, latitude, longitude = future.result()
+            except (requests.exceptions.RequestException, KeyError) as e:
+                logger.warning("Geocoding %s failed: %s", eircode, e)
+                checkpoint.fail(eircode, f"geocode: {e}")
+                continue
+            save_geocode(eircode, status, latitude, longitude)
+            if status == "OK":
+                located[eircode] = (latitude, longitude)
+            elif status in CACHEABLE_STATUSES:
+                # ZERO_RESULTS will not change on a retry
+                checkpoint.finish(eircode, status)
+            else:
+                checkpoint.fail(eircode, f"geocode: {status}")
+    return located
+
+
+def _request_window(fetch, limiter):
+    limiter.wait()
+    return weather_store.request_window(fetch)
+
+
+class _Batch:
+    """Up to MAX_LOCATIONS_PER_REQUEST located eircodes and the upstream requests their hours still need."""
+
+    def __init__(self, located, variables, start, end, now):
+        self.located = located
+        self.cells = [weather_store.grid_cell(latitude, longitude) for _, (latitude, longitude) in located]
+        # Hours already stored for a grid cell are reused
+        self.states = weather_store.load_cells(set(self.cells), variables, start, end, now)
+        self.fetches = weather_store.missing_fetches(self.states, variables, start)
+        self.remaining = len(self.fetches)
+        self.failed = False
+
+    def store(self, variables, start):
+        series = weather_store.assemble(self.states, self.cells, variables, start)
+        with transaction.atomic():
+            return sum(
+                ingest_weather(eircode, latitude, longitude, hourly.start, hourly.interval, hourly.values)
+                for (eircode, (latitude, longitude)), hourly in zip(self.located, series)
+            )
+
+
+def _batches(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def bulk_ingest(eircodes, checkpoint, workers=8, geocode_rate=20, weather_rate=1, past_days=30, forecast_days=7,
+                progress=None):
+    """Geocode eircodes and store their hourly weather; returns a dict of counts.
+
+    Eircodes the checkpoint lists as done are skipped. `geocode_rate` is in
+    Google requests and `weather_rate` in Open-Meteo batches per second.
+    `progress(done, total)` is called after every stored batch.
+    """
+    eircodes = list(dict.fromkeys(map(normalize_eircode, eircodes)))
+    pending = [eircode for eircode in eircodes if eircode not in checkpoint.done]
+    counts = {"skipped": len(eircodes) - len(pending), "stored": 0, "not found": 0, "failed": 0, "rows": 0}
+
+    located = geocode_all(pending, checkpoint, workers, geocode_rate)
+    checkpoint.save()
+
+    start, end = weather_store.forecast_window(forecast_days=forecast_days, past_days=past_days)
+    now = timezone.now()
+    variables = list(WEATHER_VARIABLES)
+    limiter = RateLimiter(weather_rate)
+
+    def finish(batch, error=None):
+        if error is None:
+            for eircode, _ in batch.located:
+                checkpoint.finish(eircode, "OK")
+            counts["stored"] += len(batch.located)
+        else:
+            batch.failed = True
+            logger.warning("Weather for %d eircodes failed: %s", len(batch.located), error)
+            for eircode, _ in batch.located:
+                checkpoint.fail(eircode, f"weather: {error}")
+        checkpoint.save()
+        if progress is not None:
+            progress(counts["stored"], len(located))
+
+    def store(batch):
+        try:
+            counts["rows"] += batch.store(variables, start)
+        except Exception as e:
+            finish(batch, e)
+        else:
+            finish(batch)
+
+    batches = _batches(located.items(), weather_store.MAX_LOCATIONS_PER_REQUEST)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # `workers` batches at a time keeps memory bounded however long the file is
+        for group in _batches(batches, workers):
+            futures = {}
+            for batch in group:
+                batch = _Batch(batch, variables, start, end, now)
+                if not batch.fetches:
+                    store(batch)
+                for fetch in batch.fetches:
+                    futures[executor.submit(_request_window, fetch, limiter)] = (batch, fetch)
+
+            for future in as_completed(futures):
+                batch, fetch = futures[future]
+                if batch.failed:
+                    continue
+                try:
+                    window = future.result()
+                    weather_store.save_window(fetch, window, now)
+                except Exception as e:
+                    finish(batch, e)
+                    continue
+                weather_store.merge_window(batch.states, variables, start, fetch, window)
+                batch.remaining -= 1
+                if not batch.remaining:
+                    store(batch)
+
+    counts["not found"] = sum(1 for eircode in pending if checkpoint.done.get(eircode, "OK") != "OK")
+    counts["failed"] = sum(1 for eircode in pending if eircode in checkpoint.failed)
+    return counts
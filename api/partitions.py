@@ -0,0 +1,146 @@
+from datetime import date, datetime, timezone
+
+from django.db import connection, transaction
+from django.utils import timezone as django_timezone
+
+from .models import WeatherData
+
+# Monthly range partitions of WeatherData on `date`, PostgreSQL only. The
+# table is converted once (manage.py partition_weatherdata); afterwards
+# retention (manage.py compact_weather) creates the coming months and
+# drops months whose hours were all compacted, which frees their space
+# without a DELETE + VACUUM. Hours outside every month land in a DEFAULT
+# partition and are moved out when their month is created.
+
+TABLE = WeatherData._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+CONSTRAINT = "unique_weatherdata_eircode_date"
+INDEX = "weatherdata_lat_lon_date_idx"
+
+
+def _month(moment):
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = to_regnamespace(current_schema())",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions():
+    """Return {first day of month: partition name} for the existing monthly partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [TABLE],
+        )
+        names = [name for name, in cursor.fetchall()]
+    prefix = f"{TABLE}_p"
+    return {
+        date(int(name[len(prefix):len(prefix) + 4]), int(name[len(prefix) + 4:]), 1): name
+        for name in names
+        if name.startswith(prefix) and name[len(prefix):].isdigit()
+    }
+
+
+def _create_partition(cursor, month):
+    name, start, end = partition_name(month), _bound(month), _bound(_next_month(month))
+    # A new range may not overlap rows in the DEFAULT partition, so move them
+    cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{DEFAULT_PARTITION}"')
+    cursor.execute(
+        f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)', [start, end]
+    )
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE date >= %s AND date < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT')
+    return name
+
+
+def ensure_partitions(months_ahead, now=None, since=None):
+    """Create the monthly partitions from `since` (default: this month) to `months_ahead` months ahead."""
+    month = _month(since or now or django_timezone.now())
+    last = _month(now or django_timezone.now())
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    existing = monthly_partitions()
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        while month <= last:
+            if month not in existing:
+                created.append(_create_partition(cursor, month))
+            month = _next_month(month)
+    return created
+
+
+def drop_partitions_before(cutoff):
+    """Drop the empty monthly partitions that end on or before `cutoff`."""
+    dropped = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for month, name in sorted(monthly_partitions().items()):
+            if _bound(_next_month(month)) > cutoff:
+                continue
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{name}")')
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'DROP TABLE "{name}"')
+            dropped.append(name)
+    return dropped
+
+
+def partition_table(months_ahead, now=None):
+    """Rebuild WeatherData as a table range-partitioned by month on `date`; returns the partitions.
+
+    The primary key becomes (id, date), as PostgreSQL requires the
+    partition key in every unique constraint. Rows are copied inside one
+    transaction, so writers wait until it commits.
+    """
+    old = f"{TABLE}_unpartitioned"
+    # The old table's identity sequence is called {TABLE}_id_seq and is dropped with it
+    sequence = f"{TABLE}_partitioned_id_seq"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT MIN(date) FROM "{TABLE}"')
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        cursor.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{CONSTRAINT}" TO "{CONSTRAINT}_old"')
+        cursor.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{old}_pkey"')
+        cursor.execute(f'ALTER INDEX "{INDEX}" RENAME TO "{INDEX}_old"')
+
+        # Identity columns are not allowed on partitioned tables before PostgreSQL 17
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS) PARTITION BY RANGE (date)')
+        cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(%s)', [sequence])
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, date)')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{CONSTRAINT}" UNIQUE (eircode, date)')
+        cursor.execute(f'CREATE INDEX "{INDEX}" ON "{TABLE}" (latitude, longitude, date)')
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        created = ensure_partitions(months_ahead, now, since=oldest)
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+        cursor.execute(f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM "{TABLE}"), 0) + 1, false)', [sequence])
+        cursor.execute(f'DROP TABLE "{old}"')
+    return created
@@ -0,0 +1,167 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from . import weather_store
+from .geocoding import geocodes_due, normalize_eircode, refresh_geocode
+from .ingestion import WEATHER_VARIABLES
+from .models import LocationHit, WeatherData
+
+# Traffic-driven prefetching. Views count the grid cells (and eircodes) they
+# serve; the prefetch_weather command refreshes the most requested ones before
+# their cached hours expire, so those requests never wait on Open-Meteo.
+
+logger = logging.getLogger(__name__)
+
+
+class HitCounter:
+    """Buffers location hits in memory and writes them every `flush_interval` seconds.
+
+    Hits are written by the request that finds the interval elapsed. With
+    `background`, a timer also writes them within `flush_interval` once
+    traffic stops, and they are written when the process exits.
+    """
+
+    def __init__(self, flush_interval, background=False):
+        self.flush_interval = flush_interval
+        self.background = background
+        self._pending = Counter()
+        self._flushed = time.monotonic()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, keys):
+        with self._lock:
+            self._pending.update(keys)
+            due = time.monotonic() - self._flushed >= self.flush_interval
+            if self.background and not due and self._pending and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_idle)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            # Counting hits must never fail the request being served
+            self.flush_logged()
+
+    def _flush_idle(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush_logged()
+        finally:
+            connection.close()
+
+    def flush_logged(self):
+        """flush(), logging a database error instead of raising it."""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning("Writing location hits failed: %s", e)
+
+    def flush(self):
+        """Write the buffered hits; they stay buffered for the next flush if that fails."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+
+        try:
+            self._write(pending)
+        except Exception:
+            with self._lock:
+                self._pending.update(pending)
+            raise
+
+    def _write(self, pending):
+        now = timezone.now()
+        with transaction.atomic():
+            # Create missing rows first so concurrent processes only ever increment
+            LocationHit.objects.bulk_create(
+                [
+                    LocationHit(cell_latitude=latitude, cell_longitude=longitude, eircode=eircode, last_hit=now)
+                    for latitude, longitude, eircode in pending
+                ],
+                ignore_conflicts=True,
+            )
+            for (latitude, longitude, eircode), count in pending.items():
+                LocationHit.objects.filter(
+                    cell_latitude=latitude, cell_longitude=longitude, eircode=eircode
+                ).update(hits=F("hits") + count, last_hit=now)
+
+
+hit_counter = HitCounter(settings.PREFETCH_HIT_FLUSH_INTERVAL, settings.PREFETCH_HIT_BACKGROUND_FLUSH)
+
+if hit_counter.background:
+    atexit.register(hit_counter.flush_logged)
+
+
+def record_hits(locations):
+    """Count requests for (latitude, longitude, eircode) locations; eircode may be empty."""
+    hit_counter.add(
+        (*weather_store.grid_cell(latitude, longitude), normalize_eircode(eircode or ""))
+        for latitude, longitude, eircode in locations
+    )
+
+
+def popular_locations(limit, now=None):
+    """Return up to `limit` (cell, eircode) pairs, most requested first.
+
+    Traffic recorded in the last PREFETCH_HIT_WINDOW seconds comes first;
+    eircodes with stored forecasts in WeatherData fill the remaining places.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(seconds=settings.PREFETCH_HIT_WINDOW)
+    locations = {}
+
+    hits = LocationHit.objects.filter(last_hit__gte=since).order_by("-hits")
+    for latitude, longitude, eircode in hits.values_list("cell_latitude", "cell_longitude", "eircode")[:limit]:
+        locations.setdefault(((latitude, longitude), eircode), None)
+
+    if len(locations) < limit:
+        stored = (
+            WeatherData.objects.filter(date__gte=now)
+            .values("eircode")
+            .annotate(rows=Count("id"), latitude=Max("latitude"), longitude=Max("longitude"))
+            .order_by("-rows")
+        )
+        for row in stored[:limit]:
+            cell = weather_store.grid_cell(row["latitude"], row["longitude"])
+            locations.setdefault((cell, row["eircode"]), None)
+
+    return list(locations)[:limit]
+
+
+def prefetch(limit, lead, forecast_days, variables=WEATHER_VARIABLES, now=None):
+    """Refresh the weather and geocodes of the most popular locations.
+
+    Hours and geocodes that expire within `lead` seconds are fetched again.
+    Returns a dict of counts for reporting.
+    """
+    now = now or timezone.now()
+    # Hits still buffered in this process count too
+    hit_counter.flush()
+    locations = popular_locations(limit, now)
+    cells = list(dict.fromkeys(cell for cell, _ in locations))
+
+    start, end = weather_store.forecast_window(forecast_days=forecast_days, now=now)
+    fetches = weather_store.refresh_ahead(cells, variables, start, end, lead, now) if cells else 0
+
+    geocodes = failed = 0
+    for eircode in geocodes_due([eircode for _, eircode in locations if eircode], lead):
+        try:
+            refresh_geocode(eircode)
+            geocodes += 1
+        except (requests.exceptions.RequestException, KeyError):
+            failed += 1
+
+    return {"locations": len(locations), "cells": len(cells), "upstream calls": fetches,
+            "geocodes": geocodes, "geocode failures": failed}
@@ -0,0 +1,58 @@
+import numpy as np
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import timed
+
+# Datetimes go through DRF's encoder so they keep DRF's format ("Z" for UTC)
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        # Arrays orjson cannot write from their buffer (non-contiguous, other dtypes)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return _encoder.default(obj)
+
+
+def dumps_json(data, indent=False):
+    """Serialize a payload to JSON bytes with orjson.
+
+    NumPy arrays are written straight from their buffers and NaN (a missing
+    hour) becomes null, which the standard library encoder cannot do.
+    """
+    with timed("render"):
+        return orjson.dumps(data, default=_default, option=OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """DRF's JSONRenderer on dumps_json, timed as the "render" stage.
+
+    Any requested indent (the browsable API's) is rendered as two spaces.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps_json(data, indent=bool(self.get_indent(accepted_media_type, renderer_context or {})))
+
+
+class ColumnarJSONRenderer(BaseRenderer):
+    """Compact hourly series: start + interval instead of one date per hour.
+
+    Selected with ?format=columnar; the view builds the columnar payload.
+    """
+
+    media_type = "application/json"
+    format = "columnar"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps_json(data)
@@ -0,0 +1,258 @@
+from datetime import datetime, timezone
+
+import numpy as np
+from rest_framework import status
+
+from . import weather_store
+from .analytics import compute_analytics
+from .geocoding import GeocodeError, cached_geocode, normalize_eircode
+from .metrics import timed
+from .rules import DEFAULT_RULES, current_rules
+
+# Request validation and response payloads shared by the sync (views) and
+# async (async_views) endpoints
+
+MAX_BATCH_LOCATIONS = 500
+WEATHER_SAVED = {"message": "Weather data retrieved and saved successfully."}
+
+
+class InvalidRequest(Exception):
+    """A request rejected by validation, with the payload and status to answer it with."""
+
+    def __init__(self, data, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(data)
+        self.data = data
+        self.status_code = status_code
+
+
+def error_data(message):
+    return {"error message": message}
+
+
+def unexpected_error_data(error):
+    return error_data(f"An unexpected error occurred: {str(error)}")
+
+
+def request_failed_data(error):
+    return error_data(f"Request failed: {str(error)}")
+
+
+def required_eircode(params):
+    """The query string's eircode in its stored spelling."""
+    eircode = normalize_eircode(params.get("eircode") or "")
+    if not eircode:
+        raise InvalidRequest(error_data("Eircode is required"))
+    return eircode
+
+
+def coordinates_data(latitude, longitude):
+    return {"coordinates": {"latitude": latitude, "longitude": longitude}}
+
+
+def analytics_params(data):
+    """Validate an analytics body; returns latitude, longitude, the hourly variables and forecast_days."""
+    latitude = data.get("latitude")
+    longitude = data.get("longitude")
+    hourly_variables = list(dict.fromkeys(data.get("hourly") or []))
+    forecast_days = data.get("forecast_days")
+    if not ((latitude and longitude) and (hourly_variables and forecast_days)):
+        raise InvalidRequest({"message": "Check the parameters send"}, status.HTTP_404_NOT_FOUND)
+    return latitude, longitude, hourly_variables, forecast_days
+
+
+def batch_params(data):
+    """Validate a batch analytics body; returns the locations, hourly variables and forecast_days."""
+    locations = data.get("locations")
+    hourly_variables = list(dict.fromkeys(data.get("hourly") or []))
+    forecast_days = data.get("forecast_days")
+    if not (locations and hourly_variables and forecast_days) or not isinstance(locations, list):
+        raise InvalidRequest({"message": "Check the parameters send"})
+    if len(locations) > MAX_BATCH_LOCATIONS:
+        raise InvalidRequest(error_data(f"At most {MAX_BATCH_LOCATIONS} locations per request"))
+    return locations, hourly_variables, forecast_days
+
+
+def request_rules(rules, data):
+    """`rules` with the body's moderate_values overrides, checked against their ranges."""
+    try:
+        return rules.with_overrides(data.get("moderate_values"))
+    except ValueError as e:
+        raise InvalidRequest(error_data(str(e)))
+
+
+def hourly_dates(start, end, interval):
+    seconds = np.arange(start, end, interval, dtype=np.int64).astype("datetime64[s]")
+    # Same format as datetime.isoformat() in UTC, for the whole axis at once
+    return np.char.add(np.datetime_as_string(seconds, unit="s"), "+00:00").tolist()
+
+
+def time_axis(start, end, interval, columnar=False):
+    """Per-hour ISO dates, or just start + interval in the columnar format."""
+    if columnar:
+        return {
+            "start": datetime.fromtimestamp(start, tz=timezone.utc).isoformat(),
+            "interval": interval,
+            "hours": (end - start) // interval,
+        }
+    return {"date": hourly_dates(start, end, interval)}
+
+
+def analytics_data(hourly, hourly_variables, rules=DEFAULT_RULES, daily=False, columnar=False):
+    """Build the AnalyticsView payload for one HourlySeries.
+
+    In the columnar format the values stay NumPy arrays for the renderer.
+    """
+    response_data = {
+        "data": {
+            **time_axis(hourly.start, hourly.end, hourly.interval, columnar),
+            "variables": {}
+        }
+    }
+
+    # Working hours and provider costs for all variables at once
+    with timed("analytics"):
+        matrix = np.vstack([hourly.values[variable] for variable in hourly_variables])
+        analytics = compute_analytics(
+            hourly_variables,
+            matrix,
+            rules.moderate_values,
+            rules.providers,
+            rules.consumption_per_hour,
+            start=hourly.start if daily else None,
+        )
+
+    for idx, variable in enumerate(hourly_variables):
+        # Add variable data to the response
+        response_data["data"]["variables"][variable] = {
+            "values": matrix[idx] if columnar else matrix[idx].tolist(),  # Convert numpy array to list
+            **analytics.variable_report(idx),
+        }
+
+    return response_data
+
+
+def split_locations(locations):
+    """Split batch locations into known coordinates and eircodes to geocode.
+
+    Returns a list with (latitude, longitude) for coordinate locations and
+    None elsewhere, plus a mapping of each eircode to its positions.
+    """
+    resolved = [None] * len(locations)
+    eircodes = {}
+    try:
+        for idx, location in enumerate(locations):
+            if location.get("eircode"):
+                eircodes.setdefault(location["eircode"], []).append(idx)
+            else:
+                resolved[idx] = (float(location["latitude"]), float(location["longitude"]))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise InvalidRequest(error_data("Each location needs an eircode or a latitude and longitude"))
+    return resolved, eircodes
+
+
+def location_error(error):
+    """What a batch location reports when geocoding it failed."""
+    if isinstance(error, GeocodeError):
+        return error.status
+    return f"Request failed: {str(error)}"
+
+
+def located(resolved):
+    """The (latitude, longitude) of the batch locations that were found, in order."""
+    return [coordinates for coordinates in resolved if isinstance(coordinates, tuple)]
+
+
+def batch_hits(locations, resolved):
+    return [
+        (*coordinates, location.get("eircode"))
+        for location, coordinates in zip(locations, resolved) if isinstance(coordinates, tuple)
+    ]
+
+
+def batch_data(locations, resolved, series, hourly_variables, start, end, daily=False, columnar=False,
+               rules=DEFAULT_RULES):
+    """Build the BatchAnalyticsView payload.
+
+    `resolved` holds (latitude, longitude) or an error message per location
+    and `series` one HourlySeries per resolved location, in order.
+    """
+    found = [idx for idx, coordinates in enumerate(resolved) if isinstance(coordinates, tuple)]
+    results = [dict(location) for location in locations]
+
+    if series:
+        with timed("analytics"):
+            matrix = np.stack([
+                np.vstack([hourly.values[variable] for variable in hourly_variables]) for hourly in series
+            ])
+            analytics = compute_analytics(
+                hourly_variables,
+                matrix,
+                rules.moderate_values,
+                rules.providers,
+                rules.consumption_per_hour,
+                start=start if daily else None,
+            )
+        for position, idx in enumerate(found):
+            results[idx]["latitude"], results[idx]["longitude"] = resolved[idx]
+            results[idx]["variables"] = {
+                variable: {
+                    "values": matrix[position, variable_idx] if columnar else matrix[position, variable_idx].tolist(),
+                    **analytics.variable_report(variable_idx, (position,)),
+                }
+                for variable_idx, variable in enumerate(hourly_variables)
+            }
+
+    for idx, coordinates in enumerate(resolved):
+        if not isinstance(coordinates, tuple):
+            results[idx]["error message"] = coordinates
+
+    interval = series[0].interval if series else 3600
+    return {
+        "data": {
+            **time_axis(start, end, interval, columnar),
+            "locations": results
+        }
+    }
+
+
+def analytics_cache_params(data):
+    """Normalized analytics request parameters for the response cache, or None if invalid."""
+    try:
+        latitude, longitude = round(float(data["latitude"]), 6), round(float(data["longitude"]), 6)
+        forecast_days = int(data["forecast_days"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    hourly = data.get("hourly")
+    if not isinstance(hourly, list) or not hourly:
+        return None
+
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": list(dict.fromkeys(map(str, hourly))),
+        "forecast_days": forecast_days,
+        "daily": bool(data.get("daily")),
+        "summary": bool(data.get("summary")),
+        "moderate_values": data.get("moderate_values") or None,
+        # A rules change or a new local day gives different answers
+        "rules": current_rules().version,
+        "window": weather_store.forecast_window(forecast_days=forecast_days)[0],
+    }
+
+
+def eircode_cache_params(eircode):
+    """Normalized eircode request parameters for the response cache."""
+    if not eircode:
+        return None
+    return {"eircode": normalize_eircode(eircode)}
+
+
+def eircode_hits(params):
+    cached = cached_geocode(params["eircode"])
+    if cached is None or cached[0] != "OK":
+        return []
+    return [(cached[1], cached[2], params["eircode"])]
+
+
+def export_disposition(output, source):
+    return f'attachment; filename="weather_{source}.{output}"'
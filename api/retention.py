@@ -0,0 +1,183 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Exists, Max, Min, OuterRef
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import partitions
+from .ingestion import WEATHER_VARIABLES
+from .models import DailyRollup, DailyWeather, ObservationDay, StoredLocation, WeatherData
+from .weather_store import LOCAL_TIMEZONE
+
+# Retention for the weather tables. Hourly WeatherData older than
+# WEATHER_HOURLY_RETENTION_DAYS is compacted into DailyWeather (one row per
+# eircode and local day) and deleted, a few days per transaction. Daily
+# aggregates, rollups and the upstream store are purged after their own
+# windows, and locations left without any weather leave the spatial index.
+# On a partitioned PostgreSQL WeatherData, emptied monthly partitions are
+# dropped and upcoming ones created.
+
+STATISTICS = ("mean", "min", "max")
+
+
+def retention_cutoff(days, now=None):
+    """Local midnight `days` days before today."""
+    now = now or timezone.now()
+    today = now.astimezone(LOCAL_TIMEZONE).date()
+    return datetime.combine(today - timedelta(days=days), time.min, tzinfo=LOCAL_TIMEZONE)
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min, tzinfo=LOCAL_TIMEZONE)
+
+
+def daily_aggregates(start, end):
+    """Aggregate the WeatherData hours in [start, end) per eircode and local day."""
+    aggregates = {"lat": Max("latitude"), "lon": Max("longitude"), "hours": Count("date", distinct=True)}
+    for variable in WEATHER_VARIABLES:
+        aggregates[f"{variable}_mean"] = Avg(variable)
+        aggregates[f"{variable}_min"] = Min(variable)
+        aggregates[f"{variable}_max"] = Max(variable)
+
+    return (
+        WeatherData.objects.filter(date__gte=start, date__lt=end)
+        .annotate(day=TruncDate("date", tzinfo=LOCAL_TIMEZONE))
+        .values("eircode", "day")
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+
+def _merge(existing, row):
+    # A day compacted before (e.g. late ingested hours): weight means by hours
+    hours = existing.hours + row["hours"]
+    for variable in WEATHER_VARIABLES:
+        old, new = getattr(existing, f"{variable}_mean"), row[f"{variable}_mean"]
+        if old is not None and new is not None:
+            row[f"{variable}_mean"] = (old * existing.hours + new * row["hours"]) / hours
+        elif new is None:
+            row[f"{variable}_mean"] = old
+        for statistic, pick in (("min", min), ("max", max)):
+            values = [value for value in (getattr(existing, f"{variable}_{statistic}"), row[f"{variable}_{statistic}"])
+                      if value is not None]
+            row[f"{variable}_{statistic}"] = pick(values) if values else None
+    row["hours"] = hours
+
+
+def _daily_weather(row):
+    return DailyWeather(
+        eircode=row["eircode"],
+        latitude=row["lat"],
+        longitude=row["lon"],
+        date=row["day"],
+        hours=row["hours"],
+        **{
+            f"{variable}_{statistic}": None if row[f"{variable}_{statistic}"] is None
+            else round(row[f"{variable}_{statistic}"], 2)
+            for variable in WEATHER_VARIABLES
+            for statistic in STATISTICS
+        },
+    )
+
+
+def compact_days(start, end):
+    """Compact WeatherData in [start, end) into DailyWeather and delete it; returns (days, rows)."""
+    fields = ["latitude", "longitude", "hours"] + [
+        f"{variable}_{statistic}" for variable in WEATHER_VARIABLES for statistic in STATISTICS
+    ]
+    with transaction.atomic():
+        rows = list(daily_aggregates(start, end))
+        existing = {
+            (daily.eircode, daily.date): daily
+            for daily in DailyWeather.objects.filter(
+                eircode__in={row["eircode"] for row in rows}, date__gte=start.date(), date__lt=end.date(),
+            )
+        }
+        for row in rows:
+            if (row["eircode"], row["day"]) in existing:
+                _merge(existing[row["eircode"], row["day"]], row)
+
+        DailyWeather.objects.bulk_create(
+            [_daily_weather(row) for row in rows],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["eircode", "date"],
+            update_fields=fields,
+        )
+        deleted, _ = WeatherData.objects.filter(date__gte=start, date__lt=end).delete()
+    return len(rows), deleted
+
+
+def compact_weather(before, batch_days=7, dry_run=False, progress=None):
+    """Compact every WeatherData hour before `before` (a local midnight), oldest first.
+
+    Returns the number of daily rows written and hourly rows removed; a dry
+    run only counts the hourly rows.
+    """
+    counts = {"daily rows": 0, "hourly rows": 0}
+    queryset = WeatherData.objects.filter(date__lt=before)
+    if dry_run:
+        counts["hourly rows"] = queryset.count()
+        return counts
+
+    oldest = queryset.aggregate(oldest=Min("date"))["oldest"]
+    if oldest is None:
+        return counts
+
+    day = oldest.astimezone(LOCAL_TIMEZONE).date()
+    while _day_start(day) < before:
+        start = _day_start(day)
+        end = min(_day_start(day + timedelta(days=batch_days)), before)
+        days, deleted = compact_days(start, end)
+        counts["daily rows"] += days
+        counts["hourly rows"] += deleted
+        if progress is not None:
+            progress(start, end, days, deleted)
+        day += timedelta(days=batch_days)
+    return counts
+
+
+def orphaned_locations():
+    """StoredLocation rows with neither WeatherData nor DailyWeather left."""
+    def stored(model):
+        return Exists(model.objects.filter(latitude=OuterRef("latitude"), longitude=OuterRef("longitude")))
+
+    return StoredLocation.objects.exclude(stored(WeatherData)).exclude(stored(DailyWeather))
+
+
+def apply_retention(hourly_days=None, daily_days=None, store_days=None, batch_days=7, dry_run=False, now=None,
+                    progress=None):
+    """Run every retention step with the settings' windows unless overridden; returns counts per step."""
+    now = now or timezone.now()
+    hourly_days = settings.WEATHER_HOURLY_RETENTION_DAYS if hourly_days is None else hourly_days
+    daily_days = settings.WEATHER_DAILY_RETENTION_DAYS if daily_days is None else daily_days
+    store_days = settings.WEATHER_STORE_RETENTION_DAYS if store_days is None else store_days
+
+    hourly_cutoff = retention_cutoff(hourly_days, now)
+    counts = {
+        f"weatherdata {label}": count
+        for label, count in compact_weather(hourly_cutoff, batch_days, dry_run, progress).items()
+    }
+
+    # 0 keeps daily aggregates and rollups for good
+    # Weather store rows hold a whole UTC day, so only days ending by the cutoff go
+    store_cutoff = retention_cutoff(store_days, now) - timedelta(days=1)
+    purges = [(ObservationDay.objects.filter(day__lte=store_cutoff), "hourly observations")]
+    if daily_days:
+        daily_cutoff = retention_cutoff(daily_days, now).date()
+        purges += [
+            (DailyWeather.objects.filter(date__lt=daily_cutoff), "daily weather"),
+            (DailyRollup.objects.filter(day__lt=daily_cutoff), "daily rollups"),
+        ]
+    for queryset, label in purges:
+        counts[label] = queryset.count() if dry_run else queryset.delete()[0]
+    # After the purges, so their emptied locations go too (a dry run cannot see those)
+    locations = orphaned_locations()
+    counts["stored locations"] = locations.count() if dry_run else locations.delete()[0]
+
+    if connection.vendor == "postgresql" and partitions.is_partitioned() and not dry_run:
+        counts["partitions dropped"] = len(partitions.drop_partitions_before(hourly_cutoff))
+        counts["partitions created"] = len(partitions.ensure_partitions(settings.WEATHER_PARTITION_MONTHS_AHEAD, now))
+    return counts
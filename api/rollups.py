@@ -0,0 +1,187 @@
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import weather_store
+from .analytics import compute_analytics, costs_by_provider, day_labels
+from .metrics import count_cache, timed
+from .models import DailyRollup
+from .rules import current_rules
+
+# Daily analytics per grid cell and variable (working hours, min/max/mean,
+# kWh and provider costs), kept up to date as hourly data is ingested so
+# summaries of already covered days are read instead of recomputed.
+
+def _local_midnight(day):
+    return datetime.combine(day, time.min, tzinfo=weather_store.LOCAL_TIMEZONE)
+
+
+def _stat(values, reducer):
+    if np.isnan(values).all():
+        return None
+    return round(float(reducer(values)), 2)
+
+
+def build_rollups(cell, variables, start, matrix, rules, now=None):
+    """Return unsaved DailyRollup rows for a (variables, hours) matrix from local midnight `start`."""
+    now = now or timezone.now()
+    matrix = np.asarray(matrix, dtype=np.float64)
+    analytics = compute_analytics(
+        variables, matrix, rules.moderate_values, rules.providers, rules.consumption_per_hour, start=start,
+    )
+    day_index, _ = day_labels(start, matrix.shape[-1])
+
+    rollups = []
+    for idx, variable in enumerate(variables):
+        has_rule = analytics.moderate_values[idx] is not None
+        for position, label in enumerate(analytics.days):
+            values = matrix[idx, day_index == position]
+            rollups.append(DailyRollup(
+                cell_latitude=cell[0],
+                cell_longitude=cell[1],
+                variable=variable,
+                day=date.fromisoformat(label),
+                hours=len(values),
+                working_hours=int(analytics.daily_working_hours[idx, position]) if has_rule else None,
+                min_value=_stat(values, np.nanmin),
+                max_value=_stat(values, np.nanmax),
+                mean_value=_stat(values, np.nanmean),
+                total_kwh=round(float(analytics.daily_kwh[idx, position]), 2) if has_rule else None,
+                costs=costs_by_provider(analytics.providers, analytics.daily_costs[idx, position]) if has_rule else {},
+                rules_version=rules.version,
+                updated_at=now,
+            ))
+    return rollups
+
+
+def save_rollups(rollups):
+    with timed("db_write"), transaction.atomic():
+        DailyRollup.objects.bulk_create(
+            rollups,
+            batch_size=weather_store.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["cell_latitude", "cell_longitude", "variable", "day"],
+            update_fields=[
+                "hours", "working_hours", "min_value", "max_value", "mean_value",
+                "total_kwh", "costs", "rules_version", "updated_at",
+            ],
+        )
+
+
+def update_rollups(latitude, longitude, start, interval, variables, changed=None):
+    """Refresh the rollups of ingested hourly arrays; called by ingest_weather.
+
+    `variables` maps names to arrays starting at `start`. With `changed`, a
+    set of epoch seconds, only the days holding one of them are rewritten.
+    Series that do not start at local midnight are skipped.
+    """
+    if interval != weather_store.INTERVAL or not variables:
+        return 0
+    if datetime.fromtimestamp(start, tz=weather_store.LOCAL_TIMEZONE).time() != time.min:
+        return 0
+
+    names = list(variables)
+    matrix = np.vstack([np.asarray(variables[name], dtype=np.float64) for name in names])
+    rollups = build_rollups(weather_store.grid_cell(latitude, longitude), names, start, matrix, current_rules())
+    if changed is not None:
+        day_index, labels = day_labels(start, matrix.shape[-1])
+        days = {date.fromisoformat(labels[day_index[(second - start) // interval]]) for second in changed}
+        rollups = [rollup for rollup in rollups if rollup.day in days]
+
+    if rollups:
+        save_rollups(rollups)
+    return len(rollups)
+
+
+def stored_rollups(cell, variables, days, rules, now=None):
+    """Return {(variable, day): DailyRollup} when every day is covered and fresh, else None.
+
+    `days` maps each local date to the hours the request covers of it (23
+    to 25 for a whole day); a rollup covers it when it holds as many. It is
+    fresh when it was built with the current rules and either after its day
+    ended or within WEATHER_FORECAST_TTL.
+    """
+    if rules.version is None:
+        return None
+    now = now or timezone.now()
+    stale_before = now - timedelta(seconds=settings.WEATHER_FORECAST_TTL)
+
+    with timed("db_read"):
+        rows = DailyRollup.objects.filter(
+            cell_latitude=cell[0],
+            cell_longitude=cell[1],
+            variable__in=variables,
+            day__in=list(days),
+            rules_version=rules.version,
+        )
+        found = {
+            (rollup.variable, rollup.day): rollup
+            for rollup in rows
+            if rollup.hours == days[rollup.day] and (
+                rollup.updated_at >= stale_before or rollup.updated_at >= _local_midnight(rollup.day + timedelta(days=1))
+            )
+        }
+    covered = len(found) == len(variables) * len(days)
+    count_cache("daily_rollup", covered)
+    return found if covered else None
+
+
+def summary_data(rollups, variables, days, rules, source):
+    """Build the analytics summary payload from {(variable, day): DailyRollup}."""
+    summary = {}
+    for variable in variables:
+        moderate_value = rules.moderate_values.get(variable)
+        daily = [rollups[variable, day] for day in days]
+        report = {"moderate_value": moderate_value}
+        if moderate_value is None:
+            report.update({"working_hours": None, "total_kwh": None, "electricity_total_rate_per_brand": {}})
+        else:
+            total_kwh = sum(rollup.total_kwh for rollup in daily)
+            report.update({
+                "working_hours": sum(rollup.working_hours for rollup in daily),
+                "total_kwh": round(total_kwh, 2),
+                "electricity_total_rate_per_brand": {
+                    provider: round(total_kwh * rate, 2) for provider, rate in rules.providers.items()
+                },
+            })
+        report["daily"] = [
+            {
+                "date": rollup.day.isoformat(),
+                "working_hours": rollup.working_hours,
+                "total_kwh": rollup.total_kwh,
+                "electricity_total_rate_per_brand": rollup.costs,
+                "min": rollup.min_value,
+                "max": rollup.max_value,
+                "mean": rollup.mean_value,
+            }
+            for rollup in daily
+        ]
+        summary[variable] = report
+
+    return {"data": {"source": source, "days": [day.isoformat() for day in days], "variables": summary}}
+
+
+def analytics_summary(latitude, longitude, variables, start, end, rules, now=None):
+    """Daily analytics for a location, from the rollups when they cover the window.
+
+    Otherwise the hours are loaded (or fetched) and the rollups rebuilt, so
+    the next summary of these days is a single read.
+    """
+    now = now or timezone.now()
+    cell = weather_store.grid_cell(latitude, longitude)
+    day_index, labels = day_labels(start, (end - start) // weather_store.INTERVAL)
+    days = dict(zip(map(date.fromisoformat, labels), np.bincount(day_index, minlength=len(labels)).tolist()))
+
+    rollups = stored_rollups(cell, variables, days, rules, now)
+    if rollups is not None:
+        return summary_data(rollups, variables, days, rules, "rollup")
+
+    hourly = weather_store.get_hourly(latitude, longitude, variables, start, end, now)
+    built = build_rollups(cell, variables, hourly.start, np.vstack([hourly.values[variable] for variable in variables]), rules, now)
+    if rules.version is not None:
+        # Per-request overrides are never stored
+        save_rollups(built)
+    return summary_data({(rollup.variable, rollup.day): rollup for rollup in built}, variables, days, rules, "computed")
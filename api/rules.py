@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .analytics import AVERAGE_CONSUMPTION_PER_HOUR, ELECTRICITY_PROVIDERS, MODERATE_VALUES, RANGES
+from .models import AnalyticsConfig, AnalyticsRule, ElectricityTariff
+
+# Analytics rules (moderate values and their allowed ranges) and provider
+# tariffs, edited in the admin and cached in-process. Any change bumps
+# AnalyticsConfig.version; each process reloads when it sees a new version,
+# checking at most every ANALYTICS_RULES_CHECK_INTERVAL seconds.
+
+
+class Rules(namedtuple("Rules", ["version", "moderate_values", "ranges", "providers", "consumption_per_hour"])):
+    """One consistent snapshot of the analytics rules; its mappings are read-only."""
+
+    def with_overrides(self, overrides):
+        """Return these rules with per-request moderate values.
+
+        Raises ValueError unless every override is a number inside the
+        variable's range. The result has no version, so it is never stored
+        in or served from the daily rollups.
+        """
+        if not overrides:
+            return self
+        if not isinstance(overrides, dict):
+            raise ValueError("moderate_values must be an object of variable: value")
+
+        moderate_values = dict(self.moderate_values)
+        errors = []
+        for variable, value in overrides.items():
+            if variable not in self.ranges:
+                errors.append(f"{variable} has no moderate value")
+                continue
+            low, high = self.ranges[variable]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+                errors.append(f"{variable} must be between {low:g} and {high:g}")
+                continue
+            moderate_values[variable] = value
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        return self._replace(version=None, moderate_values=MappingProxyType(moderate_values))
+
+
+# Used before the rules are seeded and by code that runs without a database
+DEFAULT_RULES = Rules(
+    0,
+    MappingProxyType(dict(MODERATE_VALUES)),
+    MappingProxyType(dict(RANGES)),
+    MappingProxyType(dict(ELECTRICITY_PROVIDERS)),
+    AVERAGE_CONSUMPTION_PER_HOUR,
+)
+
+
+def _number(value):
+    # FloatField gives 14.0; report whole numbers as the constants did (14)
+    return int(value) if value.is_integer() else value
+
+
+def load_rules():
+    config = AnalyticsConfig.objects.first()
+    if config is None:
+        return DEFAULT_RULES
+
+    rules = list(AnalyticsRule.objects.order_by("id").values_list("variable", "moderate_value", "min_value", "max_value"))
+    providers = dict(ElectricityTariff.objects.order_by("id").values_list("provider", "rate_per_kwh"))
+    return Rules(
+        config.version,
+        MappingProxyType({variable: _number(moderate_value) for variable, moderate_value, _, _ in rules}),
+        MappingProxyType({variable: (low, high) for variable, _, low, high in rules}),
+        MappingProxyType(providers),
+        config.consumption_per_hour,
+    )
+
+
+class RulesCache:
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self._rules = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._rules is not None and time.monotonic() - self._checked < self.check_interval:
+            return self._rules
+
+        with self._lock:
+            if self._rules is None or time.monotonic() - self._checked >= self.check_interval:
+                version = AnalyticsConfig.objects.values_list("version", flat=True).first()
+                if self._rules is None or version != self._rules.version:
+                    self._rules = load_rules()
+                self._checked = time.monotonic()
+        return self._rules
+
+    def clear(self):
+        with self._lock:
+            self._rules = None
+
+
+rules_cache = RulesCache(settings.ANALYTICS_RULES_CHECK_INTERVAL)
+
+
+def current_rules():
+    """Return the cached Rules, reloading them after a change."""
+    return rules_cache.get()
+
+
+@receiver([post_save, post_delete], sender=AnalyticsConfig)
+@receiver([post_save, post_delete], sender=AnalyticsRule)
+@receiver([post_save, post_delete], sender=ElectricityTariff)
+def bump_rules_version(sender, **kwargs):
+    # update() sends no signals, so this does not trigger itself
+    AnalyticsConfig.objects.update(version=F("version") + 1)
+    rules_cache.clear()
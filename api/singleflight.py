@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+# Request coalescing for upstream calls. When a popular entry expires, the
+# concurrent requests that all miss it share one Open-Meteo/Google call
+# instead of each making their own.
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers share its result.
+
+    The first caller for a key runs the function and callers arriving while
+    it is in flight wait for its result (or exception). A caller that has
+    waited SINGLE_FLIGHT_LOCK_TIMEOUT seconds, or whose leader was cancelled,
+    runs the function itself. With SINGLE_FLIGHT_CACHE_ALIAS set, a lock in
+    that cache extends this to other worker processes: their callers wait
+    for the lock to be released and then try `recheck` (a read of what the
+    other worker stored) before running the function themselves. `recheck`
+    returns None on a miss.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        # asyncio futures belong to one event loop
+        self._async_calls = weakref.WeakKeyDictionary()
+
+    def do(self, key, fn, *args, recheck=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+                if call.error is not None:
+                    raise call.error
+                if call.ok:
+                    return call.result
+            # Too slow, or interrupted without a result: fetch without the leader
+            return fn(*args)
+
+        try:
+            call.result = self._run(key, fn, args, recheck)
+            call.ok = True
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args, recheck=None):
+        """do() for coroutine functions; `recheck` is a regular function."""
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        future = calls.get(key)
+        if future is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Only the leader's cancellation is not ours to propagate
+                if not future.cancelled():
+                    raise
+            return await fn(*args)
+
+        future = calls[key] = loop.create_future()
+        # Nobody may be waiting; don't warn about an unretrieved exception
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        try:
+            result = await self._run_async(key, fn, args, recheck)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del calls[key]
+
+    def _cache(self):
+        alias = settings.SINGLE_FLIGHT_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def _lock_name(self, key):
+        return "singleflight:" + hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _run(self, key, fn, args, recheck):
+        cache = self._cache()
+        if cache is None:
+            return fn(*args)
+
+        name = self._lock_name(key)
+        timeout = settings.SINGLE_FLIGHT_LOCK_TIMEOUT
+        if cache.add(name, 1, timeout=timeout):
+            try:
+                return fn(*args)
+            finally:
+                cache.delete(name)
+
+        deadline = time.monotonic() + timeout
+        while cache.get(name) is not None and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+        result = recheck() if recheck is not None else None
+        return fn(*args) if result is None else result
+
+    async def _run_async(self, key, fn, args, recheck):
+        cache = self._cache()
+        if cache is None:
+            return await fn(*args)
+
+        name = self._lock_name(key)
+        timeout = settings.SINGLE_FLIGHT_LOCK_TIMEOUT
+        if await cache.aadd(name, 1, timeout=timeout):
+            try:
+                return await fn(*args)
+            finally:
+                await cache.adelete(name)
+
+        deadline = time.monotonic() + timeout
+        while await cache.aget(name) is not None and time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+        result = await sync_to_async(recheck)() if recheck is not None else None
+        return await fn(*args) if result is None else result
+
+
+flights = SingleFlight()
@@ -0,0 +1,143 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import StoredLocation
+
+# Coordinate snapping and a nearest-neighbour index over the locations that
+# have stored weather (the StoredLocation table kept by ingest_weather, which
+# outlives the compacted hours). Points are kept in buckets of
+# BUCKET_DEGREES, so a radius query only measures the points of the few
+# buckets it overlaps.
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def snap(latitude, longitude, size):
+    """Snap a coordinate to the centre of its `size`-degree grid cell."""
+    return (
+        round(round(float(latitude) / size) * size, 4),
+        round(round(float(longitude) / size) * size, 4),
+    )
+
+
+def distance_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distance from one point to arrays of points (haversine)."""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+class LocationIndex:
+    """Stored weather coordinates, bucketed for radius and nearest lookups.
+
+    The first lookup loads the index. After that it is reloaded on a
+    background thread every `refresh_interval` seconds (picking up other
+    processes' locations) while lookups keep using the current one;
+    ingest_weather adds this process's new coordinates in between.
+    """
+
+    BUCKET_DEGREES = 0.1
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._buckets = None
+        self._built = 0
+        # Points added while a reload runs, which its snapshot may miss
+        self._added = None
+        self._lock = threading.Lock()
+
+    def _bucket(self, latitude, longitude):
+        return math.floor(latitude / self.BUCKET_DEGREES), math.floor(longitude / self.BUCKET_DEGREES)
+
+    def _load(self):
+        buckets = defaultdict(set)
+        for latitude, longitude in StoredLocation.objects.values_list("latitude", "longitude"):
+            buckets[self._bucket(latitude, longitude)].add((latitude, longitude))
+        return buckets
+
+    def _reload(self):
+        try:
+            buckets = self._load()
+        except Exception as e:
+            logger.warning("Reloading the location index failed: %s", e)
+            buckets = None
+        finally:
+            connection.close()
+        with self._lock:
+            if buckets is not None:
+                for latitude, longitude in self._added:
+                    buckets[self._bucket(latitude, longitude)].add((latitude, longitude))
+                self._buckets = buckets
+            self._built = time.monotonic()
+            self._added = None
+
+    def _get(self):
+        if self._buckets is None:
+            with self._lock:
+                if self._buckets is None:
+                    self._buckets = self._load()
+                    self._built = time.monotonic()
+        elif self._added is None and time.monotonic() - self._built >= self.refresh_interval:
+            with self._lock:
+                if self._added is None and time.monotonic() - self._built >= self.refresh_interval:
+                    self._added = []
+                    threading.Thread(target=self._reload, name="location-index", daemon=True).start()
+        return self._buckets
+
+    def add(self, latitude, longitude):
+        # Until the first lookup there is nothing to keep in sync
+        with self._lock:
+            if self._buckets is not None:
+                self._buckets[self._bucket(latitude, longitude)].add((latitude, longitude))
+            if self._added is not None:
+                self._added.append((latitude, longitude))
+
+    def clear(self):
+        with self._lock:
+            self._buckets = None
+
+    def within(self, latitude, longitude, radius_km):
+        """Return [(distance_km, latitude, longitude)] of stored points within `radius_km`, nearest first."""
+        buckets = self._get()
+        lat_span = radius_km / KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles
+        lon_span = min(radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6)), 180)
+        low_lat, low_lon = self._bucket(latitude - lat_span, longitude - lon_span)
+        high_lat, high_lon = self._bucket(latitude + lat_span, longitude + lon_span)
+
+        points = [
+            point
+            for row in range(low_lat, high_lat + 1)
+            for column in range(low_lon, high_lon + 1)
+            for point in tuple(buckets.get((row, column), ()))
+        ]
+        if not points:
+            return []
+
+        coordinates = np.array(points, dtype=np.float64)
+        distances = distance_km(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+        order = np.argsort(distances, kind="stable")
+        return [
+            (round(float(distances[idx]), 3), *points[idx])
+            for idx in order
+            if distances[idx] <= radius_km
+        ]
+
+    def nearest(self, latitude, longitude, max_km):
+        """Return the (distance_km, latitude, longitude) of the closest stored point, or None."""
+        found = self.within(latitude, longitude, max_km)
+        return found[0] if found else None
+
+
+location_index = LocationIndex(settings.SPATIAL_INDEX_REFRESH_INTERVAL)
@@ -0,0 +1,15 @@
+# Shared fixtures for the api test modules
+
+import numpy as np
+
+from ..weather_store import INTERVAL, _CellState
+
+EIRCODE = "D02X285"
+LATITUDE, LONGITUDE = 53.34, -6.26
+
+
+def hour_values(fetch, client=None):
+    """Stand-in for weather_store.request_window: every value is its hour's epoch hour number."""
+    hours = np.arange(fetch.start // INTERVAL, fetch.end // INTERVAL, dtype=np.float32)
+    values = np.tile(hours, (len(fetch.variables), 1))
+    return {cell: _CellState(cell, values.copy(), np.ones(values.shape, dtype=bool)) for cell in fetch.cells}
@@ -0,0 +1,45 @@
+import numpy as np
+from django.test import TestCase
+
+from ..analytics import AVERAGE_CONSUMPTION_PER_HOUR, ELECTRICITY_PROVIDERS, MODERATE_VALUES, compute_analytics
+from ..ingestion import WEATHER_VARIABLES
+
+
+def baseline_analytics(variables, matrix):
+    # The per-hour loop AnalyticsView ran before compute_analytics
+    report = {}
+    for variable, variable_values in zip(variables, matrix):
+        moderate_value = MODERATE_VALUES.get(variable, None)
+        working_hours = 0
+        electricity_total_rate_per_brand = {}
+        if moderate_value is not None:
+            for values in variable_values:
+                if values < moderate_value:
+                    working_hours += 1
+        else:
+            working_hours = None
+        if working_hours is not None:
+            total_kwh = working_hours * AVERAGE_CONSUMPTION_PER_HOUR
+            for provider, value in ELECTRICITY_PROVIDERS.items():
+                electricity_total_rate_per_brand[provider] = round((total_kwh * value), 2)
+        report[variable] = {
+            "moderate_value": moderate_value,
+            "working_hours": working_hours,
+            "electricity_total_rate_per_brand": electricity_total_rate_per_brand,
+        }
+    return report
+
+
+class ComputeAnalyticsTests(TestCase):
+
+    def test_matches_the_per_hour_loop(self):
+        variables = [*WEATHER_VARIABLES, "precipitation"]
+        matrix = np.random.default_rng(7).uniform(-10, 120, size=(len(variables), 16 * 24))
+        matrix[0, ::5] = np.nan
+
+        analytics = compute_analytics(variables, matrix)
+
+        expected = baseline_analytics(variables, matrix)
+        for idx, variable in enumerate(variables):
+            with self.subTest(variable=variable):
+                self.assertEqual(analytics.variable_report(idx), expected[variable])
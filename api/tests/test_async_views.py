@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+from django.utils import timezone
+
+from .. import weather_store
+from ..async_views import (
+    AsyncAnalyticsView, AsyncBatchAnalyticsView, AsyncCoordinatesReturnView, AsyncEircodeWeatherView,
+    AsyncExportView, AsyncHistoryView,
+)
+from ..geocoding import memory_cache
+from ..ingestion import WEATHER_VARIABLES
+from ..models import GeocodedEircode, WeatherData
+from .helpers import EIRCODE, LATITUDE, LONGITUDE, hour_values
+
+# The async views under the URL names of api/urls.py, which picks one set at import time
+urlpatterns = [
+    path('coordinates/', AsyncCoordinatesReturnView.as_view(), name='eircode'),
+    path('analytics/', AsyncAnalyticsView.as_view(), name='analytics'),
+    path('analytics/batch/', AsyncBatchAnalyticsView.as_view(), name='analytics_batch'),
+    path('eircode_weather/', AsyncEircodeWeatherView.as_view(), name='eircode_weather'),
+    path('history/', AsyncHistoryView.as_view(), name='weather_history'),
+    path('export/', AsyncExportView.as_view(), name='weather_export'),
+]
+
+VARIABLES = ["temperature_2m", "cloud_cover"]
+
+
+async def _window(fetch, now):
+    return hour_values(fetch)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TestCase):
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        memory_cache.clear()
+        GeocodedEircode.objects.create(
+            eircode=EIRCODE, latitude=LATITUDE, longitude=LONGITUDE, status="OK", fetched_at=timezone.now()
+        )
+        patcher = mock.patch.object(weather_store, "_fetch_window_async", side_effect=_window)
+        self.fetch_window = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, name, data):
+        return self.async_client.post(reverse(name), data, content_type="application/json")
+
+    async def test_coordinates(self):
+        response = await self.async_client.get(reverse("eircode"), {"eircode": "d02 x285"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"coordinates": {"latitude": LATITUDE, "longitude": LONGITUDE}})
+
+        response = await self.async_client.get(reverse("eircode"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error message": "Eircode is required"})
+
+    async def test_analytics(self):
+        response = await self.post("analytics", {
+            "latitude": LATITUDE, "longitude": LONGITUDE, "hourly": VARIABLES, "forecast_days": 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(len(data["date"]), 24)
+        self.assertEqual(list(data["variables"]), VARIABLES)
+
+        response = await self.post("analytics", {"latitude": LATITUDE, "longitude": LONGITUDE})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"message": "Check the parameters send"})
+
+    async def test_batch_analytics(self):
+        response = await self.post("analytics_batch", {
+            "locations": [{"eircode": EIRCODE}, {"latitude": LATITUDE, "longitude": LONGITUDE}],
+            "hourly": VARIABLES,
+            "forecast_days": 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        locations = response.json()["data"]["locations"]
+        self.assertEqual([location["latitude"] for location in locations], [LATITUDE, LATITUDE])
+        # Both locations are in the same grid cell
+        self.assertEqual(self.fetch_window.call_count, 1)
+
+        response = await self.post("analytics_batch", {
+            "locations": [{"latitude": LATITUDE}], "hourly": VARIABLES, "forecast_days": 1,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error message": "Each location needs an eircode or a latitude and longitude"})
+
+    async def test_eircode_weather(self):
+        response = await self.async_client.get(reverse("eircode_weather"), {"eircode": EIRCODE})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"message": "Weather data retrieved and saved successfully."})
+        self.assertTrue(await WeatherData.objects.filter(eircode=EIRCODE).aexists())
+
+    async def test_history(self):
+        response = await self.async_client.get(reverse("weather_history"), {"eircode": EIRCODE})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("data", response.json())
+
+        response = await self.async_client.get(reverse("weather_history"), {"eircode": EIRCODE, "bucket": "year"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_export(self):
+        await self.async_client.get(reverse("eircode_weather"), {"eircode": EIRCODE})
+        start = timezone.now().date().isoformat()
+        response = await self.async_client.get(
+            reverse("weather_export"), {"eircode": EIRCODE, "start": start, "end": start, "output": "csv"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="weather_stored.csv"')
+
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(["eircode", "latitude", "longitude", "date", *WEATHER_VARIABLES]))
+        self.assertEqual(len(lines), 1 + 24)
+        self.assertTrue(all(line.startswith(EIRCODE + ",") for line in lines[1:]))
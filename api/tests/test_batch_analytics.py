@@ -0,0 +1,95 @@
+from unittest import mock
+
+import numpy as np
+import requests
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+
+from .. import weather_store
+from ..geocoding import GeocodeError
+from ..views import BatchAnalyticsView
+from ..weather_store import INTERVAL, grid_cell
+from .helpers import EIRCODE, LATITUDE, LONGITUDE, hour_values
+
+# The sync view under its api/urls.py name; test_async_views covers AsyncBatchAnalyticsView
+urlpatterns = [
+    path('analytics/batch/', BatchAnalyticsView.as_view(), name='analytics_batch'),
+]
+
+NOT_FOUND = "X00XXXX"
+UNREACHABLE = "V94T9PX"
+ELSEWHERE = (52.0, -8.5)
+VARIABLES = ["temperature_2m", "cloud_cover"]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class BatchAnalyticsTests(TestCase):
+
+    def setUp(self):
+        # Geocodes run on the view's thread pool, whose connections cannot see the test transaction
+        geocode = mock.patch("api.views.geocode_eircode", side_effect=self._geocode)
+        window = mock.patch.object(weather_store, "request_window", side_effect=hour_values)
+        self.request_geocode = geocode.start()
+        self.request_window = window.start()
+        for patcher in (geocode, window):
+            self.addCleanup(patcher.stop)
+
+    def _geocode(self, eircode):
+        if eircode == NOT_FOUND:
+            raise GeocodeError("ZERO_RESULTS")
+        if eircode == UNREACHABLE:
+            raise requests.exceptions.ConnectionError("down")
+        return LATITUDE, LONGITUDE
+
+    def post(self, locations):
+        return self.client.post(reverse("analytics_batch"), {
+            "locations": locations, "hourly": VARIABLES, "forecast_days": 1,
+        }, content_type="application/json")
+
+    def test_mixed_batch(self):
+        locations = [
+            {"eircode": EIRCODE},
+            {"latitude": LATITUDE + 0.001, "longitude": LONGITUDE},
+            {"eircode": NOT_FOUND},
+            {"latitude": ELSEWHERE[0], "longitude": ELSEWHERE[1]},
+            {"eircode": UNREACHABLE},
+            {"eircode": EIRCODE},
+        ]
+        response = self.post(locations)
+        self.assertEqual(response.status_code, 200)
+
+        # Each distinct eircode is geocoded once
+        self.assertEqual(sorted(call.args[0] for call in self.request_geocode.call_args_list),
+                         sorted([EIRCODE, NOT_FOUND, UNREACHABLE]))
+        # The four found locations share two grid cells and one upstream call
+        self.request_window.assert_called_once()
+        fetch = self.request_window.call_args.args[0]
+        self.assertEqual(sorted(fetch.cells), sorted({grid_cell(LATITUDE, LONGITUDE), grid_cell(*ELSEWHERE)}))
+        self.assertEqual(fetch.variables, tuple(VARIABLES))
+
+        data = response.json()["data"]
+        start, end = weather_store.forecast_window(forecast_days=1)
+        self.assertEqual(len(data["date"]), (end - start) // INTERVAL)
+        expected = np.arange(start // INTERVAL, end // INTERVAL).tolist()
+
+        results = data["locations"]
+        self.assertEqual(len(results), len(locations))
+        for idx in (0, 1, 3, 5):
+            self.assertEqual(results[idx]["variables"]["temperature_2m"]["values"], expected)
+            self.assertNotIn("error message", results[idx])
+        self.assertEqual((results[0]["latitude"], results[0]["longitude"]), (LATITUDE, LONGITUDE))
+        self.assertEqual((results[3]["latitude"], results[3]["longitude"]), ELSEWHERE)
+        self.assertEqual(results[2], {"eircode": NOT_FOUND, "error message": "ZERO_RESULTS"})
+        self.assertEqual(results[4], {"eircode": UNREACHABLE, "error message": "Request failed: down"})
+
+    def test_cells_are_split_across_upstream_calls(self):
+        with mock.patch.object(weather_store, "MAX_LOCATIONS_PER_REQUEST", 1):
+            response = self.post([
+                {"latitude": LATITUDE, "longitude": LONGITUDE},
+                {"latitude": ELSEWHERE[0], "longitude": ELSEWHERE[1]},
+                {"latitude": LATITUDE, "longitude": LONGITUDE},
+            ])
+
+        self.assertEqual(response.status_code, 200)
+        cells = [call.args[0].cells for call in self.request_window.call_args_list]
+        self.assertEqual(sorted(cells), sorted([[grid_cell(LATITUDE, LONGITUDE)], [grid_cell(*ELSEWHERE)]]))
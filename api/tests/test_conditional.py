@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..geocoding import memory_cache
+from ..models import GeocodedEircode
+from .helpers import EIRCODE, LATITUDE, LONGITUDE
+
+
+class ConditionalResponseTests(TestCase):
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        memory_cache.clear()
+        GeocodedEircode.objects.create(
+            eircode=EIRCODE, latitude=LATITUDE, longitude=LONGITUDE, status="OK", fetched_at=timezone.now()
+        )
+
+    def get(self, **headers):
+        return self.client.get(reverse("eircode"), {"eircode": "d02 x285"}, headers=headers)
+
+    def test_matching_etag_gets_a_304(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"coordinates": {"latitude": LATITUDE, "longitude": LONGITUDE}})
+        etag = response["ETag"]
+
+        not_modified = self.get(if_none_match=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+        self.assertEqual(not_modified.content, b"")
+
+        self.assertEqual(self.get(if_none_match='"other"').status_code, 200)
@@ -0,0 +1,114 @@
+import csv
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import partial
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+from django.utils import timezone
+
+from .. import export, weather_store
+from ..geocoding import memory_cache
+from ..ingestion import WEATHER_VARIABLES, ingest_weather
+from ..models import GeocodedEircode
+from ..views import ExportView
+from ..weather_store import LOCAL_TIMEZONE
+from .helpers import EIRCODE, LATITUDE, LONGITUDE, hour_values
+
+# The sync view under its api/urls.py name; test_async_views covers AsyncExportView
+urlpatterns = [
+    path('export/', ExportView.as_view(), name='weather_export'),
+]
+
+OTHER_EIRCODE = "T12AB34"
+START = datetime(2026, 1, 5, tzinfo=LOCAL_TIMEZONE)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ExportViewTests(TestCase):
+
+    def setUp(self):
+        values = {variable: np.arange(48, dtype=np.float64) for variable in WEATHER_VARIABLES}
+        values["cloud_cover"][0] = np.nan
+        for eircode in (OTHER_EIRCODE, EIRCODE):
+            ingest_weather(eircode, LATITUDE, LONGITUDE, int(START.timestamp()), 3600, values)
+
+    def export(self, **params):
+        params = {"eircode": f"{EIRCODE},{OTHER_EIRCODE}", "start": "2026-01-05", "end": "2026-01-06", **params}
+        return self.client.get(reverse("weather_export"), params)
+
+    def chunks(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return [chunk.decode() for chunk in response.streaming_content]
+
+    def test_csv_is_streamed_in_chunks(self):
+        with mock.patch("api.views.chunked", partial(export.chunked, size=10)):
+            response = self.export(output="csv")
+        chunks = self.chunks(response)
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="weather_stored.csv"')
+        # Header plus 2 eircodes x 48 hours, in chunks of at most 10 lines
+        self.assertEqual(len(chunks), 10)
+        rows = list(csv.reader("".join(chunks).splitlines()))
+        self.assertEqual(rows[0], export.export_header(WEATHER_VARIABLES))
+        self.assertEqual(len(rows), 1 + 2 * 48)
+        self.assertEqual([row[0] for row in rows[1:]], [EIRCODE] * 48 + [OTHER_EIRCODE] * 48)
+        self.assertEqual(rows[1][3], START.isoformat())
+        self.assertEqual(rows[1][3 + 1 + WEATHER_VARIABLES.index("cloud_cover")], "")
+
+    def test_ndjson_rows(self):
+        response = self.export(variables="temperature_2m,cloud_cover", eircode=EIRCODE)
+        lines = "".join(self.chunks(response)).splitlines()
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(lines), 48)
+        first, last = json.loads(lines[0]), json.loads(lines[-1])
+        self.assertEqual(first, {
+            "eircode": EIRCODE, "latitude": LATITUDE, "longitude": LONGITUDE, "date": START.isoformat(),
+            "temperature_2m": 0.0, "cloud_cover": None,
+        })
+        self.assertEqual(last["date"], (START + timedelta(hours=47)).isoformat())
+
+    def test_invalid_parameters(self):
+        response = self.export(variables="snowfall")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error message": "Unknown variables: snowfall"})
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ForecastExportTests(TestCase):
+
+    def setUp(self):
+        memory_cache.clear()
+        GeocodedEircode.objects.create(
+            eircode=EIRCODE, latitude=LATITUDE, longitude=LONGITUDE, status="OK", fetched_at=timezone.now()
+        )
+        patcher = mock.patch.object(weather_store, "request_window", side_effect=hour_values)
+        self.request_window = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def export(self, forecast_days):
+        return self.client.get(reverse("weather_export"), {
+            "eircode": EIRCODE, "source": "forecast", "forecast_days": forecast_days, "variables": "temperature_2m",
+        })
+
+    def test_sixteen_days_is_the_limit(self):
+        response = self.export(17)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error message": "forecast_days must be between 0 and 16"})
+        self.request_window.assert_not_called()
+
+        response = self.export(16)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="weather_forecast.ndjson"')
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+        start, end = weather_store.forecast_window(forecast_days=16)
+        self.assertEqual(len(rows), (end - start) // weather_store.INTERVAL)
+        self.assertEqual(rows[0]["date"], datetime.fromtimestamp(start, tz=dt_timezone.utc).isoformat())
+        self.assertEqual(rows[0]["temperature_2m"], start // weather_store.INTERVAL)
+        self.request_window.assert_called_once()
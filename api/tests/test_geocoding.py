@@ -0,0 +1,52 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from ..geocoding import GeocodeError, geocode_eircode, memory_cache
+from ..models import GeocodedEircode
+
+
+class GeocodeCacheTests(TestCase):
+
+    def setUp(self):
+        memory_cache.clear()
+        patcher = mock.patch("api.geocoding.request_geocode", return_value=("ZERO_RESULTS", None, None))
+        self.request_geocode = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def geocode(self):
+        with self.assertRaises(GeocodeError) as raised:
+            geocode_eircode("a65 f4e2")
+        self.assertEqual(raised.exception.status, "ZERO_RESULTS")
+
+    def test_not_found_is_cached(self):
+        self.geocode()
+        self.geocode()
+        memory_cache.clear()
+        self.geocode()
+
+        self.request_geocode.assert_called_once_with("A65F4E2")
+        self.assertEqual(GeocodedEircode.objects.get(eircode="A65F4E2").status, "ZERO_RESULTS")
+
+    def test_expired_entry_is_requested_again(self):
+        self.geocode()
+        memory_cache.clear()
+        GeocodedEircode.objects.update(
+            fetched_at=timezone.now() - timedelta(seconds=settings.GEOCODE_NEGATIVE_TTL + 1)
+        )
+        self.geocode()
+
+        self.assertEqual(self.request_geocode.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        self.request_geocode.return_value = ("OVER_QUERY_LIMIT", None, None)
+        with self.assertRaises(GeocodeError):
+            geocode_eircode("A65F4E2")
+        with self.assertRaises(GeocodeError):
+            geocode_eircode("A65F4E2")
+
+        self.assertEqual(self.request_geocode.call_count, 2)
+        self.assertFalse(GeocodedEircode.objects.exists())
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+import numpy as np
+from django.test import TestCase
+
+from ..ingestion import WEATHER_VARIABLES, ingest_weather
+from ..models import StoredLocation, WeatherData
+from ..weather_store import LOCAL_TIMEZONE
+from .helpers import EIRCODE, LATITUDE, LONGITUDE
+
+
+class IngestWeatherTests(TestCase):
+    START = int(datetime(2026, 1, 5, tzinfo=LOCAL_TIMEZONE).timestamp())
+
+    def values(self, offset):
+        return {variable: np.arange(48, dtype=np.float64) + offset for variable in WEATHER_VARIABLES}
+
+    def test_ingesting_twice_upserts(self):
+        self.assertEqual(ingest_weather(EIRCODE, LATITUDE, LONGITUDE, self.START, 3600, self.values(0)), 48)
+        # Unchanged hours are skipped
+        self.assertEqual(ingest_weather(EIRCODE, LATITUDE, LONGITUDE, self.START, 3600, self.values(0)), 0)
+        self.assertEqual(WeatherData.objects.count(), 48)
+
+        # Revised hours are updated in place
+        self.assertEqual(ingest_weather(EIRCODE, LATITUDE, LONGITUDE, self.START, 3600, self.values(0.5)), 48)
+        self.assertEqual(WeatherData.objects.count(), 48)
+        first = WeatherData.objects.order_by("date").first()
+        self.assertEqual(first.temperature_2m, 0.5)
+        self.assertEqual(first.date.timestamp(), self.START)
+        self.assertEqual(list(StoredLocation.objects.values_list("latitude", "longitude")), [(LATITUDE, LONGITUDE)])
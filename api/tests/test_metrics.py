@@ -0,0 +1,30 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..geocoding import memory_cache
+from ..metrics import timed
+from .helpers import EIRCODE, LATITUDE, LONGITUDE
+
+
+class MetricsTests(TestCase):
+
+    def test_metrics_are_limited_to_allowed_addresses(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.9").status_code, 403)
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_batch_geocoding_reaches_server_timing(self):
+        def request_geocode(eircode):
+            with timed("geocode"):
+                return "OK", LATITUDE, LONGITUDE
+
+        memory_cache.clear()
+        with mock.patch("api.geocoding.request_geocode", side_effect=request_geocode), \
+                mock.patch("api.weather_store.get_hourly_many", side_effect=RuntimeError("offline")):
+            response = self.client.post(reverse("analytics_batch"), {
+                "locations": [{"eircode": EIRCODE}], "hourly": ["temperature_2m"], "forecast_days": 1,
+            }, content_type="application/json")
+
+        self.assertIn("geocode;dur=", response["Server-Timing"])
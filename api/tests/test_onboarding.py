@@ -0,0 +1,98 @@
+import os
+import tempfile
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+from .. import onboarding, weather_store
+from ..geocoding import memory_cache
+from ..models import WeatherData
+from ..onboarding import Checkpoint, bulk_ingest
+from ..weather_store import INTERVAL, grid_cell
+from .helpers import hour_values
+
+# Eircodes Google finds, each in its own grid cell
+LOCATED = {"A65F4E2": (53.0, -6.0), "D02X285": (53.5, -6.5), "T12AB34": (52.0, -8.5)}
+NOT_FOUND = "X00XXXX"
+# Found once Google can be reached
+UNREACHABLE = "V94T9PX"
+COORDINATES = {**LOCATED, UNREACHABLE: (54.0, -8.5)}
+
+
+class BulkIngestTests(TestCase):
+
+    def setUp(self):
+        memory_cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "checkpoint.json")
+        self.unreachable = {UNREACHABLE}
+        self.failing_cell = grid_cell(*LOCATED["T12AB34"])
+
+        geocode = mock.patch.object(onboarding, "request_geocode", side_effect=self._geocode)
+        window = mock.patch.object(weather_store, "request_window", side_effect=self._window)
+        # One location per batch: geocodes finish in any order, so larger batches would vary between runs
+        batch_size = mock.patch.object(weather_store, "MAX_LOCATIONS_PER_REQUEST", 1)
+        self.request_geocode = geocode.start()
+        self.request_window = window.start()
+        batch_size.start()
+        for patcher in (geocode, window, batch_size):
+            self.addCleanup(patcher.stop)
+
+    def _geocode(self, eircode):
+        if eircode in self.unreachable:
+            raise requests.exceptions.ConnectionError("unreachable")
+        if eircode == NOT_FOUND:
+            return "ZERO_RESULTS", None, None
+        return ("OK", *COORDINATES[eircode])
+
+    def _window(self, fetch):
+        if self.failing_cell in fetch.cells:
+            raise requests.exceptions.HTTPError("503 Server Error")
+        return hour_values(fetch)
+
+    def ingest(self):
+        eircodes = [*LOCATED, NOT_FOUND, UNREACHABLE]
+        return bulk_ingest(eircodes, Checkpoint(self.path), workers=1, geocode_rate=0, weather_rate=0,
+                           past_days=0, forecast_days=1)
+
+    def failing_ingest(self):
+        with self.assertLogs("api.onboarding", "WARNING"):
+            return self.ingest()
+
+    def test_counts_and_checkpoint(self):
+        counts = self.failing_ingest()
+
+        start, end = weather_store.forecast_window(forecast_days=1)
+        hours = (end - start) // INTERVAL
+        self.assertEqual(counts, {"skipped": 0, "stored": 2, "not found": 1, "failed": 2, "rows": 2 * hours})
+        self.assertEqual(WeatherData.objects.count(), 2 * hours)
+
+        checkpoint = Checkpoint(self.path)
+        self.assertEqual(checkpoint.done, {"A65F4E2": "OK", "D02X285": "OK", NOT_FOUND: "ZERO_RESULTS"})
+        self.assertEqual(checkpoint.failed, {
+            "T12AB34": "weather: 503 Server Error", UNREACHABLE: "geocode: unreachable",
+        })
+
+    def test_resume_after_a_failed_batch(self):
+        self.failing_ingest()
+        self.unreachable.clear()
+        self.failing_cell = None
+        self.request_geocode.reset_mock()
+        self.request_window.reset_mock()
+
+        counts = self.ingest()
+
+        start, end = weather_store.forecast_window(forecast_days=1)
+        hours = (end - start) // INTERVAL
+        self.assertEqual(counts, {"skipped": 3, "stored": 2, "not found": 0, "failed": 0, "rows": 2 * hours})
+        # Only the failed eircodes are retried; T12AB34's geocode was cached by the first run
+        self.request_geocode.assert_called_once_with(UNREACHABLE)
+        requested = {cell for call in self.request_window.call_args_list for cell in call.args[0].cells}
+        self.assertEqual(requested, {grid_cell(*COORDINATES[eircode]) for eircode in ("T12AB34", UNREACHABLE)})
+        self.assertEqual(set(WeatherData.objects.values_list("eircode", flat=True).distinct()), set(COORDINATES))
+
+        checkpoint = Checkpoint(self.path)
+        self.assertEqual(checkpoint.failed, {})
+        self.assertEqual(set(checkpoint.done), {*COORDINATES, NOT_FOUND})
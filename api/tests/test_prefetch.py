@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+
+from ..models import LocationHit
+from ..prefetch import HitCounter
+from .helpers import EIRCODE, LATITUDE, LONGITUDE
+
+KEY = (LATITUDE, LONGITUDE, EIRCODE)
+
+
+class HitCounterTests(TestCase):
+
+    def test_hits_are_written_once_the_interval_elapses(self):
+        counter = HitCounter(0)
+        counter.add([KEY, KEY])
+
+        self.assertEqual(LocationHit.objects.get().hits, 2)
+
+    def test_failed_write_is_logged_and_retried(self):
+        counter = HitCounter(0)
+        with mock.patch.object(counter, "_write", side_effect=DatabaseError("no such table")), \
+                self.assertLogs("api.prefetch", "WARNING"):
+            counter.add([KEY])
+
+        counter.add([KEY])
+        self.assertEqual(LocationHit.objects.get().hits, 2)
+
+    def test_no_timer_without_background(self):
+        counter = HitCounter(60)
+        counter.add([KEY])
+
+        self.assertIsNone(counter._timer)
+        self.assertFalse(LocationHit.objects.exists())
+
+    def test_background_timer_writes_idle_hits(self):
+        counter = HitCounter(60, background=True)
+        counter.add([KEY])
+        self.addCleanup(counter._timer.cancel)
+
+        # Run the timer's flush here: its own thread would not see the test transaction
+        with mock.patch("api.prefetch.connection"):
+            counter._timer.function()
+        self.assertEqual(LocationHit.objects.get().hits, 1)
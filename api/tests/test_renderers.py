@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..async_views import AsyncAPIView
+from ..renderers import ColumnarJSONRenderer, TimedJSONRenderer
+
+MISSING_HOUR = {"values": [1.5, float("nan")], "average": np.float32("nan")}
+
+
+class NaNRenderingTests(SimpleTestCase):
+
+    def test_json_renderer_writes_null(self):
+        self.assertEqual(TimedJSONRenderer().render(MISSING_HOUR), b'{"values":[1.5,null],"average":null}')
+
+    def test_columnar_renderer_writes_null(self):
+        data = {"values": np.array([1.5, np.nan], dtype=np.float32), "strided": np.arange(4.0)[::2]}
+        self.assertEqual(ColumnarJSONRenderer().render(data), b'{"values":[1.5,null],"strided":[0.0,2.0]}')
+
+    def test_async_data_response_writes_null(self):
+        response = AsyncAPIView().data_response(MISSING_HOUR, 200)
+        self.assertEqual(response.content, b'{"values":[1.5,null],"average":null}')
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    def test_keeps_drf_formats(self):
+        rendered = TimedJSONRenderer().render(
+            {"date": datetime(2026, 1, 5, 12, tzinfo=timezone.utc)}, "application/json; indent=4",
+        )
+        self.assertEqual(rendered, b'{\n  "date": "2026-01-05T12:00:00Z"\n}')
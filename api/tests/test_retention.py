@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+
+from django.test import TestCase
+
+from ..history import history_series
+from ..ingestion import WEATHER_VARIABLES
+from ..models import DailyWeather, StoredLocation, WeatherData
+from ..retention import apply_retention
+from ..spatial import location_index
+from ..weather_store import LOCAL_TIMEZONE
+from .helpers import EIRCODE, LATITUDE, LONGITUDE
+
+
+class RetentionTests(TestCase):
+    # Two weeks of hours from Monday 5 January; compaction keeps the hours from 15 January
+    START = datetime(2026, 1, 5, tzinfo=LOCAL_TIMEZONE)
+    END = datetime(2026, 1, 19, tzinfo=LOCAL_TIMEZONE)
+    NOW = datetime(2026, 1, 22, 12, tzinfo=LOCAL_TIMEZONE)
+    HOURLY_DAYS = 7
+
+    def setUp(self):
+        rows = []
+        for hour in range((self.END - self.START) // timedelta(hours=1)):
+            values = {variable: float(hour % 24) for variable in WEATHER_VARIABLES}
+            values["relative_humidity_2m"] = 50.0 + hour // 24
+            # Missing hours count towards neither the mean nor the extremes
+            values["wind_gusts_10m"] = None if hour % 24 >= 12 else float(hour % 24)
+            rows.append(WeatherData(
+                eircode=EIRCODE, latitude=LATITUDE, longitude=LONGITUDE,
+                date=self.START + timedelta(hours=hour), **values,
+            ))
+        WeatherData.objects.bulk_create(rows)
+        StoredLocation.objects.create(latitude=LATITUDE, longitude=LONGITUDE)
+        location_index.clear()
+        self.addCleanup(location_index.clear)
+
+    def retain(self, **kwargs):
+        return apply_retention(hourly_days=self.HOURLY_DAYS, daily_days=0, now=self.NOW, **kwargs)
+
+    def history(self, bucket):
+        return history_series({"eircode": EIRCODE}, self.START, self.END, bucket)
+
+    def test_compacts_hours_into_daily_aggregates(self):
+        counts = self.retain()
+
+        self.assertEqual(counts["weatherdata daily rows"], 10)
+        self.assertEqual(counts["weatherdata hourly rows"], 10 * 24)
+        self.assertFalse(WeatherData.objects.filter(date__lt=datetime(2026, 1, 15, tzinfo=LOCAL_TIMEZONE)).exists())
+        self.assertEqual(WeatherData.objects.count(), 4 * 24)
+
+        daily = DailyWeather.objects.get(eircode=EIRCODE, date=date(2026, 1, 6))
+        self.assertEqual((daily.latitude, daily.longitude, daily.hours), (LATITUDE, LONGITUDE, 24))
+        self.assertEqual((daily.temperature_2m_mean, daily.temperature_2m_min, daily.temperature_2m_max),
+                         (11.5, 0.0, 23.0))
+        self.assertEqual(daily.relative_humidity_2m_mean, 51.0)
+        self.assertEqual((daily.wind_gusts_10m_mean, daily.wind_gusts_10m_min, daily.wind_gusts_10m_max),
+                         (5.5, 0.0, 11.0))
+
+    def test_history_is_unchanged_by_compaction(self):
+        before = {bucket: self.history(bucket) for bucket in ("day", "week")}
+        self.retain()
+
+        for bucket, data in before.items():
+            with self.subTest(bucket=bucket):
+                self.assertEqual(self.history(bucket), data)
+        # The week of 12 January holds both compacted and hourly days
+        self.assertEqual(len(before["week"]["date"]), 2)
+        self.assertEqual(len(before["day"]["date"]), 14)
+
+    def test_dry_run_deletes_nothing(self):
+        counts = self.retain(dry_run=True)
+
+        self.assertEqual(counts["weatherdata hourly rows"], 10 * 24)
+        self.assertEqual(WeatherData.objects.count(), 14 * 24)
+        self.assertFalse(DailyWeather.objects.exists())
+
+    def test_second_run_is_idempotent(self):
+        self.retain()
+        compacted = list(DailyWeather.objects.order_by("date").values())
+        history = self.history("day")
+
+        counts = self.retain()
+
+        self.assertEqual(counts["weatherdata daily rows"], 0)
+        self.assertEqual(counts["weatherdata hourly rows"], 0)
+        self.assertEqual(list(DailyWeather.objects.order_by("date").values()), compacted)
+        self.assertEqual(self.history("day"), history)
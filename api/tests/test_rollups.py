@@ -0,0 +1,73 @@
+from datetime import date, datetime, timezone
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase
+
+from .. import weather_store
+from ..analytics import day_labels
+from ..models import DailyRollup
+from ..rollups import analytics_summary, build_rollups
+from ..rules import current_rules
+from ..weather_store import INTERVAL, LOCAL_TIMEZONE, forecast_window, grid_cell
+from .helpers import LATITUDE, LONGITUDE, hour_values
+
+# Europe/London springs forward on 2026-03-29 and falls back on 2026-10-25
+SPRING = datetime(2026, 3, 28, tzinfo=LOCAL_TIMEZONE)
+AUTUMN = datetime(2026, 10, 24, tzinfo=LOCAL_TIMEZONE)
+VARIABLES = ["temperature_2m"]
+
+
+def _hours_per_day(start, hours):
+    day_index, labels = day_labels(int(start.timestamp()), hours)
+    return dict(zip(labels, np.bincount(day_index).tolist()))
+
+
+class DayLabelsTests(TestCase):
+
+    def test_days_follow_local_midnight_across_dst(self):
+        self.assertEqual(
+            _hours_per_day(SPRING, 72),
+            {"2026-03-28": 24, "2026-03-29": 23, "2026-03-30": 24, "2026-03-31": 1},
+        )
+        self.assertEqual(_hours_per_day(AUTUMN, 72), {"2026-10-24": 24, "2026-10-25": 25, "2026-10-26": 23})
+
+    def test_rollups_store_the_real_hour_count(self):
+        matrix = np.arange(72, dtype=np.float64)[None, :]
+        rollups = build_rollups((LATITUDE, LONGITUDE), VARIABLES, int(AUTUMN.timestamp()), matrix, current_rules())
+
+        self.assertEqual([(rollup.day, rollup.hours) for rollup in rollups], [
+            (date(2026, 10, 24), 24), (date(2026, 10, 25), 25), (date(2026, 10, 26), 23),
+        ])
+        # The 25-hour day holds hours 24 to 48
+        self.assertEqual((rollups[1].min_value, rollups[1].max_value), (24, 48))
+
+
+class AnalyticsSummaryTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(weather_store, "request_window", side_effect=hour_values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_dst_days_are_served_from_rollups(self):
+        now = datetime(2026, 3, 28, 10, tzinfo=timezone.utc)
+        start, end = forecast_window(forecast_days=3, now=now)
+        rules = current_rules()
+
+        computed = analytics_summary(LATITUDE, LONGITUDE, VARIABLES, start, end, rules, now)
+        self.assertEqual(computed["data"]["source"], "computed")
+        self.assertEqual(computed["data"]["days"], ["2026-03-28", "2026-03-29", "2026-03-30", "2026-03-31"])
+        cell = grid_cell(LATITUDE, LONGITUDE)
+        self.assertEqual(
+            list(DailyRollup.objects.filter(cell_latitude=cell[0]).order_by("day").values_list("hours", flat=True)),
+            [24, 23, 24, 1],
+        )
+
+        served = analytics_summary(LATITUDE, LONGITUDE, VARIABLES, start, end, rules, now)
+        self.assertEqual(served["data"]["source"], "rollup")
+        self.assertEqual(served["data"]["variables"], computed["data"]["variables"])
+
+        # A window covering all of 2026-03-31 cannot use its one-hour rollup
+        longer = analytics_summary(LATITUDE, LONGITUDE, VARIABLES, start, end + 23 * INTERVAL, rules, now)
+        self.assertEqual(longer["data"]["source"], "computed")
@@ -0,0 +1,24 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ..rules import rules_cache
+from .helpers import LATITUDE, LONGITUDE
+
+
+class AnalyticsRulesTests(TestCase):
+
+    def setUp(self):
+        rules_cache.clear()
+        self.addCleanup(rules_cache.clear)
+
+    def test_out_of_range_moderate_value_is_rejected(self):
+        response = self.client.post(reverse("analytics"), {
+            "latitude": LATITUDE, "longitude": LONGITUDE, "hourly": ["temperature_2m"], "forecast_days": 1,
+            "moderate_values": {"temperature_2m": 99, "cloud_cover": "high"},
+        }, content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["error message"],
+            "temperature_2m must be between 0 and 40; cloud_cover must be between 0 and 100",
+        )
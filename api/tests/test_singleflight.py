@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from ..singleflight import SingleFlight
+
+CALLERS = 8
+KEY = ("openmeteo", "cell")
+
+
+class CountingEvent(threading.Event):
+    """An Event that counts the threads waiting on it."""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        with self._waiting_lock:
+            self.waiting += 1
+        return super().wait(timeout)
+
+
+class ThreadedSingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def upstream(self, error=None):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if error is not None:
+            raise error
+        return self.calls
+
+    def run_callers(self, fn, *args, followers=CALLERS - 1):
+        outcomes = []
+
+        def caller():
+            try:
+                outcomes.append(self.flights.do(KEY, fn, *args))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=caller)]
+        threads[0].start()
+        self.started.wait(5)
+        # Count the followers waiting on the leader's call before releasing it
+        call = self.flights._calls[KEY]
+        call.done = CountingEvent()
+        threads += [threading.Thread(target=caller) for _ in range(followers)]
+        for thread in threads[1:]:
+            thread.start()
+        while call.done.waiting < followers:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return outcomes
+
+    def test_concurrent_calls_share_one_upstream_call(self):
+        self.assertEqual(self.run_callers(self.upstream), [1] * CALLERS)
+        self.assertEqual(self.calls, 1)
+
+    def test_every_caller_gets_the_error(self):
+        error = ConnectionError("upstream down")
+        outcomes = self.run_callers(self.upstream, error)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(outcomes, [error] * CALLERS)
+
+    @override_settings(SINGLE_FLIGHT_LOCK_TIMEOUT=0.01)
+    def test_follower_fetches_itself_after_the_timeout(self):
+        outcomes = []
+        leader = threading.Thread(target=lambda: outcomes.append(self.flights.do(KEY, self.upstream)))
+        leader.start()
+        self.started.wait(5)
+
+        # The leader is stuck; the follower gives up waiting and calls upstream
+        follower = self.flights.do(KEY, lambda: "direct")
+        self.release.set()
+        leader.join(5)
+
+        self.assertEqual((follower, outcomes), ("direct", [1]))
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.calls = 0
+
+    async def upstream(self, release, error=None):
+        self.calls += 1
+        await release.wait()
+        if error is not None:
+            raise error
+        return self.calls
+
+    async def gather_callers(self, release, *args):
+        tasks = [asyncio.create_task(self.flights.do_async(KEY, self.upstream, release, *args)) for _ in range(CALLERS)]
+        # Let the leader reach upstream and the followers start waiting on it
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_concurrent_calls_share_one_upstream_call(self):
+        self.assertEqual(await self.gather_callers(asyncio.Event()), [1] * CALLERS)
+        self.assertEqual(self.calls, 1)
+
+    async def test_every_caller_gets_the_error(self):
+        error = ConnectionError("upstream down")
+        outcomes = await self.gather_callers(asyncio.Event(), error)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(outcomes, [error] * CALLERS)
+
+    async def test_leader_cancellation_is_not_propagated(self):
+        release = asyncio.Event()
+        leader = asyncio.create_task(self.flights.do_async(KEY, self.upstream, release))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(self.flights.do_async(KEY, self.upstream, release)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(sorted(await asyncio.gather(*followers)), [2, 3, 4])
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+    @override_settings(SINGLE_FLIGHT_LOCK_TIMEOUT=0.01)
+    async def test_follower_fetches_itself_after_the_timeout(self):
+        release = asyncio.Event()
+        leader = asyncio.create_task(self.flights.do_async(KEY, self.upstream, release))
+        await asyncio.sleep(0)
+
+        async def direct():
+            return "direct"
+
+        self.assertEqual(await self.flights.do_async(KEY, direct), "direct")
+        release.set()
+        self.assertEqual(await leader, 1)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+
+from ..history import history_series
+from ..ingestion import WEATHER_VARIABLES
+from ..models import StoredLocation, WeatherData
+from ..retention import apply_retention
+from ..spatial import distance_km, location_index
+from ..weather_store import LOCAL_TIMEZONE
+from .helpers import EIRCODE, LATITUDE, LONGITUDE
+
+
+class LocationIndexTests(TestCase):
+
+    def setUp(self):
+        location_index.clear()
+        self.addCleanup(location_index.clear)
+
+    def test_matches_brute_force(self):
+        points = [(LATITUDE + row * 0.03, LONGITUDE + column * 0.05) for row in range(-5, 6) for column in range(-5, 6)]
+        StoredLocation.objects.bulk_create(
+            [StoredLocation(latitude=latitude, longitude=longitude) for latitude, longitude in points]
+        )
+
+        found = location_index.within(LATITUDE + 0.01, LONGITUDE, 5)
+
+        expected = sorted(
+            (float(distance_km(LATITUDE + 0.01, LONGITUDE, latitude, longitude)), latitude, longitude)
+            for latitude, longitude in points
+        )
+        expected = [(round(distance, 3), latitude, longitude) for distance, latitude, longitude in expected if distance <= 5]
+        self.assertEqual(found, expected)
+        self.assertEqual(location_index.nearest(LATITUDE + 0.01, LONGITUDE, 5), expected[0])
+
+    def test_compacted_location_stays_indexed(self):
+        start = datetime(2026, 1, 5, tzinfo=LOCAL_TIMEZONE)
+        WeatherData.objects.bulk_create([
+            WeatherData(eircode=EIRCODE, latitude=LATITUDE, longitude=LONGITUDE, date=start + timedelta(hours=hour),
+                        **{variable: float(hour) for variable in WEATHER_VARIABLES})
+            for hour in range(48)
+        ])
+        StoredLocation.objects.create(latitude=LATITUDE, longitude=LONGITUDE)
+        # A location without any weather left
+        StoredLocation.objects.create(latitude=LATITUDE + 1, longitude=LONGITUDE)
+
+        counts = apply_retention(hourly_days=0, daily_days=0, now=start + timedelta(days=10))
+
+        self.assertEqual(counts["stored locations"], 1)
+        self.assertFalse(WeatherData.objects.exists())
+        data = history_series({"latitude": LATITUDE + 0.01, "longitude": LONGITUDE, "radius_km": None},
+                              start, start + timedelta(days=2), "day")
+        self.assertEqual([location["latitude"] for location in data["locations"]], [LATITUDE])
+        self.assertEqual(len(data["date"]), 2)
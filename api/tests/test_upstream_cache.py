@@ -0,0 +1,56 @@
+import tempfile
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from requests_cache import CachedResponse
+
+from ..upstream_cache import BoundedFileDict, DjangoCacheStorage
+
+
+def _response(idx):
+    return CachedResponse(url=f"https://api.open-meteo.com/v1/forecast?page={idx}")
+
+
+class BoundedFileDictTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = BoundedFileDict(directory.name, max_entries=10)
+
+    def test_prunes_to_max_entries(self):
+        for idx in range(25):
+            self.storage[f"key{idx}"] = _response(idx)
+
+        self.assertLessEqual(len(self.storage), 11)
+        self.assertEqual(self.storage["key24"].url, _response(24).url)
+
+    def test_lists_the_directory_only_to_prune(self):
+        with mock.patch.object(BoundedFileDict, "paths", wraps=self.storage.paths) as paths:
+            for idx in range(11):
+                self.storage[f"key{idx}"] = _response(idx)
+            self.assertEqual(paths.call_count, 0)
+
+            self.storage["key11"] = _response(11)
+            self.assertEqual(paths.call_count, 1)
+        self.assertEqual(len(self.storage), 10)
+
+
+class DjangoCacheStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches["default"]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+        self.storage = DjangoCacheStorage("default", "openmeteo", timeout=60)
+
+    def test_clear_keeps_other_keys(self):
+        self.cache.set("response:analytics", "kept")
+        self.storage["key"] = _response(1)
+        self.assertEqual(self.storage["key"].url, _response(1).url)
+
+        self.storage.clear()
+
+        self.assertNotIn("key", self.storage)
+        self.assertEqual(self.cache.get("response:analytics"), "kept")
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.test import TestCase
+
+from .. import weather_store
+from ..benchmarks.upstream import weather_message
+from ..weather_store import (
+    INTERVAL, UpstreamFetch, forecast_window, get_hourly_many, grid_cell, load_cells, request_window,
+    save_window,
+)
+from .helpers import LATITUDE, LONGITUDE, hour_values
+
+NOW = datetime(2026, 7, 1, 12, tzinfo=timezone.utc)
+VARIABLES = ["temperature_2m", "cloud_cover"]
+
+
+def _upstream_response(fetch, **attributes):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b"".join(
+        weather_message(latitude, longitude, fetch.start, fetch.end, fetch.variables) for latitude, longitude in fetch.cells
+    )
+    for name, value in attributes.items():
+        setattr(response, name, value)
+    return response
+
+
+def _client(*responses):
+    return SimpleNamespace(session=mock.Mock(get=mock.Mock(side_effect=responses)))
+
+
+class CachedResponseTests(TestCase):
+
+    def setUp(self):
+        self.cell = grid_cell(LATITUDE, LONGITUDE)
+        self.start, self.end = forecast_window(forecast_days=1, now=NOW)
+        self.fetch = UpstreamFetch([self.cell], tuple(VARIABLES), self.start, self.end)
+        self.times = self.start + np.arange((self.end - self.start) // INTERVAL) * INTERVAL
+
+    def _held(self, response):
+        save_window(self.fetch, request_window(self.fetch, _client(response)), NOW)
+        return load_cells({self.cell}, VARIABLES, self.start, self.end, NOW)[self.cell].held
+
+    def test_fresh_response_is_stamped_now(self):
+        self.assertTrue(self._held(_upstream_response(self.fetch)).all())
+
+    def test_replayed_response_keeps_its_fetch_time(self):
+        created_at = NOW - timedelta(seconds=settings.WEATHER_FORECAST_TTL + 60)
+        held = self._held(_upstream_response(self.fetch, from_cache=True, created_at=created_at))
+
+        # Hours already past when the cached response was made are kept; its forecast is stale
+        expected = self.times < created_at.timestamp()
+        self.assertTrue(expected.any() and not expected.all())
+        self.assertTrue((held == expected).all())
+
+
+class IncrementalRefreshTests(TestCase):
+
+    def setUp(self):
+        self.cell = grid_cell(LATITUDE, LONGITUDE)
+        self.start, self.end = forecast_window(forecast_days=2, past_days=1, now=NOW)
+        patcher = mock.patch.object(weather_store, "request_window", side_effect=hour_values)
+        self.request_window = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, start, end, now, variables=VARIABLES):
+        self.request_window.reset_mock()
+        series = get_hourly_many([(LATITUDE, LONGITUDE)], variables, start, end, now)[0]
+        requested = [(call.args[0].variables, call.args[0].start, call.args[0].end)
+                     for call in self.request_window.call_args_list]
+        return series, requested
+
+    def assertServed(self, series, start, end):
+        expected = np.arange(start // INTERVAL, end // INTERVAL, dtype=np.float32)
+        for variable, values in series.values.items():
+            self.assertTrue(np.array_equal(values, expected), variable)
+
+    def test_first_warm_and_stale_calls(self):
+        series, requested = self._get(self.start, self.end, NOW)
+        self.assertEqual(requested, [(tuple(VARIABLES), self.start, self.end)])
+        self.assertServed(series, self.start, self.end)
+
+        series, requested = self._get(self.start, self.end, NOW + timedelta(minutes=10))
+        self.assertEqual(requested, [])
+        self.assertServed(series, self.start, self.end)
+
+        # After the TTL only the hours that were still forecasts at NOW are refetched
+        later = NOW + timedelta(seconds=settings.WEATHER_FORECAST_TTL + 1)
+        series, requested = self._get(self.start, self.end, later)
+        self.assertEqual(requested, [(tuple(VARIABLES), int(NOW.timestamp()), self.end)])
+        self.assertServed(series, self.start, self.end)
+
+    def test_past_hours_are_kept(self):
+        self._get(self.start, self.end, NOW)
+
+        # A week on, every hour before NOW is still served from the store
+        series, requested = self._get(self.start, int(NOW.timestamp()), NOW + timedelta(days=7))
+        self.assertEqual(requested, [])
+        self.assertServed(series, self.start, int(NOW.timestamp()))
+
+    def test_fetch_spans_the_missing_hours(self):
+        first_hours = self.start + 6 * INTERVAL
+        last_hours = self.end - 6 * INTERVAL
+        self._get(self.start, first_hours, NOW)
+        self._get(last_hours, self.end, NOW)
+
+        # One span covers the gap; the stored hours either side are merged in
+        series, requested = self._get(self.start, self.end, NOW)
+        self.assertEqual(requested, [(tuple(VARIABLES), first_hours, last_hours)])
+        self.assertServed(series, self.start, self.end)
+
+    def test_fetch_spans_every_missing_hour_and_variable(self):
+        middle = self.start + 24 * INTERVAL
+        self._get(self.start, self.end, NOW, variables=VARIABLES[:1])
+        self._get(middle, middle + INTERVAL, NOW, variables=VARIABLES[1:])
+
+        # cloud_cover is missing either side of its stored hour, so the span is the whole window
+        series, requested = self._get(self.start, self.end, NOW)
+        self.assertEqual(requested, [(tuple(VARIABLES[1:]), self.start, self.end)])
+        self.assertServed(series, self.start, self.end)
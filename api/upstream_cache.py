@@ -0,0 +1,149 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from requests_cache import BaseCache, DictStorage, SQLiteCache
+from requests_cache.backends.base import BaseStorage
+from requests_cache.backends.filesystem import FileDict
+
+# Storage backends for the Open-Meteo URL cache, selected with UPSTREAM_CACHE.
+# "memory" and "filesystem" are capped at MAX_ENTRIES, "django" relies on the
+# limits of the configured cache and "sqlite" is the previous, unbounded file.
+
+
+class LRUStorage(DictStorage):
+    """In-memory response storage that evicts the least recently used entry."""
+
+    def __init__(self, max_entries, **kwargs):
+        super().__init__(**kwargs)
+        self.data = OrderedDict()
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            item = super().__getitem__(key)
+            self.data.move_to_end(key)
+            return item
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self.data[key]
+
+
+class BoundedFileDict(FileDict):
+    """One file per response; the oldest files are removed past `max_entries`.
+
+    Writes are counted instead of listing the directory each time; the count
+    (an overestimate, since rewrites are counted too) is corrected whenever
+    pruning lists it.
+    """
+
+    def __init__(self, cache_name, max_entries, **kwargs):
+        super().__init__(cache_name, **kwargs)
+        self.max_entries = max_entries
+        self._count = len(self)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        with self._lock:
+            self._count += 1
+            # Prune in steps of 10% so the directory is not listed on every write
+            if self._count > self.max_entries * 1.1:
+                self._prune()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        with self._lock:
+            self._count -= 1
+
+    def _prune(self):
+        paths = sorted(self.paths(), key=lambda path: path.stat().st_mtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            path.unlink(missing_ok=True)
+        self._count = min(len(paths), self.max_entries)
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self._count = 0
+
+
+class DjangoCacheStorage(BaseStorage):
+    """Response storage on a Django cache alias (locmem, file, Redis, memcached).
+
+    Size limits and eviction are those of the configured cache; keys cannot be
+    listed, so iteration is empty. Keys carry a generation number that clear()
+    moves on, leaving the old entries to expire and the alias's other keys
+    alone.
+    """
+
+    def __init__(self, alias, prefix, timeout, serializer="pickle", **kwargs):
+        super().__init__(serializer=serializer, **kwargs)
+        self.cache = caches[alias]
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def _generation(self):
+        return self.cache.get_or_set(f"{self.prefix}:generation", 0, timeout=None)
+
+    def _key(self, key):
+        return f"{self.prefix}:{self._generation()}:{key}"
+
+    def __getitem__(self, key):
+        value = self.cache.get(self._key(key))
+        if value is None:
+            raise KeyError(key)
+        return self.deserialize(key, value)
+
+    def __setitem__(self, key, value):
+        self.cache.set(self._key(key), self.serialize(value), timeout=self.timeout)
+
+    def __delitem__(self, key):
+        if not self.cache.delete(self._key(key)):
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def clear(self):
+        self.cache.set(f"{self.prefix}:generation", uuid.uuid4().hex, timeout=None)
+
+
+class UpstreamCache(BaseCache):
+
+    def __init__(self, responses, cache_name="upstream", **kwargs):
+        super().__init__(cache_name=cache_name, **kwargs)
+        self.responses = responses
+        self.redirects = DictStorage()
+
+
+def build_cache_backend(options=None):
+    """Create the requests-cache backend described by UPSTREAM_CACHE."""
+    options = options or settings.UPSTREAM_CACHE
+    backend = options["BACKEND"]
+    max_entries = options["MAX_ENTRIES"]
+
+    if backend == "memory":
+        return UpstreamCache(LRUStorage(max_entries))
+    if backend == "filesystem":
+        return UpstreamCache(BoundedFileDict(options["LOCATION"], max_entries))
+    if backend == "django":
+        # Keep entries long enough to be served stale while they are refreshed
+        timeout = options["EXPIRE_AFTER"] + options["STALE_WHILE_REVALIDATE"]
+        return UpstreamCache(DjangoCacheStorage(options["CACHE_ALIAS"], "openmeteo", timeout))
+    if backend == "sqlite":
+        return SQLiteCache(options["LOCATION"])
+    raise ValueError(f"Unknown UPSTREAM_CACHE backend: {backend}")
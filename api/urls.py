@@ -1,8 +1,26 @@
+from django.conf import settings
 from django.urls import path
-from . views import CoordinatesReturnView, AnalyticsView, EircodeWeatherView
+
+from .views import metrics_view
+
+if settings.API_ASYNC_VIEWS:
+    from .async_views import (
+        AsyncAnalyticsView as AnalyticsView,
+        AsyncBatchAnalyticsView as BatchAnalyticsView,
+        AsyncCoordinatesReturnView as CoordinatesReturnView,
+        AsyncEircodeWeatherView as EircodeWeatherView,
+        AsyncExportView as ExportView,
+        AsyncHistoryView as HistoryView,
+    )
+else:
+    from . views import CoordinatesReturnView, AnalyticsView, BatchAnalyticsView, EircodeWeatherView, ExportView, HistoryView
 
 urlpatterns = [
     path('environmental_analytics/coordinates/', CoordinatesReturnView.as_view(), name='eircode'),
     path('environmental_analytics/analytics/', AnalyticsView.as_view(), name='analytics'),
+    path('environmental_analytics/analytics/batch/', BatchAnalyticsView.as_view(), name='analytics_batch'),
     path('environmental_analytics/eircode_weather/', EircodeWeatherView.as_view(), name='eircode_weather'),
+    path('environmental_analytics/history/', HistoryView.as_view(), name='weather_history'),
+    path('environmental_analytics/export/', ExportView.as_view(), name='weather_export'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
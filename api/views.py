@@ -1,283 +1,250 @@
+import contextvars
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.exceptions import ParseError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
 import requests
-import openmeteo_requests
-import requests_cache
-import pandas as pd
-from retry_requests import retry
-from decouple import config
-from .models import WeatherData
+from concurrent.futures import ThreadPoolExecutor
+from . import weather_store
+from .conditional import conditional
+from .export import OUTPUTS, chunked, export_lines, parse_export_params
+from .geocoding import GeocodeError, geocode_eircode
+from .history import history_series, parse_history_params
+from .ingestion import WEATHER_VARIABLES, ingest_weather
+from .metrics import registry
+from .prefetch import record_hits
+from .renderers import ColumnarJSONRenderer
+from .rollups import analytics_summary
+from .responses import (
+    WEATHER_SAVED, InvalidRequest, analytics_cache_params, analytics_data, analytics_params,
+    batch_data, batch_hits, batch_params, coordinates_data, eircode_cache_params, eircode_hits, export_disposition,
+    location_error, located, request_failed_data, request_rules, required_eircode, split_locations,
+    unexpected_error_data,
+)
+from .rules import current_rules
+
+logger = logging.getLogger(__name__)
 
 class CoordinatesReturnView(APIView):
 
-    base_url = "https://maps.googleapis.com/maps/api/geocode/json"
-    
-    api_key = config("GOOGLE_API_KEY")
-    
+    def cache_params(self, request):
+        return eircode_cache_params(request.query_params.get("eircode"))
+
+    def cache_hits(self, params):
+        return eircode_hits(params)
+
+    @conditional
     def get(self, request):
         try:
-            params = {
-                "address": request.query_params.get("eircode"),
-                "region": "ie",  
-                "key": self.api_key
-            }
-            print("no problem here")
-
-            response = requests.get(self.base_url, params=params)
-            print("problem here", response.content)
-            response.raise_for_status()  
-
-            data = response.json()
-            if data['status'] == "OK":
-                location = data["results"][0]["geometry"]["location"]  
-                lat = location['lat']
-                lon = location['lng']
-                print("no problem here", lat, lon)
-                return Response({"coordinates": {"latitude": lat, "longitude": lon}}, status=status.HTTP_200_OK)
-            else:
-                return Response({"error message": data["status"]}, status=status.HTTP_404_NOT_FOUND)
-
+            eircode = required_eircode(request.query_params)
+            lat, lon = geocode_eircode(eircode)
+            record_hits([(lat, lon, eircode)])
+            return Response(coordinates_data(lat, lon), status=status.HTTP_200_OK)
+
+        except InvalidRequest as e:
+            return Response(e.data, status=e.status_code)
+        except GeocodeError as e:
+            return Response({"error message": e.status}, status=status.HTTP_404_NOT_FOUND)
         except requests.exceptions.RequestException as e:
-            return Response({"error message": f"Request failed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response(request_failed_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except KeyError:
             return Response({"error message": "Invalid response format from API"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
-            return Response({"error message": f"An unexpected error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ColumnarMixin:
 
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
 
-class AnalyticsView(APIView):
+    def columnar(self, request):
+        return request.accepted_renderer.format == ColumnarJSONRenderer.format
 
-    try:
-        cache_session = requests_cache.CachedSession('.cache', expire_after = 3600)
-        retry_session = retry(cache_session, retries = 5, backoff_factor = 0.2)
-        openmeteo = openmeteo_requests.Client(session = retry_session)
 
-        meteo_url = "https://api.open-meteo.com/v1/forecast"
+class AnalyticsView(ColumnarMixin, APIView):
 
-        # Moderate values for each variable
-        MODERATE_VALUES = {
-            "temperature_2m": 14,  # [5 to 40 ]
-            "relative_humidity_2m": 65, # [ 45 to 100]
-            "dew_point_2m": 6, # [4 to 10]
-            "cloud_cover": 50, # [0 to 100]
-            "wind_direction_10m": 180, # [0 to 360]
-            "wind_gusts_10m": 80 # [0 to 100]
-        }
+    def cache_params(self, request):
+        try:
+            return analytics_cache_params(request.data)
+        except ParseError:
+            return None
 
-        # Define ranges for each variable
-        RANGES = {
-            "temperature_2m": (0, 40),
-            "relative_humidity_2m": (45, 100),
-            "dew_point_2m": (4, 10),
-            "cloud_cover": (0, 100),
-            "wind_direction_10m": (0, 360),
-            "wind_gusts_10m": (0, 100),
-        }   
+    def cache_hits(self, params):
+        return [(params["latitude"], params["longitude"], "")]
 
-        def post(self, request):
+    # Polled by clients: answered from the response cache, or with a 304 for a matching ETag
+    @conditional
+    def post(self, request):
 
+        try:
             try:
+                latitude, longitude, hourly_variables, forecast_days = analytics_params(request.data)
+                logger.debug("Analytics for latitude=%s longitude=%s forecast_days=%s hourly=%s",
+                             latitude, longitude, forecast_days, hourly_variables)
+                # Cached rules with the request's moderate values
+                rules = request_rules(current_rules(), request.data)
+            except InvalidRequest as e:
+                return Response(e.data, status=e.status_code)
 
-                latitude = request.data.get("latitude")
-                longitude = request.data.get("longitude")
-                hourly_variables = request.data.get("hourly")
-                forecast_days = request.data.get("forecast_days")
-                print("latitude", latitude, "longitude", longitude, "forecast_days", forecast_days, "hourly_variables", hourly_variables)
-
-                if (latitude and longitude) and (hourly_variables and forecast_days):
-
-                    params = {
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "hourly": hourly_variables,
-                        "forecast_days": forecast_days,
-                        "daily": "sunshine_duration",
-                        "timezone": "Europe/London"
-                    }
-
-                    try:
-                        responses = self.openmeteo.weather_api(self.meteo_url, params)
-
-                        response = responses[0]
-
-                        print(f"Coordinates {response.Latitude()}°N {response.Longitude()}°E")
-                        print(f"Elevation {response.Elevation()} m asl")
-                        print(f"Timezone {response.Timezone()} {response.TimezoneAbbreviation()}")
-                        print(f"Timezone difference to GMT+0 {response.UtcOffsetSeconds()} s")
-
-                        # Process hourly data. The order of variables needs to be the same as requested.
-                        hourly = response.Hourly()
-                    
-                        dates = pd.date_range(
-                            start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-                            end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-                            freq=pd.Timedelta(seconds=hourly.Interval()),
-                            inclusive="left"
-                        ).tolist()
-
-                        response_data = {
-                            "data": {
-                                "date": [date.isoformat() for date in dates],
-                                "variables": {}
-                            }
-                        }    
-
-                        # update moderate values
-                        updated_values = self.MODERATE_VALUES.copy()
-
-                        # for key, new_value in moderate_value_array.items():
-                        #     if key in self.RANGES:
-                        #         min_val, max_val = self.RANGES[key]
-                        #         # Check if the new value is within the defined range
-                        #         if min_val <= new_value <= max_val:
-                        #             updated_values[key] = new_value  # Replace with the new value                  
-                                        
-                        for idx, variable in enumerate(hourly_variables):
-                            variable_values = hourly.Variables(idx).ValuesAsNumpy()
-
-                            print("variable_values:", variable, variable_values)
-
-
-                            # Get moderate value for the variable
-                            moderate_value = updated_values.get(variable, None)
-
-                            print("moderate_value:", moderate_value)
-
-                            working_hours = 0
-                            electricity_providers = {
-                                   "Electric Ireland": 0.42, # cents per kwh
-                                   "Bord Gais Energy": 0.43,
-                                   "SSE Airtricity": 0.43,
-                                   "Energia": 0.38,
-                                   "PrePayPower": 0.46,
-                                   "Flogas": 0.43
-                                   }
-                            
-                            electricity_total_rate_per_brand = {}    
-
-                            average_consumption_per_hour = 0.48 # kwh                     
-
-                            # Calculate working hours: values greater than the moderate value
-                            if moderate_value is not None:
-                                for values in variable_values:
-                                    if values < moderate_value:
-                                        working_hours += 1
-                            else:
-                                working_hours = None  # If no moderate value exists, skip this step
-
-                            if working_hours is not None:
-                                total_kwh = working_hours * average_consumption_per_hour
-
-                                for idx, value in electricity_providers.items():
-                                    electricity_total_rate_per_brand[idx] = round((total_kwh * value), 2)
-
-                            print("working_hours:", working_hours)
-
-                            # Add variable data to the response
-                            response_data["data"]["variables"][variable] = {
-                                "values": variable_values.tolist(),  # Convert numpy array to list
-                                "moderate_value": moderate_value,
-                                "working_hours": working_hours,
-                                "electricity_total_rate_per_brand": electricity_total_rate_per_brand
-                            }
-
-                        # Return the JSON response
-                        return Response(response_data, status=status.HTTP_200_OK)
-                    except Exception as e:
-                        print(f"Error message: {str(e)}")
-                        return Response({"error message": "Check the parameters"}, status=status.HTTP_404_NOT_FOUND)
-                else:
-                    return Response({"message": "Check the parameters send"}, status=status.HTTP_404_NOT_FOUND)
+            try:
+                start, end = weather_store.forecast_window(forecast_days=forecast_days)
+                record_hits([(latitude, longitude, "")])
+
+                # Per-day summary, answered from the daily rollups when they cover the window. The
+                # default payload lists every hourly value, which rollups do not keep, so it reads the hours
+                if request.data.get("summary"):
+                    summary = analytics_summary(latitude, longitude, hourly_variables, start, end, rules)
+                    return Response(summary, status=status.HTTP_200_OK)
+
+                hourly = weather_store.get_hourly(latitude, longitude, hourly_variables, start, end)
+                response_data = analytics_data(
+                    hourly, hourly_variables, rules, request.data.get("daily"), self.columnar(request)
+                )
+
+                # Return the JSON response
+                return Response(response_data, status=status.HTTP_200_OK)
             except Exception as e:
-                print(f"Error message: {str(e)}", )
-                return Response({"error message": "Check the coordinates value"}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        print({"error": f"An unexpected error occured, {str(e)}"})
+                logger.warning("Analytics failed: %s", e)
+                return Response({"error message": "Check the parameters"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.warning("Analytics request rejected: %s", e)
+            return Response({"error message": "Check the coordinates value"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class BatchAnalyticsView(ColumnarMixin, APIView):
+
+    GEOCODE_WORKERS = 8
+
+    def _resolve(self, locations):
+        # Geocode eircodes concurrently; coordinates are used as given
+        resolved, eircodes = split_locations(locations)
+
+        with ThreadPoolExecutor(max_workers=self.GEOCODE_WORKERS) as executor:
+            # Each task runs in a copy of the request's context, so its geocode time reaches Server-Timing
+            futures = {
+                executor.submit(contextvars.copy_context().run, geocode_eircode, eircode): eircode
+                for eircode in eircodes
+            }
+            for future, eircode in futures.items():
+                try:
+                    coordinates = future.result()
+                except (GeocodeError, requests.exceptions.RequestException) as e:
+                    coordinates = location_error(e)
+                for idx in eircodes[eircode]:
+                    resolved[idx] = coordinates
+
+        return resolved
+
+    def post(self, request):
+        try:
+            try:
+                locations, hourly_variables, forecast_days = batch_params(request.data)
+                rules = request_rules(current_rules(), request.data)
+                resolved = self._resolve(locations)
+            except InvalidRequest as e:
+                return Response(e.data, status=e.status_code)
+
+            try:
+                # One upstream call per 100 grid cells that are missing the same hours
+                start, end = weather_store.forecast_window(forecast_days=forecast_days)
+                series = weather_store.get_hourly_many(located(resolved), hourly_variables, start, end)
+                record_hits(batch_hits(locations, resolved))
+            except Exception as e:
+                logger.warning("Batch analytics failed: %s", e)
+                return Response({"error message": "Check the parameters"}, status=status.HTTP_404_NOT_FOUND)
+
+            response_data = batch_data(
+                locations, resolved, series, hourly_variables, start, end, request.data.get("daily"), self.columnar(request),
+                rules,
+            )
+            return Response(response_data, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
 class EircodeWeatherView(APIView):
-    google_base_url = "https://maps.googleapis.com/maps/api/geocode/json"
-    google_api_key = config("GOOGLE_API_KEY")
-    openmeteo_base_url = "https://api.open-meteo.com/v1/forecast"
-    
+
+    # Not @conditional: every call fetches and stores the weather, whatever the response body
     def get(self, request):
         try:
-            # Get Eircode from query parameters
-            eircode = request.query_params.get("eircode")
-            if not eircode:
-                return Response({"error message": "Eircode is required"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Convert Eircode to latitude and longitude using Google Maps API
-            google_params = {
-                "address": eircode,
-                "region": "ie",  # Ireland
-                "key": self.google_api_key
-            }
-            google_response = requests.get(self.google_base_url, params=google_params)
-            google_response.raise_for_status()
-            google_data = google_response.json()
-            
-            if google_data['status'] != "OK":
-                return Response({"error message": google_data['status']}, status=status.HTTP_404_NOT_FOUND)
-
-            location = google_data["results"][0]["geometry"]["location"]
-            latitude = location["lat"]
-            longitude = location["lng"]
-
-            # Fetch weather data from Open-Meteo API
-            weather_params = {
-                "latitude": latitude,
-                "longitude": longitude,
-                "hourly": "temperature_2m,relative_humidity_2m,dew_point_2m,cloud_cover,wind_direction_10m,wind_gusts_10m",
-                "past_days": 30,
-                "timezone": "Europe/London"
-            }
+            # Get Eircode from query parameters, stored under one spelling so the upsert replaces earlier rows
+            try:
+                eircode = required_eircode(request.query_params)
+            except InvalidRequest as e:
+                return Response(e.data, status=e.status_code)
 
-            cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-            retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-            openmeteo_client = openmeteo_requests.Client(session=retry_session)
-            responses = openmeteo_client.weather_api(self.openmeteo_base_url, params=weather_params)
-
-            response = responses[0]  # Assume only one response
-            hourly = response.Hourly()
-
-            dates = pd.date_range(
-                start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-                end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-                freq=pd.Timedelta(seconds=hourly.Interval()),
-                inclusive="left"
-            ).tolist()
-
-            hourly_data = {
-                "date": [date.isoformat() for date in dates],
-                "temperature_2m": hourly.Variables(0).ValuesAsNumpy().tolist(),
-                "relative_humidity_2m": hourly.Variables(1).ValuesAsNumpy().tolist(),
-                "dew_point_2m": hourly.Variables(2).ValuesAsNumpy().tolist(),
-                "cloud_cover": hourly.Variables(3).ValuesAsNumpy().tolist(),
-                "wind_direction_10m": hourly.Variables(4).ValuesAsNumpy().tolist(),
-                "wind_gusts_10m": hourly.Variables(5).ValuesAsNumpy().tolist(),
-            }
+            # Convert Eircode to latitude and longitude (cached Google Maps lookup)
+            try:
+                latitude, longitude = geocode_eircode(eircode)
+            except GeocodeError as e:
+                return Response({"error message": e.status}, status=status.HTTP_404_NOT_FOUND)
 
-            # Save to database
-            for idx, date in enumerate(hourly_data["date"]):
-                WeatherData.objects.create(
-                    eircode=eircode,
-                    latitude=latitude,
-                    longitude=longitude,
-                    date=date,
-                    temperature_2m=round((hourly_data["temperature_2m"][idx]), 2),
-                    relative_humidity_2m=round((hourly_data["relative_humidity_2m"][idx]), 2),
-                    dew_point_2m=round((hourly_data["dew_point_2m"][idx]), 2),
-                    cloud_cover=round((hourly_data["cloud_cover"][idx]), 2),
-                    wind_direction_10m=round((hourly_data["wind_direction_10m"][idx]), 2),
-                    wind_gusts_10m=round((hourly_data["wind_gusts_10m"][idx]), 2),
-                )
+            # Fetch the last 30 days and the forecast, reusing hours already held for this grid cell
+            start, end = weather_store.forecast_window(past_days=30)
+            hourly = weather_store.get_hourly(latitude, longitude, WEATHER_VARIABLES, start, end)
+            record_hits([(latitude, longitude, eircode)])
 
-            return Response({"message": "Weather data retrieved and saved successfully."}, status=status.HTTP_200_OK)
+            # Save to database
+            ingest_weather(
+                eircode,
+                latitude,
+                longitude,
+                start=hourly.start,
+                interval=hourly.interval,
+                variables=hourly.values,
+            )
+
+            return Response(WEATHER_SAVED, status=status.HTTP_200_OK)
         
         except requests.exceptions.RequestException as e:
-            return Response({"error message": f"Request failed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response(request_failed_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
-            return Response({"error message": f"An unexpected error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-     
\ No newline at end of file
+            return Response(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class HistoryView(APIView):
+
+    def get(self, request):
+        try:
+            try:
+                location, start, end, bucket, variables = parse_history_params(request.query_params)
+            except ValueError as e:
+                return Response({"error message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Aggregated in the database from the stored hourly WeatherData rows
+            data = history_series(location, start, end, bucket, variables)
+            return Response({"data": data}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response(unexpected_error_data(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ExportView(APIView):
+
+    def get(self, request):
+        # `output` rather than `format`, which DRF reserves for content negotiation
+        try:
+            eircodes, start, end, variables, output, source = parse_export_params(request.query_params)
+        except ValueError as e:
+            return Response({"error message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            chunked(export_lines(eircodes, start, end, variables, output, source)),
+            content_type=OUTPUTS[output],
+        )
+        response["Content-Disposition"] = export_disposition(output, source)
+        return response
+
+
+def metrics_view(request):
+    """Stage timings and cache counters of this process in the Prometheus text format."""
+    # Not public: it shows the endpoint mix and upstream latencies
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS and not request.user.is_staff:
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
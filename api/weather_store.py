@@ -0,0 +1,452 @@
+import asyncio
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone as django_timezone
+from zoneinfo import ZoneInfo
+
+from .clients import async_client, openmeteo_client, openmeteo_refresh_client
+from .metrics import count_cache, timed
+from .models import ObservationDay
+from .singleflight import flights
+from .spatial import snap
+
+METEO_URL = "https://api.open-meteo.com/v1/forecast"
+LOCAL_TIMEZONE = ZoneInfo("Europe/London")
+
+INTERVAL = 3600
+DAY = 86400
+HOURS_PER_DAY = DAY // INTERVAL
+MAX_LOCATIONS_PER_REQUEST = 100
+BATCH_SIZE = 1000
+
+# One upstream call: the same variables and hour span for a group of grid cells
+UpstreamFetch = namedtuple("UpstreamFetch", ["cells", "variables", "start", "end"])
+
+
+class HourlySeries:
+    """Hourly values of several variables for one grid cell.
+
+    `start` is the epoch second of the first hour and `values` maps each
+    variable to a float32 array, mirroring Open-Meteo's hourly block.
+    """
+
+    def __init__(self, latitude, longitude, start, interval, values):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.start = start
+        self.interval = interval
+        self.values = values
+
+    @property
+    def hours(self):
+        return len(next(iter(self.values.values()), ()))
+
+    @property
+    def end(self):
+        return self.start + self.hours * self.interval
+
+
+class _CellState:
+    """A (variables x hours) matrix of one cell's values and which of them are held.
+
+    `fetched_at` is when upstream produced a fetched window, if that was
+    earlier than the save (a response replayed from the URL cache).
+    """
+
+    def __init__(self, cell, values, held, fetched_at=None):
+        self.cell = cell
+        self.values = values
+        self.held = held
+        self.fetched_at = fetched_at
+
+    @classmethod
+    def empty(cls, cell, variables, hours, fetched_at=None):
+        return cls(
+            cell,
+            np.full((len(variables), hours), np.nan, dtype=np.float32),
+            np.zeros((len(variables), hours), dtype=bool),
+            fetched_at,
+        )
+
+
+def grid_cell(latitude, longitude):
+    """Snap a coordinate to the centre of its cache grid cell."""
+    return snap(latitude, longitude, settings.WEATHER_GRID_CELL_DEGREES)
+
+
+def forecast_window(forecast_days=7, past_days=0, now=None):
+    """Return the [start, end) epoch seconds Open-Meteo covers for a request.
+
+    Like Open-Meteo with timezone=Europe/London, the window starts at local
+    midnight and keeps the current UTC offset for the whole series.
+    """
+    now = now or django_timezone.now()
+    offset = int(now.astimezone(LOCAL_TIMEZONE).utcoffset().total_seconds())
+    local_seconds = int(now.timestamp()) + offset
+    today = local_seconds - local_seconds % DAY - offset
+    return today - int(past_days) * DAY, today + int(forecast_days) * DAY
+
+
+def _datetime(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def _day_span(start, end):
+    """Return the first UTC day start and the number of days covering [start, end)."""
+    first = start - start % DAY
+    return first, -(-(end - first) // DAY)
+
+
+def _stored_days(cells, variables, first, days):
+    # The lat/lon filters match a cross product of the cells, so drop the extra rows
+    cells = set(cells)
+    rows = ObservationDay.objects.filter(
+        cell_latitude__in={lat for lat, _ in cells},
+        cell_longitude__in={lon for _, lon in cells},
+        variable__in=variables,
+        day__gte=_datetime(first),
+        day__lt=_datetime(first + days * DAY),
+    ).values_list("cell_latitude", "cell_longitude", "variable", "day", "values", "fetched")
+    return [row for row in rows if (row[0], row[1]) in cells]
+
+
+def _unpack(rows):
+    values = np.frombuffer(b"".join(row[4] for row in rows), dtype=np.float32).reshape(-1, HOURS_PER_DAY)
+    fetched = np.frombuffer(b"".join(row[5] for row in rows), dtype=np.int64).reshape(-1, HOURS_PER_DAY)
+    return values, fetched
+
+
+def load_cells(cells, variables, start, end, now):
+    """Read the stored hours of every cell in the window into in-memory matrices.
+
+    Forecast hours fetched longer than WEATHER_FORECAST_TTL ago are treated
+    as missing so they get refreshed; hours that were already in the past
+    when fetched are kept for good.
+    """
+    cells = list(cells)
+    first, days = _day_span(start, end)
+    offset, hours = (start - first) // INTERVAL, (end - start) // INTERVAL
+    shape = (len(cells), len(variables), days * HOURS_PER_DAY)
+    values = np.full(shape, np.nan, dtype=np.float32)
+    held = np.zeros(shape, dtype=bool)
+
+    with timed("db_read"):
+        stored = _stored_days(cells, variables, first, days)
+
+    if stored:
+        cell_index = {cell: idx for idx, cell in enumerate(cells)}
+        rows = {variable: idx for idx, variable in enumerate(variables)}
+        index = np.array([
+            (cell_index[latitude, longitude], rows[variable], (int(day.timestamp()) - first) // DAY)
+            for latitude, longitude, variable, day, *_ in stored
+        ])
+        day_values, fetched = _unpack(stored)
+        times = (first + index[:, 2:] * DAY) + np.arange(HOURS_PER_DAY) * INTERVAL
+        stale_before = int((now - timedelta(seconds=settings.WEATHER_FORECAST_TTL)).timestamp())
+        fresh = (fetched > 0) & ((times < fetched) | (fetched >= stale_before))
+
+        # Scatter each stored day into its cell, variable and 24-hour slot
+        columns = index[:, 2:] * HOURS_PER_DAY + np.arange(HOURS_PER_DAY)
+        cell_rows, variable_rows = index[:, :1], index[:, 1:2]
+        values[cell_rows, variable_rows, columns] = np.where(fresh, day_values, np.nan)
+        held[cell_rows, variable_rows, columns] = fresh
+
+    window = slice(offset, offset + hours)
+    return {
+        cell: _CellState(cell, values[idx, :, window], held[idx, :, window])
+        for idx, cell in enumerate(cells)
+    }
+
+
+def missing_fetches(states, variables, start):
+    """Plan the upstream calls needed to fill every hole in `states`.
+
+    Each cell asks for one contiguous span covering its missing hours and the
+    variables missing in it; cells with the same span and variables share a
+    multi-coordinate request.
+    """
+    groups = defaultdict(list)
+    for state in states.values():
+        missing = ~state.held
+        if not missing.any():
+            continue
+        rows = np.flatnonzero(missing.any(axis=1))
+        columns = np.flatnonzero(missing.any(axis=0))
+        key = (
+            tuple(variables[row] for row in rows),
+            start + int(columns[0]) * INTERVAL,
+            start + (int(columns[-1]) + 1) * INTERVAL,
+        )
+        groups[key].append(state.cell)
+
+    return [
+        UpstreamFetch(cells[idx:idx + MAX_LOCATIONS_PER_REQUEST], fetch_variables, fetch_start, fetch_end)
+        for (fetch_variables, fetch_start, fetch_end), cells in groups.items()
+        for idx in range(0, len(cells), MAX_LOCATIONS_PER_REQUEST)
+    ]
+
+
+def fetch_params(fetch):
+    return {
+        "latitude": ",".join(str(latitude) for latitude, _ in fetch.cells),
+        "longitude": ",".join(str(longitude) for _, longitude in fetch.cells),
+        "hourly": ",".join(fetch.variables),
+        "start_hour": _datetime(fetch.start).strftime("%Y-%m-%dT%H:%M"),
+        "end_hour": _datetime(fetch.end - INTERVAL).strftime("%Y-%m-%dT%H:%M"),
+        "timezone": "GMT",
+    }
+
+
+def response_window(fetch, responses, fetched_at=None):
+    """Read one upstream response per cell into states spanning the fetch."""
+    hours = (fetch.end - fetch.start) // INTERVAL
+    window = {}
+
+    for cell, response in zip(fetch.cells, responses):
+        state = window[cell] = _CellState.empty(cell, fetch.variables, hours, fetched_at)
+        hourly = response.Hourly()
+        first = (hourly.Time() - fetch.start) // hourly.Interval()
+
+        for idx in range(len(fetch.variables)):
+            values = hourly.Variables(idx).ValuesAsNumpy()
+            begin, stop = max(first, 0), min(first + len(values), hours)
+            if begin >= stop:
+                continue
+            state.values[idx, begin:stop] = values[begin - first:stop - first]
+            state.held[idx, begin:stop] = True
+
+    return window
+
+
+def save_window(fetch, window, now):
+    """Store the hours held in a fetched window, keeping the other hours of their days.
+
+    Hours are stamped with the window's `fetched_at` when upstream produced
+    them earlier than `now`.
+    """
+    first, days = _day_span(fetch.start, fetch.end)
+    offset = (fetch.start - first) // INTERVAL
+    cells = list(window)
+    shape = (len(cells), len(fetch.variables), days * HOURS_PER_DAY)
+    values = np.full(shape, np.nan, dtype=np.float32)
+    fetched = np.zeros(shape, dtype=np.int64)
+    for idx, state in enumerate(window.values()):
+        span = slice(offset, offset + state.values.shape[1])
+        values[idx, :, span] = state.values
+        fetched[idx, :, span] = np.where(state.held, int(min(state.fetched_at or now, now).timestamp()), 0)
+
+    shape = (len(cells), len(fetch.variables), days, HOURS_PER_DAY)
+    values, fetched = values.reshape(shape), fetched.reshape(shape)
+
+    with timed("db_write"), transaction.atomic():
+        # Days the fetch only partly covers keep their other stored hours
+        partial = (fetched == 0).any(axis=3) & (fetched > 0).any(axis=3)
+        if partial.any():
+            cell_index = {cell: idx for idx, cell in enumerate(cells)}
+            rows = {variable: idx for idx, variable in enumerate(fetch.variables)}
+            stored = _stored_days(cells, list(fetch.variables), first, days)
+            stored_values, stored_fetched = _unpack(stored)
+            for number, (latitude, longitude, variable, day, *_) in enumerate(stored):
+                slot = (cell_index[latitude, longitude], rows[variable], (int(day.timestamp()) - first) // DAY)
+                keep = fetched[slot] == 0
+                values[slot][keep] = stored_values[number][keep]
+                fetched[slot][keep] = stored_fetched[number][keep]
+
+        observations = [
+            ObservationDay(
+                cell_latitude=cell[0],
+                cell_longitude=cell[1],
+                variable=variable,
+                day=_datetime(first + number * DAY),
+                values=values[idx, row, number].tobytes(),
+                fetched=fetched[idx, row, number].tobytes(),
+            )
+            for idx, cell in enumerate(cells)
+            for row, variable in enumerate(fetch.variables)
+            for number in range(days)
+            if fetched[idx, row, number].any()
+        ]
+        ObservationDay.objects.bulk_create(
+            observations,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["cell_latitude", "cell_longitude", "variable", "day"],
+            update_fields=["values", "fetched"],
+        )
+
+
+def merge_window(states, variables, start, fetch, window):
+    """Copy the hours held in a fetched window into the request's `states`."""
+    rows = [variables.index(variable) for variable in fetch.variables]
+    offset = (fetch.start - start) // INTERVAL
+
+    for cell, fetched in window.items():
+        state = states[cell]
+        span = slice(offset, offset + fetched.values.shape[1])
+        for idx, row in enumerate(rows):
+            held = fetched.held[idx]
+            state.values[row, span][held] = fetched.values[idx][held]
+            state.held[row, span] |= held
+
+
+def _flight_key(fetch):
+    return ("openmeteo", tuple(fetch.cells), fetch.variables, fetch.start, fetch.end)
+
+
+def _stored_window(fetch, now):
+    # Another worker made this fetch; use what it saved if it covers everything
+    window = load_cells(set(fetch.cells), list(fetch.variables), fetch.start, fetch.end, now)
+    if all(state.held.all() for state in window.values()):
+        return window
+    return None
+
+
+def _count_cells(states):
+    held = sum(state.held.all() for state in states.values())
+    count_cache("weather_store", True, held)
+    count_cache("weather_store", False, len(states) - held)
+
+
+def _check_response(response):
+    if response.status_code in (400, 429):
+        from openmeteo_requests.Client import OpenMeteoRequestsError
+
+        raise OpenMeteoRequestsError(response.json())
+    response.raise_for_status()
+
+
+def request_window(fetch, client=None):
+    """Request one UpstreamFetch from Open-Meteo without touching the database.
+
+    A response replayed from the URL cache keeps the time it was first
+    fetched, so the store does not take old forecasts for fresh ones.
+    """
+    client = client or openmeteo_client()
+    with timed("openmeteo"):
+        response = client.session.get(METEO_URL, params={**fetch_params(fetch), "format": "flatbuffers"})
+    _check_response(response)
+    fetched_at = response.created_at if getattr(response, "from_cache", False) else None
+    return response_window(fetch, parse_weather_response(response.content), fetched_at)
+
+
+def _fetch_window(fetch, now, client):
+    window = request_window(fetch, client)
+    save_window(fetch, window, now)
+    return window
+
+
+def fetch_window(fetch, now, client=None):
+    """Request and save one UpstreamFetch, sharing identical in-flight fetches."""
+    return flights.do(
+        _flight_key(fetch), _fetch_window, fetch, now, client or openmeteo_client(),
+        recheck=lambda: _stored_window(fetch, now),
+    )
+
+
+def assemble(states, cells, variables, start):
+    series = []
+    for cell in cells:
+        state = states[cell]
+        series.append(HourlySeries(
+            cell[0], cell[1], start, INTERVAL,
+            {variable: state.values[idx] for idx, variable in enumerate(variables)},
+        ))
+    return series
+
+
+def get_hourly_many(locations, variables, start, end, now=None):
+    """Return a HourlySeries per (latitude, longitude) for the [start, end) window.
+
+    Hours already held for a location's grid cell are served from the
+    database and only the missing ranges are requested from Open-Meteo.
+    """
+    now = now or django_timezone.now()
+    variables = list(dict.fromkeys(variables))
+    cells = [grid_cell(latitude, longitude) for latitude, longitude in locations]
+
+    states = load_cells(set(cells), variables, start, end, now)
+    _count_cells(states)
+    for fetch in missing_fetches(states, variables, start):
+        merge_window(states, variables, start, fetch, fetch_window(fetch, now))
+
+    return assemble(states, cells, variables, start)
+
+
+def get_hourly(latitude, longitude, variables, start, end, now=None):
+    return get_hourly_many([(latitude, longitude)], variables, start, end, now)[0]
+
+
+def refresh_ahead(locations, variables, start, end, lead, now=None):
+    """Refetch the hours of the locations' grid cells that go stale within `lead` seconds.
+
+    Skips the URL cache so the data is really new. Returns the number of
+    upstream calls made.
+    """
+    now = now or django_timezone.now()
+    variables = list(dict.fromkeys(variables))
+    cells = {grid_cell(latitude, longitude) for latitude, longitude in locations}
+
+    states = load_cells(cells, variables, start, end, now + timedelta(seconds=lead))
+    fetches = missing_fetches(states, variables, start)
+    for fetch in fetches:
+        fetch_window(fetch, now, openmeteo_refresh_client())
+    return len(fetches)
+
+
+def parse_weather_response(data):
+    """Split an Open-Meteo FlatBuffers body into one response per location."""
+    from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+    messages = []
+    position = 0
+    while position < len(data):
+        length = int.from_bytes(data[position:position + 4], byteorder="little")
+        messages.append(WeatherApiResponse.GetRootAs(data, position + 4))
+        position += length + 4
+    return messages
+
+
+async def _fetch_async(fetch):
+    params = {**fetch_params(fetch), "format": "flatbuffers"}
+    with timed("openmeteo"):
+        response = await async_client().get(METEO_URL, params=params)
+    _check_response(response)
+    return parse_weather_response(response.content)
+
+
+async def _fetch_window_async(fetch, now):
+    window = response_window(fetch, await _fetch_async(fetch))
+    await sync_to_async(save_window)(fetch, window, now)
+    return window
+
+
+async def fetch_window_async(fetch, now):
+    return await flights.do_async(
+        _flight_key(fetch), _fetch_window_async, fetch, now,
+        recheck=lambda: _stored_window(fetch, now),
+    )
+
+
+async def get_hourly_many_async(locations, variables, start, end, now=None):
+    """Non-blocking get_hourly_many: all missing ranges are fetched concurrently."""
+    now = now or django_timezone.now()
+    variables = list(dict.fromkeys(variables))
+    cells = [grid_cell(latitude, longitude) for latitude, longitude in locations]
+
+    states = await sync_to_async(load_cells)(set(cells), variables, start, end, now)
+    _count_cells(states)
+    fetches = missing_fetches(states, variables, start)
+    windows = await asyncio.gather(*(fetch_window_async(fetch, now) for fetch in fetches))
+    for fetch, window in zip(fetches, windows):
+        merge_window(states, variables, start, fetch, window)
+
+    return assemble(states, cells, variables, start)
+
+
+async def get_hourly_async(latitude, longitude, variables, start, end, now=None):
+    return (await get_hourly_many_async([(latitude, longitude)], variables, start, end, now))[0]
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.server_timing_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -135,3 +136,117 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 DEFAULT_PERMISSION_CLASSES: ["rest_framework.permissions.AllowAny"]
 CORS_ORIGIN_ALLOW_ALL = True
+
+# Hourly weather time-series store: grid cell size in degrees and how long
+# fetched forecast hours stay fresh before they are requested again.
+WEATHER_GRID_CELL_DEGREES = config("WEATHER_GRID_CELL_DEGREES", default=0.05, cast=float)
+WEATHER_FORECAST_TTL = config("WEATHER_FORECAST_TTL", default=3600, cast=int)
+
+# Retention (manage.py compact_weather): WeatherData hours older than
+# WEATHER_HOURLY_RETENTION_DAYS are compacted into daily aggregates, which
+# are kept WEATHER_DAILY_RETENTION_DAYS (0 keeps them), and the upstream
+# hour store is purged after WEATHER_STORE_RETENTION_DAYS. On a partitioned
+# PostgreSQL WeatherData, WEATHER_PARTITION_MONTHS_AHEAD months are created
+# ahead of time.
+WEATHER_HOURLY_RETENTION_DAYS = config("WEATHER_HOURLY_RETENTION_DAYS", default=90, cast=int)
+WEATHER_DAILY_RETENTION_DAYS = config("WEATHER_DAILY_RETENTION_DAYS", default=0, cast=int)
+WEATHER_STORE_RETENTION_DAYS = config("WEATHER_STORE_RETENTION_DAYS", default=45, cast=int)
+WEATHER_PARTITION_MONTHS_AHEAD = config("WEATHER_PARTITION_MONTHS_AHEAD", default=3, cast=int)
+
+# Nearest-neighbour index over stored WeatherData locations: how often it is
+# rebuilt from the database (seconds) and how far (km) a coordinate may be
+# from a stored location to use its history.
+SPATIAL_INDEX_REFRESH_INTERVAL = config("SPATIAL_INDEX_REFRESH_INTERVAL", default=300, cast=int)
+SPATIAL_NEAREST_MAX_KM = config("SPATIAL_NEAREST_MAX_KM", default=5.0, cast=float)
+
+# Eircode geocode cache: how long found and ZERO_RESULTS answers are kept
+# (seconds) and how many entries the in-process LRU holds.
+GEOCODE_CACHE_TTL = config("GEOCODE_CACHE_TTL", default=90 * 24 * 3600, cast=int)
+GEOCODE_NEGATIVE_TTL = config("GEOCODE_NEGATIVE_TTL", default=24 * 3600, cast=int)
+GEOCODE_LRU_SIZE = config("GEOCODE_LRU_SIZE", default=10000, cast=int)
+
+# Serve the API with the async (ASGI-native) views in api/async_views.py
+API_ASYNC_VIEWS = config("API_ASYNC_VIEWS", default=False, cast=bool)
+
+# Shared upstream HTTP clients (Google Geocoding, Open-Meteo): connections
+# kept alive per host, timeouts in seconds and retries for Open-Meteo.
+UPSTREAM_POOL_SIZE = config("UPSTREAM_POOL_SIZE", default=20, cast=int)
+UPSTREAM_CONNECT_TIMEOUT = config("UPSTREAM_CONNECT_TIMEOUT", default=3.05, cast=float)
+UPSTREAM_READ_TIMEOUT = config("UPSTREAM_READ_TIMEOUT", default=10, cast=float)
+UPSTREAM_RETRIES = config("UPSTREAM_RETRIES", default=5, cast=int)
+
+# Open-Meteo response cache. BACKEND is "memory" (per-process LRU),
+# "filesystem" (files under LOCATION), "django" (the CACHE_ALIAS entry of
+# CACHES, e.g. Redis) or "sqlite" (LOCATION.sqlite). Expired responses are
+# served for up to STALE_WHILE_REVALIDATE seconds while they are refreshed
+# in the background.
+UPSTREAM_CACHE = {
+    "BACKEND": config("UPSTREAM_CACHE_BACKEND", default="memory"),
+    "LOCATION": config("UPSTREAM_CACHE_LOCATION", default=str(BASE_DIR / ".upstream_cache")),
+    "CACHE_ALIAS": config("UPSTREAM_CACHE_ALIAS", default="default"),
+    "MAX_ENTRIES": config("UPSTREAM_CACHE_MAX_ENTRIES", default=1000, cast=int),
+    "EXPIRE_AFTER": config("UPSTREAM_CACHE_EXPIRE_AFTER", default=3600, cast=int),
+    "STALE_WHILE_REVALIDATE": config("UPSTREAM_CACHE_STALE_WHILE_REVALIDATE", default=600, cast=int),
+}
+
+# Background prefetching (manage.py prefetch_weather): every PREFETCH_INTERVAL
+# seconds the PREFETCH_TOP_LOCATIONS most requested locations over the last
+# PREFETCH_HIT_WINDOW seconds get their forecast and geocode refreshed when
+# they expire within PREFETCH_LEAD seconds. Views write their hit counts
+# every PREFETCH_HIT_FLUSH_INTERVAL seconds. PREFETCH_HIT_BACKGROUND_FLUSH
+# adds a timer writing them once traffic stops and a write when the worker
+# exits; enable it for long-running servers, not one-off commands or tests.
+PREFETCH_INTERVAL = config("PREFETCH_INTERVAL", default=300, cast=int)
+PREFETCH_LEAD = config("PREFETCH_LEAD", default=900, cast=int)
+PREFETCH_TOP_LOCATIONS = config("PREFETCH_TOP_LOCATIONS", default=200, cast=int)
+PREFETCH_FORECAST_DAYS = config("PREFETCH_FORECAST_DAYS", default=7, cast=int)
+PREFETCH_HIT_WINDOW = config("PREFETCH_HIT_WINDOW", default=7 * 24 * 3600, cast=int)
+PREFETCH_HIT_FLUSH_INTERVAL = config("PREFETCH_HIT_FLUSH_INTERVAL", default=60, cast=int)
+PREFETCH_HIT_BACKGROUND_FLUSH = config("PREFETCH_HIT_BACKGROUND_FLUSH", default=False, cast=bool)
+
+# Concurrent identical upstream fetches share one call within a process. Set
+# SINGLE_FLIGHT_CACHE_ALIAS to a CACHES entry shared by all workers (Redis,
+# memcached, database) to also coalesce them across processes. Waiting
+# callers fetch by themselves after SINGLE_FLIGHT_LOCK_TIMEOUT seconds, when
+# the lock is dropped.
+SINGLE_FLIGHT_CACHE_ALIAS = config("SINGLE_FLIGHT_CACHE_ALIAS", default="")
+SINGLE_FLIGHT_LOCK_TIMEOUT = config("SINGLE_FLIGHT_LOCK_TIMEOUT", default=30, cast=int)
+
+# Rendered responses of the polled endpoints (analytics, coordinates) are
+# kept RESPONSE_CACHE_TTL seconds in this CACHES entry and revalidated with
+# ETag / Last-Modified.
+RESPONSE_CACHE_ALIAS = config("RESPONSE_CACHE_ALIAS", default="default")
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", default=300, cast=int)
+
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# Per-stage timings (geocode, openmeteo, db_read, db_write, analytics, render)
+# are always collected for /api/metrics/; SERVER_TIMING_HEADER also returns
+# them to clients in a Server-Timing response header.
+SERVER_TIMING_HEADER = config("SERVER_TIMING_HEADER", default=False, cast=bool)
+# /api/metrics/ answers staff users and these client addresses (REMOTE_ADDR,
+# so behind a proxy list the scraper's address as the proxy reports it)
+METRICS_ALLOWED_IPS = config("METRICS_ALLOWED_IPS", default="127.0.0.1,::1", cast=Csv())
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "verbose": {"format": "{asctime} {levelname} {name} {message}", "style": "{"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "verbose"},
+    },
+    "loggers": {
+        "api": {"handlers": ["console"], "level": config("API_LOG_LEVEL", default="INFO")},
+    },
+}
+
+# Analytics rules and tariffs live in the database (editable in the admin);
+# each process checks for a new version at most this often (seconds).
+ANALYTICS_RULES_CHECK_INTERVAL = config("ANALYTICS_RULES_CHECK_INTERVAL", default=5, cast=int)